@@ -0,0 +1,154 @@
+# agents/browser_profile.py
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("browser_profile")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Perfiles persistentes de Chromium (caché HTTP en disco, cookies y
+# localStorage): las cargas repetidas de TMDB salen de la caché del navegador
+PROFILES_ENABLED = os.environ.get("FACTCHECK_BROWSER_PROFILES", "1") == "1"
+PROFILE_DIR = os.environ.get("FACTCHECK_BROWSER_PROFILE_PATH", os.path.join(ROOT_DIR, "cache", "browser"))
+PROFILE_MAX_AGE = float(os.environ.get("FACTCHECK_BROWSER_PROFILE_MAX_AGE", str(6 * 3600)))
+
+# Estado compartido por todos los huecos (consentimiento de OneTrust incluido)
+STATE_PATH = os.path.join(PROFILE_DIR, "storage_state.json")
+CONSENT_COOKIE = "OptanonAlertBoxClosed"
+
+SLOT_POLL_INTERVAL = 0.2  # segundos entre intentos de reservar un hueco libre
+
+_state_lock = threading.Lock()
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos, perfiles efímeros
+    fcntl = None
+
+
+@contextmanager
+def profile_slot(slots: int):
+    """
+    Hueco de navegador en uso exclusivo. Hay `slots` ficheros de bloqueo
+    y cada navegador abierto retiene uno con flock, así el total no pasa
+    de `slots` aunque haya varios workers. Si no hay ninguno libre espera
+    (respetando deadline y cancelación). Entrega el directorio de perfil
+    del hueco (Chromium no admite dos instancias sobre el mismo), o None
+    con los perfiles desactivados. Sin fcntl (Windows) no hay tope entre
+    procesos: solo el semáforo de cada worker.
+    """
+    if fcntl is None:
+        yield None
+        return
+
+    from agents.resilience import check_deadline, wait_or_cancel
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    waiting = False
+    while True:
+        for slot in range(slots):
+            lock_file = open(os.path.join(PROFILE_DIR, f"slot-{slot}.lock"), "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+
+            try:
+                yield prepare_slot(slot) if PROFILES_ENABLED else None
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+            return
+
+        if not waiting:
+            logger.info(f"⏳ Los {slots} navegadores permitidos están en uso, esperando hueco")
+            waiting = True
+        check_deadline()
+        wait_or_cancel(SLOT_POLL_INTERVAL)
+
+
+def prepare_slot(slot: int) -> str:
+    """Directorio del hueco; se borra si es más antiguo que PROFILE_MAX_AGE"""
+    path = os.path.join(PROFILE_DIR, f"slot-{slot}")
+    marker = os.path.join(path, ".created")
+
+    if os.path.exists(marker) and time.time() - os.path.getmtime(marker) > PROFILE_MAX_AGE:
+        logger.info(f"♻️  Perfil de navegador {slot} caducado, se regenera")
+        reset_slot(path)
+
+    if not os.path.exists(marker):
+        os.makedirs(path, exist_ok=True)
+        with open(marker, "w") as f:
+            f.write(str(time.time()))
+    return path
+
+
+def reset_slot(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def load_shared_state():
+    """storage_state guardado por cualquier hueco, o None si caducó"""
+    try:
+        if time.time() - os.path.getmtime(STATE_PATH) > PROFILE_MAX_AGE:
+            os.remove(STATE_PATH)
+            return None
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_shared_state(context):
+    """Guarda cookies y localStorage del contexto (escritura atómica)"""
+    if not PROFILES_ENABLED:
+        return
+    try:
+        state = context.storage_state()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with _state_lock:
+            tmp_path = f"{STATE_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, STATE_PATH)
+    except Exception as e:
+        logger.debug(f"No se pudo guardar el estado del navegador: {e}")
+
+
+def apply_shared_state(context, state: dict):
+    """Añade al contexto las cookies y el localStorage compartidos"""
+    if not state:
+        return
+    if state.get("cookies"):
+        context.add_cookies(state["cookies"])
+
+    storage = {
+        origin["origin"]: [[item["name"], item["value"]] for item in origin.get("localStorage", [])]
+        for origin in state.get("origins", [])
+    }
+    if any(storage.values()):
+        # Solo rellena las claves que falten: el perfil del hueco manda
+        context.add_init_script(f"""
+            (() => {{
+                const items = {json.dumps(storage)}[location.origin] || [];
+                try {{
+                    for (const [key, value] of items) {{
+                        if (localStorage.getItem(key) === null) localStorage.setItem(key, value);
+                    }}
+                }} catch (e) {{}}
+            }})();
+        """)
+
+
+def has_consent(context) -> bool:
+    try:
+        return any(cookie["name"] == CONSENT_COOKIE for cookie in context.cookies())
+    except Exception:
+        return False
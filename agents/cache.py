@@ -0,0 +1,218 @@
+# agents/cache.py
+
+import logging
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("cache")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "memory" (por proceso) o "sqlite" (compartida entre workers)
+CACHE_BACKEND = os.environ.get("FACTCHECK_CACHE_BACKEND", "memory")
+CACHE_PATH = os.environ.get("FACTCHECK_CACHE_PATH", os.path.join(ROOT_DIR, "cache", "shared_cache.sqlite3"))
+
+# Registro de cachés con nombre, para exponer estadísticas
+CACHES = {}
+
+
+class TTLCache:
+    """
+    Caché en memoria con expiración (TTL) y tamaño máximo (LRU).
+    Segura entre hilos; lleva cuenta de aciertos, fallos y expulsiones.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600, register: bool = True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if register:
+            CACHES[name] = self
+
+    def get(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.data[key]
+                self.misses += 1
+                return None
+
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        with self.lock:
+            self.data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self.data.move_to_end(key)
+
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self.data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+class SQLiteCache:
+    """
+    Caché compartida entre procesos sobre SQLite en modo WAL.
+    Misma interfaz que TTLCache; los valores se guardan como JSON.
+    Los contadores de aciertos son por proceso.
+    """
+
+    EVICT_EVERY = 64  # escrituras entre comprobaciones de tamaño
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600, register: bool = True, path: str = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path or CACHE_PATH
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (namespace, expires)")
+
+        if register:
+            CACHES[name] = self
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _count(self, hit: bool):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?",
+            (self.name, str(key))
+        ).fetchone()
+
+        # time.time(): el reloj tiene que ser común a todos los procesos
+        if row is None or row[1] < time.time():
+            self._count(False)
+            return None
+
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl: float = None):
+        expires = time.time() + (ttl or self.ttl)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+                (self.name, str(key), json.dumps(value, ensure_ascii=False, default=str), expires)
+            )
+
+        with self.lock:
+            self.writes += 1
+            check = self.writes % self.EVICT_EVERY == 0
+        if check:
+            self._evict()
+
+    def _evict(self):
+        """Borra expirados y, si sobra, las entradas que antes expiran"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND expires < ?", (self.name, time.time()))
+            size = conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.name,)).fetchone()[0]
+            excess = size - self.maxsize
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN ("
+                    " SELECT rowid FROM cache WHERE namespace = ? ORDER BY expires LIMIT ?)",
+                    (self.name, excess)
+                )
+                with self.lock:
+                    self.evictions += excess
+
+    def delete(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, str(key)))
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.name,))
+
+    def stats(self) -> dict:
+        size = self._conn().execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.name,)).fetchone()[0]
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "pid": os.getpid(),
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def make_cache(name: str, maxsize: int = 1024, ttl: float = 3600, register: bool = True):
+    """Crea la caché con el backend configurado (FACTCHECK_CACHE_BACKEND)"""
+    if CACHE_BACKEND == "sqlite":
+        try:
+            return SQLiteCache(name, maxsize=maxsize, ttl=ttl, register=register)
+        except sqlite3.Error as e:
+            logger.error(f"❌ No se pudo abrir la caché compartida ({e}), usando memoria")
+    return TTLCache(name, maxsize=maxsize, ttl=ttl, register=register)
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in CACHES.items()}
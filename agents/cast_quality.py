@@ -0,0 +1,154 @@
+# agents/cast_quality.py
+
+import logging
+import re
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("cast_quality")
+
+# Estrategia que funcionó por título ("title:movie/597") y victorias de
+# cada estrategia por maquetación de página ("layout:movie:101101")
+STRATEGY_CACHE = make_cache("cast_strategies", maxsize=4096, ttl=7 * 24 * 3600)
+
+# Tokens de nombres vistos en repartos fiables (enlazados a /person/):
+# el modelo de verosimilitud aprende los nombres reales con el uso
+NAME_TOKENS = make_cache("cast_name_tokens", maxsize=50000, ttl=30 * 24 * 3600)
+
+ACCEPT_SCORE = 0.65   # lista buena: se deja de probar estrategias
+MIN_SCORE = 0.45      # por debajo, mejor sin reparto que con texto de la interfaz
+NAME_MIN = 0.35       # nombres sueltos por debajo se descartan de la lista
+LEARN_LINKED = 0.8    # proporción de nombres enlazados para aprender sus tokens
+
+# Texto de la interfaz de TMDB que las heurísticas confunden con nombres
+UI_WORDS = {
+    "cast", "crew", "full", "top", "billed", "view", "more", "reviews", "review", "discussions",
+    "media", "videos", "backdrops", "posters", "trailer", "play", "watch", "now", "streaming",
+    "sign", "login", "join", "tmdb", "movies", "movie", "shows", "people", "popular", "trending",
+    "upcoming", "rated", "season", "seasons", "episode", "episodes", "keywords", "status",
+    "budget", "revenue", "language", "original", "facts", "social", "recommendations",
+    "collection", "contribute", "edit", "report", "issue", "leaderboard", "favorite", "rating",
+    "score", "user", "overview", "director", "writer", "producer", "screenplay", "characters",
+    "character", "network", "type", "content", "lists", "add", "list",
+    "reparto", "equipo", "ver", "mas", "resenas", "temporada", "temporadas", "episodios",
+    "pelicula", "peliculas", "serie", "series", "tendencias", "populares", "valoracion"
+}
+
+# Partículas de apellidos que van en minúscula
+NAME_PARTICLES = {"de", "del", "la", "le", "van", "von", "der", "da", "di", "dos", "du", "bin", "al", "y", "e"}
+
+NAME_CHARS = re.compile(r"^[^\W\d_][\w.'’\-]*$")
+
+
+def name_tokens(name: str) -> list:
+    return [token for token in normalize_text(name).replace(".", " ").split() if token not in NAME_PARTICLES]
+
+
+def name_likelihood(name: str) -> float:
+    """
+    Probabilidad aproximada (0-1) de que el texto sea un nombre de
+    persona: forma (2-4 palabras con mayúscula, sin cifras ni palabras de
+    la interfaz) más el parecido con nombres ya vistos en repartos fiables.
+    """
+    name = (name or "").strip()
+    words = name.split()
+    if not words or len(name) > 40 or any(char.isdigit() for char in name):
+        return 0.0
+
+    tokens = name_tokens(name)
+    if any(token in UI_WORDS for token in tokens):
+        return 0.05
+
+    shape = 1.0
+    if not 2 <= len(words) <= 4:
+        shape = 0.4  # "Zendaya" existe, pero es la excepción
+    if not all(NAME_CHARS.match(word) for word in words):
+        shape *= 0.3
+    capitalized = [word[0].isupper() for word in words if word.lower() not in NAME_PARTICLES]
+    if not capitalized or not all(capitalized):
+        shape *= 0.3
+    if name.isupper() and len(name) > 3:
+        shape *= 0.5  # titulares en mayúsculas de la interfaz
+
+    known = sum(1 for token in tokens if NAME_TOKENS.get(token)) / len(tokens) if tokens else 0.0
+    return round(0.8 * shape + 0.2 * known, 3)
+
+
+def score_cast(names: list, signals: dict = None) -> dict:
+    """
+    Puntúa una lista candidata (0-1) con la verosimilitud de cada nombre y
+    las señales estructurales de la página: nombres enlazados a /person/ y
+    con personaje al lado. Devuelve {"score", "names", "linked"} con los
+    nombres improbables ya descartados.
+    """
+    unique = []
+    for name in names or []:
+        name = re.sub(r"\s+", " ", str(name)).strip()
+        if name and name not in unique:
+            unique.append(name)
+    if not unique:
+        return {"score": 0.0, "names": [], "linked": 0.0}
+
+    signals = signals or {}
+    linked_names = {normalize_text(n) for n in signals.get("linked", [])}
+    character_names = {normalize_text(n) for n in signals.get("with_character", [])}
+
+    # Un nombre de forma rara ("Zendaya") se salva si enlaza a /person/
+    scored = [(name, name_likelihood(name)) for name in unique]
+    kept = [
+        (name, likelihood) for name, likelihood in scored
+        if likelihood >= NAME_MIN or (likelihood > 0.1 and normalize_text(name) in linked_names)
+    ]
+    if not kept:
+        return {"score": 0.0, "names": [], "linked": 0.0}
+
+    # La basura descartada también resta: la lista venía contaminada
+    shape = sum(likelihood for _, likelihood in kept) / len(kept) * (len(kept) / len(unique))
+
+    linked = sum(1 for name, _ in kept if normalize_text(name) in linked_names) / len(unique)
+    with_character = sum(1 for name, _ in kept if normalize_text(name) in character_names) / len(unique)
+
+    # Sin enlaces a personas en la página no hay señal estructural que valga
+    if linked_names:
+        score = 0.5 * shape + 0.3 * linked + 0.2 * with_character
+    else:
+        score = shape
+
+    return {"score": round(score, 3), "names": [name for name, _ in kept], "linked": round(linked, 3)}
+
+
+def learn_names(result: dict):
+    """Los repartos enlazados a /person/ alimentan el modelo de nombres"""
+    if result.get("linked", 0) < LEARN_LINKED:
+        return
+    for name in result["names"]:
+        for token in name_tokens(name):
+            NAME_TOKENS.set(token, 1)
+
+
+def strategy_order(title_key: str, layout: str, default: list) -> list:
+    """Primero la estrategia de este título, luego las que ganan en esta maquetación"""
+    order = []
+    remembered = STRATEGY_CACHE.get(f"title:{title_key}")
+    if remembered:
+        order.append(remembered)
+
+    wins = STRATEGY_CACHE.get(f"layout:{layout}") or {}
+    order += sorted(wins, key=wins.get, reverse=True)
+    order += default
+
+    seen = set()
+    return [name for name in order if name in default and not (name in seen or seen.add(name))]
+
+
+def remember_strategy(title_key: str, layout: str, strategy: str):
+    STRATEGY_CACHE.set(f"title:{title_key}", strategy)
+    wins = dict(STRATEGY_CACHE.get(f"layout:{layout}") or {})
+    wins[strategy] = wins.get(strategy, 0) + 1
+    STRATEGY_CACHE.set(f"layout:{layout}", wins)
+
+
+def forget_strategy(title_key: str):
+    """La estrategia recordada ya no da un reparto fiable para el título"""
+    STRATEGY_CACHE.delete(f"title:{title_key}")
@@ -0,0 +1,283 @@
+# agents/claim_verifier.py
+
+import logging
+import re
+import zlib
+import numpy as np
+
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("claim_verifier")
+
+EMBEDDING_DIM = 512
+MATCH_THRESHOLD = 0.85
+MISMATCH_THRESHOLD = 0.45
+
+NAME = r"([A-ZÁÉÍÓÚÑ][\w'.-]+(?:\s+(?:de\s+|del\s+|van\s+|von\s+)?[A-ZÁÉÍÓÚÑ][\w'.-]+)*)"
+
+DIRECTOR_PATTERNS = [
+    rf"dirigid[ao]s?\s+por\s+{NAME}",
+    rf"directed\s+by\s+{NAME}",
+    rf"director\s+(?:es|fue|era)\s+{NAME}",
+    rf"{NAME}\s+(?:dirigió|dirige|directed)",
+]
+
+CAST_PATTERNS = [
+    rf"{NAME}\s+(?:actuó|actúa|actua|aparece|apareció|sale|salió|participó|participa|trabajó)\s+en",
+    rf"protagonizad[ao]s?\s+por\s+{NAME}",
+    rf"{NAME}\s+(?:protagoniza|protagonizó)",
+    rf"{NAME}\s+(?:está|estuvo)\s+en\s+el\s+(?:reparto|elenco)",
+]
+
+# Palabra clave → género canónico (TMDB puede mostrar géneros en inglés o español)
+GENRE_KEYWORDS = {
+    "terror": "horror", "horror": "horror",
+    "comedia": "comedy", "comedy": "comedy",
+    "drama": "drama",
+    "acción": "action", "accion": "action", "action": "action",
+    "ciencia ficción": "science fiction", "ciencia ficcion": "science fiction",
+    "science fiction": "science fiction", "sci-fi": "science fiction",
+    "animación": "animation", "animacion": "animation", "animation": "animation",
+    "romance": "romance", "romántica": "romance", "romantica": "romance",
+    "aventura": "adventure", "adventure": "adventure",
+    "suspense": "thriller", "suspenso": "thriller", "thriller": "thriller",
+    "fantasía": "fantasy", "fantasia": "fantasy", "fantasy": "fantasy",
+    "documental": "documentary", "documentary": "documentary",
+    "crimen": "crime", "crime": "crime",
+    "misterio": "mystery", "mystery": "mystery",
+    "bélica": "war", "belica": "war", "guerra": "war", "war": "war",
+    "western": "western", "wéstern": "western",
+    "musical": "music", "música": "music", "music": "music",
+    "familiar": "family", "familia": "family", "family": "family",
+    "histórica": "history", "historica": "history", "historia": "history", "history": "history",
+    "política": "politics", "politica": "politics", "politics": "politics",
+}
+
+# Géneros compuestos de las series en TMDB: "Sci-Fi & Fantasy",
+# "Action & Adventure", "War & Politics" (o "Acción y aventura")
+COMPOUND_GENRE = re.compile(r"\s*&\s*|\s+(?:y|and)\s+")
+
+# Solo cuenta como hecho de género si va en contexto ("película de terror", "un drama")
+GENRE_CONTEXT = r"\b(?:genero|pelicula|serie|film|cinta|un|una|es de)\s+(?:de\s+)?"
+
+# Palabras que no afirman nada por sí mismas: lo que quede fuera de esta
+# lista, del título y de los hechos extraídos es una afirmación sin verificar
+FILLER_WORDS = {
+    "es", "era", "fue", "son", "ser", "verdad", "cierto", "falso", "que", "si", "no",
+    "el", "la", "los", "las", "lo", "un", "una", "unos", "unas", "de", "del", "al", "a",
+    "en", "y", "e", "o", "con", "por", "su", "sus", "se", "esta", "este", "ese", "esa",
+    "pelicula", "serie", "film", "cinta", "obra", "titulo", "genero",
+    "ano", "estreno", "estrenada", "estrenado", "salio", "lanzada", "lanzado",
+    "the", "an", "is", "was", "it", "of", "in", "and", "true", "released", "movie",
+}
+
+
+def embed_names(names: list) -> np.ndarray:
+    """
+    Embedding determinista por trigramas de caracteres (hashing trick),
+    normalizado L2. Devuelve una matriz (len(names), EMBEDDING_DIM).
+    """
+    matrix = np.zeros((len(names), EMBEDDING_DIM), dtype=np.float32)
+
+    for row, name in enumerate(names):
+        padded = f"  {normalize_text(name)} "
+        for i in range(len(padded) - 2):
+            matrix[row, zlib.crc32(padded[i:i + 3].encode()) % EMBEDDING_DIM] += 1.0
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def name_similarity(mentions: list, candidates: list) -> np.ndarray:
+    """
+    Similitud (len(mentions), len(candidates)) en una sola pasada.
+    Compara con el nombre completo y con el apellido, para que
+    "DiCaprio" encaje con "Leonardo DiCaprio".
+    """
+    if not mentions or not candidates:
+        return np.zeros((len(mentions), len(candidates)), dtype=np.float32)
+
+    mention_vecs = embed_names(mentions)
+    full_vecs = embed_names(candidates)
+    surname_vecs = embed_names([c.split()[-1] if c.split() else c for c in candidates])
+
+    return np.maximum(mention_vecs @ full_vecs.T, mention_vecs @ surname_vecs.T)
+
+
+def split_claim(claim: str) -> list:
+    """
+    Divide una afirmación en hechos atómicos: año, director, reparto y
+    género. Cada hecho guarda en "span" el texto que lo expresa.
+    """
+    facts = []
+
+    for match in re.finditer(r"\b(19\d{2}|20\d{2})\b", claim):
+        facts.append({"type": "year", "value": match.group(1), "span": match.group(0)})
+
+    for pattern in DIRECTOR_PATTERNS:
+        for match in re.finditer(pattern, claim):
+            facts.append({"type": "director", "value": match.group(1).strip(), "span": match.group(0)})
+
+    for pattern in CAST_PATTERNS:
+        for match in re.finditer(pattern, claim):
+            facts.append({"type": "cast", "value": match.group(1).strip(), "span": match.group(0)})
+
+    normalized = normalize_text(claim)
+    seen_genres = set()
+    for keyword, genre in GENRE_KEYWORDS.items():
+        match = re.search(rf"{GENRE_CONTEXT}{re.escape(normalize_text(keyword))}\b", normalized)
+        if genre not in seen_genres and match:
+            seen_genres.add(genre)
+            facts.append({"type": "genre", "value": genre, "span": match.group(0)})
+
+    return facts
+
+
+def uncovered_words(claim: str, facts: list, title: str = None) -> list:
+    """
+    Palabras de la afirmación que no explican ni el título ni los hechos
+    extraídos: en "Titanic de 1997 ganó 20 Oscars" quedan "gano", "20" y
+    "oscars", así que acertar el año no basta para darla por verdadera.
+    """
+    text = normalize_text(claim)
+    pieces = [title] + [fact.get("span") for fact in facts]
+    for piece in sorted((normalize_text(p) for p in pieces if p), key=len, reverse=True):
+        text = text.replace(piece, " ")
+    return [word for word in re.findall(r"\w+", text) if word not in FILLER_WORDS]
+
+
+def canonical_genres(genres: list) -> tuple:
+    """
+    (géneros canónicos, géneros sin traducción) de la evidencia; los
+    compuestos de las series cuentan como cada una de sus partes.
+    """
+    known, unknown = set(), set()
+    for genre in genres or []:
+        for part in COMPOUND_GENRE.split(normalize_text(genre)):
+            if part in GENRE_KEYWORDS:
+                known.add(GENRE_KEYWORDS[part])
+            elif part:
+                unknown.add(part)
+    return known, unknown
+
+
+def verify_claims(claims: list, evidence: dict) -> list:
+    """
+    Verifica un lote de afirmaciones contra un registro de evidencia.
+    Todas las menciones de personas del lote se puntúan en una sola
+    multiplicación de matrices contra reparto y director.
+    Devuelve, por afirmación, un resultado de fact-check o None si el
+    motor no puede decidir (entonces se consulta al LLM).
+    """
+    facts_per_claim = [split_claim(claim) for claim in claims]
+
+    cast = [c for c in (evidence.get("cast") or []) if c]
+    director = evidence.get("director")
+    if not director or director == "No disponible":
+        director = None
+    # "Lana Wachowski, Lilly Wachowski": cada director es un candidato
+    directors = [d.strip() for d in director.split(",") if d.strip()] if director else []
+    genres, unknown_genres = canonical_genres(evidence.get("genres"))
+    real_year = str(evidence.get("year") or "")
+
+    # Todas las menciones de personas del lote, puntuadas de una vez
+    mentions = [f["value"] for facts in facts_per_claim for f in facts if f["type"] in ("cast", "director")]
+    candidates = cast + directors
+    scores = name_similarity(mentions, candidates)
+
+    cast_best = scores[:, :len(cast)].max(axis=1) if cast else np.zeros(len(mentions))
+    director_score = scores[:, len(cast):].max(axis=1) if directors else None
+
+    results = []
+    row = 0
+
+    for claim, facts in zip(claims, facts_per_claim):
+        verdicts = []
+
+        for fact in facts:
+            verdict = None
+
+            if fact["type"] == "year":
+                if re.fullmatch(r"19\d{2}|20\d{2}", real_year):
+                    verdict = fact["value"] == real_year
+
+            elif fact["type"] == "genre":
+                if fact["value"] in genres:
+                    verdict = True
+                elif genres and not unknown_genres:
+                    # Con un género sin traducir no se puede descartar
+                    verdict = False
+
+            elif fact["type"] == "director":
+                if director_score is not None:
+                    if director_score[row] >= MATCH_THRESHOLD:
+                        verdict = True
+                    elif director_score[row] < MISMATCH_THRESHOLD:
+                        verdict = False
+                row += 1
+
+            elif fact["type"] == "cast":
+                # El reparto extraído es solo el principal: la ausencia no prueba nada
+                if cast_best[row] >= MATCH_THRESHOLD:
+                    verdict = True
+                row += 1
+
+            verdicts.append((fact, verdict))
+
+        results.append(build_result(claim, evidence, verdicts))
+
+    return results
+
+
+def build_result(claim: str, evidence: dict, verdicts: list):
+    """
+    Combina los veredictos atómicos en un resultado de fact-check. Un
+    hecho falso basta para FALSO; para VERDADERO los hechos tienen que
+    cubrir la afirmación entera, si no decide el LLM.
+    """
+    if not verdicts:
+        return None
+
+    false_facts = [f for f, v in verdicts if v is False]
+    if false_facts:
+        return {
+            "claim": claim,
+            "is_true": False,
+            "evidence": "❌ FALSO: " + " ".join(describe_fact(f, evidence, False) for f in false_facts),
+            "confidence": "high"
+        }
+
+    covered = not uncovered_words(claim, [f for f, _ in verdicts], evidence.get("title"))
+    if covered and all(v is True for _, v in verdicts):
+        return {
+            "claim": claim,
+            "is_true": True,
+            "evidence": "✅ VERDADERO: " + " ".join(describe_fact(f, evidence, True) for f, _ in verdicts),
+            "confidence": "high"
+        }
+
+    return None
+
+
+def describe_fact(fact: dict, evidence: dict, holds: bool) -> str:
+    value = fact["value"]
+    title = evidence.get("title", "la obra")
+
+    if fact["type"] == "year":
+        if holds:
+            return f"El año de estreno es {value}."
+        return f"El año de estreno no es {value}. Es {evidence.get('year')}."
+
+    if fact["type"] == "director":
+        if holds:
+            return f"{title} fue dirigida por {evidence.get('director')}."
+        return f"{title} no fue dirigida por {value}, sino por {evidence.get('director')}."
+
+    if fact["type"] == "cast":
+        return f"{value} forma parte del reparto de {title}."
+
+    genres = ", ".join(evidence.get("genres") or [])
+    if holds:
+        return f"{title} pertenece al género {value} ({genres})."
+    return f"{title} no figura como {value}; sus géneros son: {genres}."
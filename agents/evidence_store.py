@@ -0,0 +1,304 @@
+# agents/evidence_store.py
+#
+# Catálogo local de evidencia de TMDB para los fact-checks en lote:
+#
+#   python -m agents.evidence_store ingest catalogo.txt --workers 3
+#   python -m agents.evidence_store ingest catalogo.txt --retry-failed   # reanuda
+#   python -m agents.evidence_store show "Titanic"
+#   FACTCHECK_EVIDENCE_MODE=offline_first FACTCHECK_EVIDENCE_MAX_AGE=86400 uvicorn web.web_app:app
+#
+# Cada línea del fichero de entrada es un id ("movie/597", "tv/1399",
+# "597" = película) o un título.
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("evidence_store")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVIDENCE_PATH = os.environ.get("FACTCHECK_EVIDENCE_PATH", os.path.join(ROOT_DIR, "data", "evidence.sqlite3"))
+
+# "online": solo TMDB; "offline_first": catálogo y, si no está, TMDB (y se
+# añade al catálogo); "offline": solo catálogo, nunca red
+EVIDENCE_MODE = os.environ.get("FACTCHECK_EVIDENCE_MODE", "online")
+
+# Antigüedad máxima (segundos) de una ficha en offline_first: pasada, el
+# título se vuelve a scrapear. 0 = sin límite. En modo offline no caduca.
+EVIDENCE_MAX_AGE = float(os.environ.get("FACTCHECK_EVIDENCE_MAX_AGE", str(7 * 24 * 3600)))
+
+INGEST_WORKERS = 3
+ITEM_DEADLINE = 180  # segundos máximos por título durante la ingesta
+
+ID_PATTERN = re.compile(r"^(?:(movie|tv)/)?(\d+)$")
+
+
+class EvidenceStore:
+    """
+    Evidencia normalizada (el mismo dict que devuelve web_search_agent)
+    indexada por id de TMDB y por título normalizado, más los puntos de
+    control de las ingestas para poder reanudarlas.
+    """
+
+    def __init__(self, path: str = EVIDENCE_PATH):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS evidence (
+                media_type TEXT NOT NULL,
+                tmdb_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                title_key TEXT NOT NULL,
+                year TEXT,
+                data TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                PRIMARY KEY (media_type, tmdb_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS evidence_title ON evidence (title_key)")
+        # Títulos con los que se pidió (o se corrigió) cada ficha
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                title_key TEXT PRIMARY KEY,
+                media_type TEXT NOT NULL,
+                tmdb_id INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_items (
+                run TEXT NOT NULL,
+                item TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated REAL NOT NULL,
+                PRIMARY KEY (run, item)
+            )
+        """)
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def put(self, evidence: dict, aliases: tuple = ()):
+        """
+        Guarda (o actualiza) una ficha; solo evidencia encontrada en TMDB.
+        Si el scraping no sacó el título se usa el pedido (primer alias).
+        """
+        if not evidence or "error" in evidence or not evidence.get("tmdb_id"):
+            return
+        title = evidence.get("title") or next((a for a in aliases if a), None)
+        if not title:
+            logger.warning(f"⚠️  Ficha {evidence['tmdb_id']} sin título, no se guarda")
+            return
+        evidence = dict(evidence, title=title)
+        media_type = evidence.get("media_type") or "movie"
+        tmdb_id = int(evidence["tmdb_id"])
+        keys = {normalize_text(title)} | {normalize_text(a) for a in aliases if a}
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO evidence (media_type, tmdb_id, title, title_key, year, data, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (media_type, tmdb_id, title, normalize_text(title),
+                 evidence.get("year"), json.dumps(evidence, ensure_ascii=False), time.time())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO aliases (title_key, media_type, tmdb_id) VALUES (?, ?, ?)",
+                [(key, media_type, tmdb_id) for key in keys]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, media_type: str, tmdb_id: int):
+        row = self._conn().execute(
+            "SELECT data FROM evidence WHERE media_type = ? AND tmdb_id = ?", (media_type, int(tmdb_id))
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def lookup(self, title: str, max_age: float = None):
+        """
+        Ficha por título: alias exacto y, si no, título normalizado. Con
+        `max_age` (segundos) las fichas más antiguas no cuentan.
+        """
+        key = normalize_text(title)
+        oldest = time.time() - max_age if max_age else 0
+        row = self._conn().execute(
+            "SELECT e.data FROM aliases a JOIN evidence e ON e.media_type = a.media_type AND e.tmdb_id = a.tmdb_id "
+            "WHERE a.title_key = ? AND e.fetched >= ?", (key, oldest)
+        ).fetchone()
+        if row is None:
+            row = self._conn().execute(
+                "SELECT data FROM evidence WHERE title_key = ? AND fetched >= ? ORDER BY fetched DESC LIMIT 1",
+                (key, oldest)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    # ----------------------------------------------------------
+    # PUNTOS DE CONTROL DE LA INGESTA
+    # ----------------------------------------------------------
+
+    def pending(self, run: str, items: list, retry_failed: bool = False) -> list:
+        rows = self._conn().execute("SELECT item, status FROM ingest_items WHERE run = ?", (run,)).fetchall()
+        skip = {row["item"] for row in rows if row["status"] == "done" or (row["status"] == "failed" and not retry_failed)}
+        return [item for item in items if item not in skip]
+
+    def mark(self, run: str, item: str, status: str, error: str = None):
+        self._conn().execute(
+            "INSERT INTO ingest_items (run, item, status, error, attempts, updated) VALUES (?, ?, ?, ?, 1, ?) "
+            "ON CONFLICT (run, item) DO UPDATE SET status = excluded.status, error = excluded.error, "
+            "attempts = attempts + 1, updated = excluded.updated",
+            (run, item, status, error, time.time())
+        )
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        runs = conn.execute(
+            "SELECT run, status, COUNT(*) AS n FROM ingest_items GROUP BY run, status ORDER BY run"
+        ).fetchall()
+        progress = {}
+        for row in runs:
+            progress.setdefault(row["run"], {})[row["status"]] = row["n"]
+        return {
+            "titles": conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0],
+            "aliases": conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0],
+            "runs": progress
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_evidence_store() -> EvidenceStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EvidenceStore()
+        return _store
+
+
+# --------------------------------------------------------------
+# INGESTA EN LOTE
+# --------------------------------------------------------------
+
+def read_items(path: str) -> list:
+    """Líneas no vacías ni comentadas, sin repetir"""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            item = line.strip()
+            if item and not item.startswith("#") and item not in items:
+                items.append(item)
+    return items
+
+
+def ingest_item(item: str) -> dict:
+    """Resuelve un id o título y lo scrapea con la lógica de web_search"""
+    from agents.web_search import search_tmdb_inteligente, scrape_tmdb_with_cast, format_evidence
+    from agents.fetch_scheduler import priority_scope
+    from agents.resilience import deadline_scope
+
+    # La ingesta cede el turno de TMDB a las consultas en vivo
+    with priority_scope("background"), deadline_scope(ITEM_DEADLINE):
+        match = ID_PATTERN.match(item)
+        if match:
+            media_type, media_id, title = match.group(1) or "movie", int(match.group(2)), item
+        else:
+            media_id, media_type, title = search_tmdb_inteligente(item)
+            if not media_id:
+                raise LookupError(f"'{item}' no encontrado en TMDB")
+
+        result = scrape_tmdb_with_cast(media_id, media_type)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return format_evidence(result, media_id, media_type, title)
+
+
+def ingest(items: list, run: str, workers: int = INGEST_WORKERS, retry_failed: bool = False,
+           store: EvidenceStore = None) -> dict:
+    """
+    Ingesta con paralelismo acotado. Cada elemento se marca al terminar,
+    así una ejecución interrumpida se reanuda donde se quedó.
+    """
+    store = store or get_evidence_store()
+    todo = store.pending(run, items, retry_failed=retry_failed)
+    logger.info(f"📥 Ingesta '{run}': {len(todo)} pendientes de {len(items)}")
+
+    counts = {"done": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(ingest_item, item): item for item in todo}
+        for number, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                evidence = future.result()
+                aliases = () if ID_PATTERN.match(item) else (item,)
+                store.put(evidence, aliases=aliases)
+                store.mark(run, item, "done")
+                counts["done"] += 1
+                logger.info(f"✅ [{number}/{len(todo)}] {item} → {evidence['title']} ({len(evidence['cast'])} actores)")
+            except Exception as e:
+                store.mark(run, item, "failed", str(e)[:500])
+                counts["failed"] += 1
+                logger.warning(f"❌ [{number}/{len(todo)}] {item}: {e}")
+
+    counts["skipped"] = len(items) - len(todo)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo local de evidencia de TMDB")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_cmd = commands.add_parser("ingest", help="scrapear una lista de ids o títulos")
+    ingest_cmd.add_argument("source", help="fichero con un id o título por línea")
+    ingest_cmd.add_argument("--run", help="nombre de la ingesta para reanudar (por defecto, el del fichero)")
+    ingest_cmd.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    ingest_cmd.add_argument("--retry-failed", action="store_true", help="reintentar los que fallaron")
+
+    show_cmd = commands.add_parser("show", help="mostrar la ficha de un título o id")
+    show_cmd.add_argument("title")
+
+    commands.add_parser("stats", help="tamaño del catálogo y progreso de las ingestas")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+    store = get_evidence_store()
+
+    if args.command == "ingest":
+        run = args.run or os.path.splitext(os.path.basename(args.source))[0]
+        counts = ingest(read_items(args.source), run, workers=args.workers, retry_failed=args.retry_failed)
+        print(f"✅ Ingesta '{run}': {counts['done']} nuevos, {counts['failed']} fallidos, {counts['skipped']} ya hechos")
+    elif args.command == "show":
+        match = ID_PATTERN.match(args.title)
+        evidence = store.get(match.group(1) or "movie", match.group(2)) if match else store.lookup(args.title)
+        if evidence is None:
+            print("❌ No está en el catálogo")
+            raise SystemExit(1)
+        print(json.dumps(evidence, ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
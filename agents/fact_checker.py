@@ -2,11 +2,24 @@
 
 import logging
 import re
-import requests
+import hashlib
 import json
 
+from agents.llm_client import ollama_generate, stop_on_verdict
+from agents.text_utils import normalize_text
+from agents.knowledge_rules import match_rule, rules_version
+from agents.cache import make_cache
+from agents.evidence_store import EVIDENCE_MODE
+
 logger = logging.getLogger("fact_checker_agent")
 
+# Campos de la evidencia de los que depende un veredicto
+VERDICT_EVIDENCE_FIELDS = ("title", "year", "director", "genres", "cast", "summary")
+
+VERDICT_CACHE = make_cache("verdicts", maxsize=2048, ttl=6 * 3600)
+# (afirmación, título) → huella de la evidencia usada en el último veredicto
+VERDICT_VERSIONS = make_cache("verdict_versions", maxsize=2048, ttl=6 * 3600, register=False)
+
 def fact_checker_agent(query: str, evidence: dict = None):
     """
     Fact-checker con conocimiento común + IA
@@ -25,14 +38,30 @@ def fact_checker_agent(query: str, evidence: dict = None):
                 "confidence": "low"
             }
         
+        # CERO: Veredicto ya calculado para esta afirmación y evidencia
+        cached = get_cached_verdict(claim, evidence)
+        if cached:
+            return cached
+        
         # PRIMERO: Verificar casos comunes de conocimiento general
         common_knowledge_result = check_common_knowledge(query, evidence)
         if common_knowledge_result:
-            return common_knowledge_result
+            return store_verdict(claim, evidence, common_knowledge_result)
+        
+        # SEGUNDO: Motor local (año, director, reparto, género)
+        from agents.claim_verifier import verify_claims
+        local_result = verify_claims([claim], evidence)[0]
+        if local_result:
+            return store_verdict(claim, evidence, local_result)
+        
+        # TERCERO: Pertenencia al reparto contra la filmografía de la persona
+        person_result = check_person_claims(claim, evidence)
+        if person_result:
+            return store_verdict(claim, evidence, person_result)
         
-        # SEGUNDO: Usar IA para análisis más profundo
+        # CUARTO: Usar IA solo para lo que el motor no decide
         ai_result = ai_fact_check_enhanced(query, evidence)
-        return ai_result
+        return store_verdict(claim, evidence, ai_result)
         
     except Exception as e:
         logger.error(f"❌ Error en fact-checker: {e}")
@@ -43,52 +72,100 @@ def fact_checker_agent(query: str, evidence: dict = None):
             "confidence": "low"
         }
 
+def normalize_claim(claim: str) -> str:
+    """Afirmación normalizada: minúsculas, sin acentos ni signos"""
+    return re.sub(r"[^\w\s]", "", normalize_text(claim)).strip()
+
+def evidence_fingerprint(evidence: dict) -> str:
+    """Huella de los campos de la evidencia de los que depende el veredicto"""
+    relevant = {field: evidence.get(field) for field in VERDICT_EVIDENCE_FIELDS}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def verdict_fingerprint(evidence: dict) -> str:
+    """Huella de la evidencia y de la versión de las reglas de conocimiento común"""
+    return f"{evidence_fingerprint(evidence)}|{rules_version()}"
+
+def get_cached_verdict(claim: str, evidence: dict):
+    """Devuelve el veredicto cacheado o None; descarta el de evidencia o reglas obsoletas"""
+    normalized = normalize_claim(claim)
+    fingerprint = verdict_fingerprint(evidence)
+    version_key = f"{normalized}|{normalize_text(evidence.get('title', ''))}"
+
+    previous = VERDICT_VERSIONS.get(version_key)
+    if previous and previous != fingerprint:
+        # Cambió la evidencia de TMDB o se recargaron las reglas: el veredicto anterior ya no vale
+        logger.info("♻️  Evidencia o reglas cambiadas, invalidando veredicto cacheado")
+        VERDICT_CACHE.delete(f"{normalized}|{previous}")
+        VERDICT_VERSIONS.delete(version_key)
+
+    cached = VERDICT_CACHE.get(f"{normalized}|{fingerprint}")
+    if cached:
+        logger.info("⚡ Veredicto servido desde caché")
+        return dict(cached, claim=claim)
+    return None
+
+def store_verdict(claim: str, evidence: dict, result: dict) -> dict:
+    """Guarda el veredicto salvo que sea un fallo de baja confianza"""
+    if result and result.get("confidence") != "low":
+        normalized = normalize_claim(claim)
+        fingerprint = verdict_fingerprint(evidence)
+        VERDICT_CACHE.set(f"{normalized}|{fingerprint}", dict(result))
+        VERDICT_VERSIONS.set(f"{normalized}|{normalize_text(evidence.get('title', ''))}", fingerprint)
+    return result
+
 def check_common_knowledge(query: str, evidence: dict):
     """
     Verificar hechos de conocimiento común sobre cine
+    (reglas declarativas en data/knowledge_rules.json)
     """
-    query_lower = query.lower()
-    
-    # CASO 1: Leonardo DiCaprio y Oscars
-    if "dicaprio" in query_lower or "leonardo" in query_lower:
-        if "oscar" in query_lower:
-            if "titanic" in query_lower:
-                return {
-                    "claim": query,
-                    "is_true": False,
-                    "evidence": "❌ FALSO: Aunque Titanic ganó 11 Oscars en 1997, Leonardo DiCaprio NO ganó Oscar por Titanic. Ni siquiera fue nominado a Mejor Actor por esa película.",
-                    "confidence": "high"
-                }
-            elif "avatar" in query_lower:
-                return {
-                    "claim": query,
-                    "is_true": False,
-                    "evidence": "❌ FALSO: Leonardo DiCaprio NO actuó en Avatar, mucho menos ganó Oscar por esa película.",
-                    "confidence": "high"
-                }
-            elif any(word in query_lower for word in ["renacido", "revenant"]):
-                return {
-                    "claim": query,
-                    "is_true": True,
-                    "evidence": "✅ VERDADERO: Leonardo DiCaprio SÍ ganó el Oscar al Mejor Actor por 'El Renacido' (The Revenant) en 2016.",
-                    "confidence": "high"
-                }
-    
-    # CASO 2: Años de estreno
-    year_match = re.search(r'\b(19\d{2}|20\d{2})\b', query_lower)
-    if year_match and evidence.get("year"):
-        claim_year = year_match.group(1)
-        real_year = str(evidence.get("year"))
-        
-        if claim_year != real_year:
-            return {
-                "claim": query,
-                "is_true": False,
-                "evidence": f"❌ FALSO: El año de estreno no es {claim_year}. Es {real_year}.",
-                "confidence": "high"
-            }
-    
-    return None
+    return match_rule(query)
+
+def check_person_claims(claim: str, evidence: dict):
+    """
+    Afirmaciones de reparto ("Tom Hanks actuó en Titanic"): el reparto
+    principal no prueba una ausencia, la filmografía completa sí.
+    Solo decide si todos los hechos de la afirmación son de reparto y
+    cubren la afirmación entera. En modo offline no se consulta TMDB: el
+    reparto catalogado ya lo comprobó el motor local.
+    """
+    if EVIDENCE_MODE == "offline":
+        return None
+
+    from agents.claim_verifier import split_claim, uncovered_words
+
+    facts = split_claim(claim)
+    if not facts or any(f["type"] != "cast" for f in facts):
+        return None
+    if uncovered_words(claim, facts, evidence.get("title")):
+        return None
+
+    from agents.person_search import person_agent, appears_in
+
+    title = evidence.get("title", "la obra")
+    verdicts = []
+    for fact in facts:
+        person = person_agent(fact["value"])
+        verdict = appears_in(person, evidence) if person else None
+        if verdict is None:
+            return None
+        verdicts.append((person["name"], verdict))
+
+    missing = [name for name, verdict in verdicts if not verdict]
+    if missing:
+        return {
+            "claim": claim,
+            "is_true": False,
+            "evidence": "❌ FALSO: " + " ".join(f"{name} no figura en los créditos de {title}." for name in missing),
+            "confidence": "high"
+        }
+
+    return {
+        "claim": claim,
+        "is_true": True,
+        "evidence": "✅ VERDADERO: " + " ".join(f"{name} figura en los créditos de {title}." for name, _ in verdicts),
+        "confidence": "high"
+    }
 
 def ai_fact_check_enhanced(query: str, evidence: dict) -> dict:
     """
@@ -124,18 +201,10 @@ def ai_fact_check_enhanced(query: str, evidence: dict) -> dict:
     """
     
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "qwen2.5:7b",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=10
-        )
+        response_text = ollama_generate(prompt, timeout=10, stop_when=stop_on_verdict, endpoint="ollama_verify")
         
-        if response.status_code == 200:
-            result = response.json().get("response", "").upper()
+        if response_text is not None:
+            result = response_text.upper()
             
             if "VERDADERO" in result:
                 return {
@@ -152,8 +221,8 @@ def ai_fact_check_enhanced(query: str, evidence: dict) -> dict:
                     "confidence": "medium"
                 }
                 
-    except:
-        pass
+    except Exception as e:
+        logger.warning(f"⚠️  Error en verificación con IA: {e}")
     
     return {
         "claim": query,
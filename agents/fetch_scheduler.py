@@ -0,0 +1,197 @@
+# agents/fetch_scheduler.py
+
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from agents.resilience import check_deadline
+
+logger = logging.getLogger("fetch_scheduler")
+
+# Límites por host para todo el servidor: ritmo sostenido (peticiones/s),
+# ráfaga y conexiones simultáneas. Cada worker aplica su parte, como con
+# los navegadores (la ráfaga y las conexiones, al menos una por worker)
+WORKERS = max(1, int(os.environ.get("FACTCHECK_WORKERS", "1")))
+FETCH_RATE = float(os.environ.get("FACTCHECK_TMDB_RATE", "2")) / WORKERS
+FETCH_BURST = max(1, int(os.environ.get("FACTCHECK_TMDB_BURST", "4")) // WORKERS)
+FETCH_CONCURRENCY = max(1, int(os.environ.get("FACTCHECK_TMDB_CONCURRENCY", "4")) // WORKERS)
+
+# Carriles de prioridad: menor número, antes sale de la cola
+LANES = {"interactive": 0, "background": 1}
+
+BACKOFF_BASE = 2.0     # primer bloqueo tras un 429 (segundos)
+BACKOFF_MAX = 60.0     # tope del bloqueo exponencial
+THROTTLE_STATUS = (429, 503)
+CHECK_INTERVAL = 0.25  # cada cuánto se revisan deadline y cancelación en la cola
+
+_lane = contextvars.ContextVar("fetch_lane", default="interactive")
+
+
+class ThrottledError(Exception):
+    """El host sigue respondiendo 429/503 tras los reintentos"""
+
+
+class HostScheduler:
+    """
+    Cola de peticiones a un host: token bucket (ritmo y ráfaga), tope de
+    conexiones en vuelo, carriles de prioridad y bloqueo exponencial
+    cuando el host responde 429. Segura entre hilos.
+    """
+
+    def __init__(self, host: str, rate: float = FETCH_RATE, burst: int = FETCH_BURST,
+                 concurrency: int = FETCH_CONCURRENCY):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.cond = threading.Condition()
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.waiting = []  # heap de (carril, orden de llegada)
+        self.order = itertools.count()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.throttled = 0
+        self.lanes = {lane: {"queued": 0, "granted": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in LANES}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _can_go(self, ticket, now: float) -> bool:
+        return (self.waiting[0] == ticket and self.in_flight < self.concurrency
+                and self.tokens >= 1 and now >= self.blocked_until)
+
+    def acquire(self, lane: str):
+        """Espera turno; respeta deadline y cancelación de la consulta"""
+        ticket = (LANES.get(lane, LANES["background"]), next(self.order))
+        stats = self.lanes[lane if lane in LANES else "background"]
+        started = time.monotonic()
+
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            stats["queued"] += 1
+            try:
+                while True:
+                    check_deadline()
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._can_go(ticket, now):
+                        break
+                    timeout = CHECK_INTERVAL
+                    if self.waiting[0] == ticket:
+                        if self.tokens < 1:
+                            timeout = min(timeout, (1 - self.tokens) / self.rate)
+                        if now < self.blocked_until:
+                            timeout = min(timeout, self.blocked_until - now)
+                    self.cond.wait(timeout)
+
+                self.tokens -= 1
+                self.in_flight += 1
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                stats["queued"] -= 1
+                self.cond.notify_all()
+
+            waited = time.monotonic() - started
+            stats["granted"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def report(self, status: int, retry_after: float = None) -> bool:
+        """Anota la respuesta; devuelve True si el host pide frenar"""
+        with self.cond:
+            if status not in THROTTLE_STATUS:
+                self.backoff = 0.0
+                return False
+
+            self.throttled += 1
+            self.backoff = min(BACKOFF_MAX, self.backoff * 2 if self.backoff else BACKOFF_BASE)
+            pause = max(self.backoff, retry_after or 0)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            # Sin tokens acumulados: al reanudar no sale una ráfaga
+            self.tokens = 0.0
+            logger.warning(f"🐢 {self.host} respondió {status}, pausa de {pause:.1f}s")
+            return True
+
+    def stats(self) -> dict:
+        with self.cond:
+            self._refill(time.monotonic())
+            return {
+                "workers": WORKERS,
+                "rate": self.rate,
+                "burst": self.burst,
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "tokens": round(self.tokens, 2),
+                "throttled": self.throttled,
+                "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+                "lanes": {
+                    lane: {
+                        "queued": s["queued"],
+                        "granted": s["granted"],
+                        "wait_avg": round(s["wait_total"] / s["granted"], 3) if s["granted"] else 0.0,
+                        "wait_max": round(s["wait_max"], 3)
+                    }
+                    for lane, s in self.lanes.items()
+                }
+            }
+
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def host_scheduler(url: str) -> HostScheduler:
+    host = urlparse(url).hostname or ""
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = HostScheduler(host)
+        return _hosts[host]
+
+
+@contextmanager
+def priority_scope(lane: str):
+    """Las peticiones hechas dentro (e hilos con el contexto copiado) van por este carril"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+@contextmanager
+def fetch_slot(url: str):
+    """Turno para una petición a `url`; entrega el HostScheduler para reportar el estado"""
+    scheduler = host_scheduler(url)
+    scheduler.acquire(_lane.get())
+    try:
+        yield scheduler
+    finally:
+        scheduler.release()
+
+
+def retry_after_seconds(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def scheduler_stats() -> dict:
+    with _hosts_lock:
+        hosts = dict(_hosts)
+    return {host: scheduler.stats() for host, scheduler in hosts.items()}
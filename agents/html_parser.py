@@ -0,0 +1,267 @@
+# agents/html_parser.py
+
+import logging
+import os
+import re
+import mmap
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger("html_parser")
+
+PARSE_WORKERS = int(os.environ.get("FACTCHECK_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# A partir de este tamaño el documento viaja por un fichero mapeado en
+# memoria (tmpfs si existe) en lugar de copiarse al serializarlo.
+MMAP_THRESHOLD = 128 * 1024
+MMAP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+BAD_CAST_WORDS = ["character", "order", "loading", "image", "avatar"]
+BAD_LINE_WORDS = ["character", "order", "as ", "plays", "director", "writer", "producer"]
+
+
+# --------------------------------------------------------------
+# PARSERS (funciones puras, se ejecutan en los procesos del pool)
+# --------------------------------------------------------------
+
+def parse_search_results(html: str) -> list:
+    """Resultados de la búsqueda de TMDB: [{id, title, type}]"""
+    results = []
+
+    for media_type in ("movie", "tv"):
+        pattern = rf'href="/{media_type}/(\d+)-[^"]*".*?<h2[^>]*>(.*?)</h2>'
+        for tmdb_id, title_html in re.findall(pattern, html, re.DOTALL):
+            title = re.sub(r'<.*?>', '', title_html).strip()
+            if title:
+                results.append({
+                    "id": int(tmdb_id),
+                    "title": title,
+                    "type": media_type
+                })
+
+    return results
+
+
+def parse_cast_html(html: str) -> list:
+    """Nombres de actores buscados con regex en el HTML completo"""
+    cast = []
+
+    name_patterns = [
+        r'alt="([^"]*)"[^>]*class="profile"',
+        r'<a[^>]*href="/person/[^>]*>([^<]+)</a>',
+        r'<p class="name">[^<]*<a[^>]*>([^<]+)</a>',
+        r'data-cy="cast-person-name"[^>]*>([^<]+)<'
+    ]
+
+    for pattern in name_patterns:
+        for match in re.findall(pattern, html):
+            name = match.strip()
+            if (name and len(name) > 2 and name not in cast and
+                ' ' in name and not any(bad in name.lower() for bad in BAD_CAST_WORDS)):
+                cast.append(name)
+
+    # Un nombre real generalmente tiene espacio y longitud razonable
+    return [
+        name for name in cast
+        if 2 <= len(name.split()) <= 3 and 4 <= len(name) <= 40
+        and not any(char.isdigit() for char in name)
+    ]
+
+
+def parse_cast_text(text: str) -> list:
+    """Líneas del texto visible que parecen nombres de actores"""
+    cast = []
+
+    for line in text.split('\n'):
+        line = line.strip()
+        # Reglas: tiene espacio, empieza con mayúscula, longitud razonable
+        if (3 < len(line) < 40 and
+            ' ' in line and
+            line[0].isupper() and
+            not any(bad in line.lower() for bad in BAD_LINE_WORDS) and
+            not line.endswith(':') and
+            not line.startswith('Season') and
+            not line.startswith('Episode') and
+            line not in cast):
+            cast.append(line)
+
+    return cast[:10]
+
+
+def parse_person_results(html: str) -> list:
+    """Resultados de la búsqueda de personas: [{id, name}]"""
+    results = []
+    seen = set()
+
+    for person_id, name in re.findall(r'href="/person/(\d+)[^"]*"[^>]*>\s*(?:<h2[^>]*>)?([^<]+)<', html):
+        name = name.strip()
+        if name and person_id not in seen:
+            seen.add(person_id)
+            results.append({"id": int(person_id), "name": name})
+
+    return results
+
+
+def parse_person_credits(html: str) -> dict:
+    """
+    Página /person/{id}: departamento principal y filmografía
+    {department, credits: [{id, type, title, year, department}]}
+    """
+    known_for = re.search(r'Known For</bdi></strong>\s*([^<]+)<', html)
+    credits = []
+
+    # Cada tabla de créditos va precedida de un <h3> con el departamento
+    sections = re.split(r'<h3[^>]*>\s*([^<]+?)\s*</h3>', html)
+    for department, chunk in zip(sections[1::2], sections[2::2]):
+        if 'class="card credits"' not in chunk:
+            continue
+        for year, media_type, media_id, title in re.findall(
+            r'<td class="year">\s*([^<]*?)\s*</td>.*?href="/(movie|tv)/(\d+)[^"]*"[^>]*>\s*(?:<bdi>)?([^<]+)<',
+            chunk, re.DOTALL
+        ):
+            credits.append({
+                "id": int(media_id),
+                "type": media_type,
+                "title": title.strip(),
+                "year": year if year.isdigit() else None,
+                "department": department
+            })
+
+    return {
+        "department": known_for.group(1).strip() if known_for else None,
+        "credits": credits
+    }
+
+
+def parse_season_list(html: str) -> list:
+    """Página /tv/{id}/seasons: [{number, name, year, episode_count}]"""
+    seasons = []
+    seen = set()
+
+    for number, name, details in re.findall(
+        r'href="/tv/\d+[^"]*/season/(\d+)"[^>]*>\s*([^<]+?)\s*</a>.*?<h4[^>]*>(.*?)</h4>',
+        html, re.DOTALL
+    ):
+        if number in seen:
+            continue
+        seen.add(number)
+        details = re.sub(r'<.*?>', ' ', details)
+        year = re.search(r'(19\d{2}|20\d{2})', details)
+        episodes = re.search(r'(\d+)\s+(?:Episodes?|episodios?)', details, re.IGNORECASE)
+        seasons.append({
+            "number": int(number),
+            "name": name,
+            "year": year.group(1) if year else None,
+            "episode_count": int(episodes.group(1)) if episodes else None
+        })
+
+    return sorted(seasons, key=lambda season: season["number"])
+
+
+def parse_season_episodes(html: str) -> list:
+    """Página /tv/{id}/season/{n}: [{number, title}]"""
+    episodes = []
+    seen = set()
+
+    for number, title in re.findall(
+        r'episode_number">\s*(\d+)\s*<.*?<h3[^>]*>\s*(?:<a[^>]*>)?\s*([^<]+?)\s*<',
+        html, re.DOTALL
+    ):
+        if number not in seen:
+            seen.add(number)
+            episodes.append({"number": int(number), "title": title})
+
+    return episodes
+
+
+PARSERS = {
+    "search_results": parse_search_results,
+    "cast_html": parse_cast_html,
+    "cast_text": parse_cast_text,
+    "person_results": parse_person_results,
+    "person_credits": parse_person_credits,
+    "season_list": parse_season_list,
+    "season_episodes": parse_season_episodes,
+}
+
+
+def _parse_ref(kind: str, ref: tuple):
+    """Punto de entrada en el proceso hijo: carga el documento y lo parsea"""
+    if ref[0] == "mmap":
+        _, path, length = ref
+        # Se decodifica directamente desde el mapa, sin pasar por bytes
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mapped:
+            text = str(mapped, "utf-8")
+    else:
+        text = ref[1]
+
+    return PARSERS[kind](text)
+
+
+# --------------------------------------------------------------
+# POOL DE PROCESOS
+# --------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: no se hereda el estado de hilos de Playwright
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _make_ref(text: str):
+    """Documentos grandes → fichero temporal mapeado; pequeños → en línea"""
+    data = text.encode("utf-8")
+    if len(data) < MMAP_THRESHOLD:
+        return ("inline", text), None
+
+    fd, path = tempfile.mkstemp(prefix="tmdb_", suffix=".html", dir=MMAP_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return ("mmap", path, len(data)), path
+
+
+def _cleanup(path):
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def parse_document(kind: str, text: str):
+    """Parsea en el pool de procesos (bloquea al hilo que llama)"""
+    if not text:
+        # Valor vacío propio de cada parser ([] o {"department": None, ...})
+        return PARSERS[kind]("")
+
+    ref, path = _make_ref(text)
+    try:
+        return get_pool().submit(_parse_ref, kind, ref).result()
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"⚠️  Pool de parsing no disponible ({e}), parseando en línea")
+        shutdown_pool()
+        return PARSERS[kind](text)
+    finally:
+        _cleanup(path)
+
@@ -0,0 +1,196 @@
+# agents/knowledge_rules.py
+
+import logging
+import os
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("knowledge_rules")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_PATH = os.environ.get("FACTCHECK_RULES_PATH", os.path.join(ROOT_DIR, "data", "knowledge_rules.json"))
+
+RELOAD_CHECK_INTERVAL = 2.0  # segundos entre comprobaciones de mtime
+FIRED_HISTORY = 50           # consultas recordadas por regla
+
+
+class KeywordAutomaton:
+    """
+    Autómata Aho–Corasick: encuentra todas las palabras clave de todas las
+    reglas en una sola pasada sobre la consulta, sin importar cuántas haya.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].add(keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] |= self.output[self.fail[nxt]]
+
+    def find(self, text: str) -> set:
+        found = set()
+        state = 0
+
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found |= self.output[state]
+
+        return found
+
+
+class RuleEngine:
+    """Reglas compiladas: cada palabra clave apunta a los grupos que satisface"""
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.index = defaultdict(set)  # palabra clave → {(regla, grupo)}
+
+        for rule_pos, rule in enumerate(rules):
+            for group_pos, group in enumerate(rule_groups(rule)):
+                for keyword in group:
+                    self.index[normalize_text(keyword)].add((rule_pos, group_pos))
+
+        self.automaton = KeywordAutomaton(self.index.keys())
+
+    def match(self, query: str):
+        """Devuelve la primera regla (orden del fichero) cuyos grupos se cumplen"""
+        satisfied = defaultdict(set)
+
+        for keyword in self.automaton.find(normalize_text(query)):
+            for rule_pos, group_pos in self.index[keyword]:
+                satisfied[rule_pos].add(group_pos)
+
+        for rule_pos in sorted(satisfied):
+            rule = self.rules[rule_pos]
+            if len(satisfied[rule_pos]) == len(rule_groups(rule)):
+                return rule
+
+        return None
+
+
+def rule_groups(rule: dict) -> list:
+    """Entidades (cualquiera) + cada grupo de palabras clave (cualquiera de cada grupo)"""
+    groups = []
+    if rule.get("entities"):
+        groups.append(rule["entities"])
+    for group in rule.get("keywords", []):
+        groups.append([group] if isinstance(group, str) else group)
+    return groups
+
+
+def load_rules(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    rules = data.get("rules", []) if isinstance(data, dict) else data
+    return [r for r in rules if r.get("id") and rule_groups(r)]
+
+
+_lock = threading.Lock()
+_engine = None
+_mtime = None
+_last_check = 0.0
+
+hit_counters = defaultdict(int)
+fired_index = defaultdict(lambda: deque(maxlen=FIRED_HISTORY))
+
+
+def get_engine():
+    """Devuelve el motor compilado, recargándolo si el fichero cambió"""
+    global _engine, _mtime, _last_check
+
+    now = time.monotonic()
+    if _engine is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _engine
+
+    with _lock:
+        _last_check = now
+        try:
+            mtime = os.path.getmtime(RULES_PATH)
+        except OSError:
+            logger.warning(f"⚠️  No existe el fichero de reglas: {RULES_PATH}")
+            _engine = _engine or RuleEngine([])
+            return _engine
+
+        if mtime != _mtime:
+            try:
+                _engine = RuleEngine(load_rules(RULES_PATH))
+                _mtime = mtime
+                logger.info(f"📚 Reglas cargadas: {len(_engine.rules)} desde {RULES_PATH}")
+            except Exception as e:
+                # Si el fichero nuevo es inválido se conserva el motor anterior
+                logger.error(f"❌ Error cargando reglas: {e}")
+                _engine = _engine or RuleEngine([])
+
+    return _engine
+
+
+def rules_version() -> str:
+    """Versión de las reglas cargadas (mtime del fichero), para las claves de caché"""
+    get_engine()
+    return f"rules:{_mtime or 0}"
+
+
+def match_rule(query: str):
+    """Busca una regla aplicable y devuelve el resultado de fact-check o None"""
+    rule = get_engine().match(query)
+    if not rule:
+        return None
+
+    hit_counters[rule["id"]] += 1
+    fired_index[rule["id"]].append({"query": query, "timestamp": time.time()})
+    logger.info(f"📚 Regla aplicada: {rule['id']}")
+
+    return {
+        "claim": query,
+        "is_true": rule.get("verdict"),
+        "evidence": rule.get("evidence", ""),
+        "confidence": rule.get("confidence", "high")
+    }
+
+
+def rules_stats() -> dict:
+    engine = get_engine()
+    return {
+        "rules_path": RULES_PATH,
+        "rules_loaded": len(engine.rules),
+        "hits": dict(hit_counters),
+        "fired": {rule_id: list(queries) for rule_id, queries in fired_index.items()}
+    }
@@ -0,0 +1,213 @@
+# agents/llm_client.py
+
+import logging
+import os
+import json
+import time
+import threading
+
+from agents.resilience import guarded_call, hedged_call, is_cancelled, check_cancelled, CircuitOpenError, DeadlineExceeded
+
+logger = logging.getLogger("llm_client")
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_MODEL = "qwen2.5:7b"
+
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Un Ollama local atiende las peticiones de una en una: duplicarlas solo
+# añade cola. Activar si hay varias réplicas detrás de OLLAMA_URL.
+HEDGE_LLM = os.environ.get("FACTCHECK_HEDGE_LLM", "0") == "1"
+
+VERDICT_WORDS = ("VERDADERO", "FALSO", "INCONCLUSO")
+
+
+class JSONObjectScanner:
+    """
+    Extractor incremental de JSON: recibe fragmentos de texto y detecta
+    cuándo se ha cerrado el primer objeto {...} de nivel superior.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+
+    def feed(self, chunk: str):
+        """Devuelve el objeto JSON completo (str) en cuanto se cierra, o None"""
+        for char in chunk:
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                    self.buffer.append(char)
+                continue
+
+            self.buffer.append(char)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return "".join(self.buffer)
+
+        return None
+
+
+# Las condiciones de parada se pasan como fábricas: cada petición (también
+# las duplicadas del hedging) crea la suya y no comparten estado
+
+def stop_on_json():
+    """Condición de parada: primer objeto JSON completo"""
+    scanner = JSONObjectScanner()
+
+    def check(chunk: str, text: str):
+        return scanner.feed(chunk) is not None
+
+    return check
+
+
+def stop_on_verdict():
+    """Condición de parada: aparece VERDADERO, FALSO o INCONCLUSO"""
+    def check(chunk: str, text: str):
+        upper = text.upper()
+        return any(word in upper for word in VERDICT_WORDS)
+
+    return check
+
+
+def ollama_generate(prompt: str, timeout: int = 60, stop_when=None, stats: dict = None,
+                    endpoint: str = "ollama_interpret", **options) -> str:
+    """
+    Llama a Ollama en modo streaming y acumula los tokens.
+    `stop_when` es una fábrica (stop_on_json, stop_on_verdict): cada
+    petición crea su condición y, si `condición(chunk, texto_acumulado)`
+    devuelve True, se corta la generación cerrando la conexión (Ollama
+    aborta la petición).
+    Si se pasa `stats` se rellena con tokens y latencia de la llamada.
+    `timeout` es el valor inicial; después se adapta a la latencia
+    observada del endpoint. Con el circuito abierto falla al instante.
+    Devuelve el texto generado o None si hubo error.
+    """
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    payload.update(options)
+
+    # El cliente HTTP se importa en la primera llamada al LLM
+    import requests
+
+    try:
+        with guarded_call(endpoint, default=timeout) as budget:
+            if HEDGE_LLM:
+                return hedged_call(endpoint, _stream_generate, payload, budget, stop_when, stats)
+            return _stream_generate(threading.Event(), payload, budget, stop_when, stats)
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        logger.warning(f"⚠️  Ollama no consultado: {e}")
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"❌ Error llamando a Ollama: {e}")
+
+    return None
+
+
+def _stream_generate(cancelled, payload: dict, budget: float, stop_when, stats: dict):
+    """Una petición streaming; lanza excepción si falla antes de recibir nada"""
+    import requests
+
+    parts = []
+    started = time.perf_counter()
+    should_stop = stop_when() if stop_when else None
+
+    try:
+        with requests.post(OLLAMA_URL, json=payload, stream=True, timeout=(5, budget)) as response:
+            if response.status_code != 200:
+                raise requests.HTTPError(f"Ollama respondió {response.status_code}")
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+
+                data = json.loads(line)
+                chunk = data.get("response", "")
+                parts.append(chunk)
+
+                if data.get("done"):
+                    if stats is not None:
+                        stats["prompt_tokens"] = data.get("prompt_eval_count", 0)
+                        stats["output_tokens"] = data.get("eval_count", 0)
+                    break
+
+                if should_stop and should_stop(chunk, "".join(parts)):
+                    logger.info("✂️  Generación cortada anticipadamente")
+                    break
+
+                if cancelled.is_set():
+                    logger.info("✂️  Petición duplicada descartada")
+                    break
+
+                if is_cancelled():
+                    # Salir del with cierra la conexión y Ollama aborta la generación
+                    logger.info("🛑 Consulta cancelada, abortando generación")
+                    check_cancelled()
+
+                if time.perf_counter() - started > budget:
+                    logger.warning(f"⏱️  Generación cortada por timeout ({budget:.0f}s)")
+                    break
+
+    except (requests.RequestException, ValueError) as e:
+        if not parts:
+            raise
+        logger.warning(f"⚠️  Respuesta de Ollama incompleta: {e}")
+
+    if stats is not None:
+        stats["latency"] = time.perf_counter() - started
+        # Si se cortó antes de "done", cada fragmento ≈ un token
+        stats.setdefault("output_tokens", len(parts))
+
+    return "".join(parts)
+
+
+def ollama_load_model(timeout: int = 180) -> bool:
+    """Carga el modelo en memoria (petición sin prompt) para tenerlo caliente"""
+    import requests
+
+    response = requests.post(
+        OLLAMA_URL,
+        json={"model": OLLAMA_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return True
+
+
+def extract_first_json(text: str):
+    """Devuelve el primer objeto JSON completo del texto como dict, o None"""
+    if not text:
+        return None
+
+    scanner = JSONObjectScanner()
+    json_str = scanner.feed(text)
+    if not json_str:
+        return None
+
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
@@ -1,162 +1,166 @@
 # agents/nlp_agent.py
 
 import logging
-import requests
-import json
 import re
 
+from agents.llm_client import ollama_generate, stop_on_json, extract_first_json
+from agents.interpreter import interpreter_agent
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+
 logger = logging.getLogger("nlp_agent")
 
-def nlp_agent(query: str):
+INTERPRETATION_CACHE = make_cache("llm_interpretations", maxsize=2048, ttl=24 * 3600)
+
+# Prompt de sistema FIJO: al no cambiar entre llamadas, Ollama reutiliza
+# el prefijo ya evaluado (KV cache) y solo procesa los tokens de la consulta.
+SYSTEM_PROMPT = (
+    "Analizas consultas sobre películas y series. Devuelve SOLO JSON. "
+    "intent: search (información, reparto, director, sinopsis), analysis "
+    "(análisis profundo), fact_check (verificar una afirmación) o unknown. "
+    "target_title: título mencionado; si la consulta es descriptiva "
+    "(\"payaso persigue niños\") sugiere el título más probable; null si no hay. "
+    "target_titles: lista con TODOS los títulos mencionados (varios si compara "
+    "o pregunta por más de uno; si hay uno, lista de uno). "
+    "task: get_cast, get_director, get_summary, verify_claim o general. "
+    "query_purpose: qué busca el usuario en una frase."
+)
+
+INTERPRETATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": ["search", "analysis", "fact_check", "unknown"]},
+        "target_title": {"type": ["string", "null"]},
+        "target_titles": {"type": "array", "items": {"type": "string"}},
+        "task": {"type": "string"},
+        "needs_web": {"type": "boolean"},
+        "needs_fact_check": {"type": "boolean"},
+        "query_purpose": {"type": "string"}
+    },
+    "required": ["intent", "target_title", "target_titles", "task", "needs_web", "needs_fact_check", "query_purpose"]
+}
+
+CAST_WORDS = ["quién actúa", "quien actua", "actores", "reparto", "cast", "elenco", "protagonistas"]
+DIRECTOR_WORDS = ["director", "dirigió", "dirigida", "directed"]
+FACT_CHECK_WORDS = ["es verdad", "cierto que", "fact", "verdadero o falso", "verifica", "ganó", "murió"]
+SUMMARY_WORDS = ["qué es", "de qué trata", "sinopsis", "trama"]
+INFO_WORDS = ["información", "datos", "detalles", "info"]
+COMPARE_WORDS = ["compara", "comparar", "comparación", "diferencia", " vs ", " versus "]
+
+
+def nlp_agent(query: str, stats: dict = None):
     """
-    Agent that uses Ollama with Qwen model to interpret user queries
+    Agent that uses Ollama with Qwen model to interpret user queries.
+    Una sola llamada con salida JSON restringida por esquema; si el LLM
+    no responde se usa el intérprete basado en reglas.
     """
-    try:
-        logger.info(f"🔍 NLP Agent processing: {query}")
-        
-        prompt = f"""
-        Eres un asistente especializado en analizar consultas sobre películas, series y contenido multimedia.
-        
-        ANALIZA esta consulta: "{query}"
-        
-        Tu tarea es IDENTIFICAR EL TÍTULO PRINCIPAL mencionado en la consulta, incluso si la descripción es vaga.
-        
-        Responde SOLO con un JSON válido con esta estructura:
-        {{
-            "intent": "search|analysis|fact_check|unknown",
-            "target_title": "título detectado o null",
-            "task": "descripción breve de la tarea",
-            "needs_web": true/false,
-            "needs_fact_check": true/false,
-            "query_purpose": "propósito de la consulta en una frase"
-        }}
-        
-        Reglas importantes:
-        - "search": cuando piden buscar información general (incluye consultas sobre cast/reparto)
-        - "analysis": cuando piden analizar profundamente  
-        - "fact_check": cuando piden verificar una afirmación
-        - "needs_web": true si requiere búsqueda web (casi siempre true)
-        - "needs_fact_check": true solo para verificaciones
-        - "target_title": SIEMPRE intenta extraer un título, incluso si es aproximado
-        
-        Palabras clave para cast/reparto: "cast", "reparto", "actores", "elenco", "protagonistas"
-        
-        Ejemplos:
-        - "cual es el cast de Avengers" → "intent": "search", "target_title": "Avengers"
-        - "reparto de The Matrix" → "intent": "search", "target_title": "The Matrix"
-        - "quienes actúan en Titanic" → "intent": "search", "target_title": "Titanic"
-        - "busca información sobre The Matrix" → "target_title": "The Matrix"
-        """
-        
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "qwen2.5:7b",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=180
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            response_text = result.get("response", "").strip()
-            
-            # Extraer JSON de la respuesta
-            try:
-                # ----------------------------------------------
-                # 1) EXTRAER JSON DE LA RESPUESTA DE OLLAMA
-                # ----------------------------------------------
-                json_candidates = re.findall(r'\{.*?\}', response_text, re.DOTALL)
-
-                if not json_candidates:
-                    logger.error(f"❌ No JSON found in response: {response_text}")
-                    return {
-                        "intent": "unknown",
-                        "target_title": None,
-                        "task": "fallback",
-                        "needs_web": False,
-                        "needs_fact_check": False,
-                        "query_purpose": "No se detectó JSON en la respuesta"
-                    }
-
-                # Elegir el JSON más grande (= más probable de estar completo)
-                json_str = max(json_candidates, key=len)
-                parsed = json.loads(json_str)
-
-                logger.info(f"✅ NLP Agent result: {parsed}")
-
-                # ----------------------------------------------
-                # 2) POST-PROCESAMIENTO Y NORMALIZACIÓN DEL TÍTULO
-                # ----------------------------------------------
-                title = parsed.get("target_title")
-
-                # Limpieza básica
-                if isinstance(title, str):
-                    title = title.strip().replace('"', '').replace("'", "")
-                    parsed["target_title"] = title
-
-                # ----------------------------------------------
-                # 3) Preguntas sobre DIRECTORES → intención "search"
-                # ----------------------------------------------
-                if any(k in query.lower() for k in ["director", "dirigió", "dirigida", "directed"]):
-                    parsed["intent"] = "search"
-                    parsed["task"] = "get_director"
-                    parsed["needs_web"] = True
-
-                return parsed
-
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ Error parsing JSON from Ollama: {e}")
-                logger.error(f"Raw response: {response_text}")
-                return {
-                    "intent": "unknown",
-                    "target_title": None,
-                    "task": None,
-                    "needs_web": False,
-                    "needs_fact_check": False,
-                    "query_purpose": None
-                }
-
-
-        q = query.lower()
-        if parsed.get("intent") == "unknown":
-            if any(w in q for w in ["quién actúa", "actores", "reparto", "cast", "protagonistas"]):
-                parsed["intent"] = "search"
-                parsed["task"] = "get_cast"
-                parsed["needs_web"] = True
-
-            elif any(w in q for w in ["es verdad", "cierto que", "fact", "verdadero o falso", "ganó", "murió"]):
-                parsed["intent"] = "fact_check"
-                parsed["needs_fact_check"] = True
-
-            elif any(w in q for w in ["qué es", "de qué trata", "sinopsis", "trama"]):
-                parsed["intent"] = "search"
-                parsed["task"] = "get_summary"
-                parsed["needs_web"] = True
-
-            elif any(w in q for w in ["información", "datos", "detalles", "info"]):
-                parsed["intent"] = "search"
-                parsed["needs_web"] = True
-
-        
-        # Fallback en caso de error
-        return {
-            "intent": "unknown",
-            "target_title": None,
-            "task": "fallback",
-            "needs_web": False,
-            "needs_fact_check": False,
-            "query_purpose": "Consulta no reconocida"
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ Error en nlp_agent: {e}")
-        return {
-            "intent": "unknown", 
-            "target_title": None,
-            "task": None,
-            "needs_web": False,
-            "needs_fact_check": False,
-            "query_purpose": None
-        }
\ No newline at end of file
+    logger.info(f"🔍 NLP Agent processing: {query}")
+
+    cache_key = normalize_text(query)
+    cached = INTERPRETATION_CACHE.get(cache_key)
+    if cached:
+        logger.info("⚡ Interpretación servida desde caché")
+        return dict(cached)
+
+    response_text = ollama_generate(
+        f'Consulta: "{query}"',
+        timeout=180,
+        stop_when=stop_on_json,
+        stats=stats,
+        system=SYSTEM_PROMPT,
+        format=INTERPRETATION_SCHEMA,
+        options={"temperature": 0}
+    )
+
+    parsed = extract_first_json(response_text)
+
+    if parsed is None:
+        logger.warning(f"⚠️  Sin JSON del LLM, usando reglas. Respuesta: {response_text}")
+        parsed = rules_interpretation(query)
+        return normalize_interpretation(parsed, query)
+
+    logger.info(f"✅ NLP Agent result: {parsed}")
+    interpretation = normalize_interpretation(parsed, query)
+    INTERPRETATION_CACHE.set(cache_key, dict(interpretation))
+    return interpretation
+
+
+def rules_interpretation(query: str) -> dict:
+    """Adapta la salida de interpreter_agent al formato del NLP"""
+    rules = interpreter_agent(query)
+    intent = rules.get("intent", "unknown")
+
+    return {
+        "intent": intent,
+        "target_title": rules["entities"].get("title"),
+        "task": "fallback",
+        "needs_web": intent != "unknown",
+        "needs_fact_check": intent == "fact_check",
+        "query_purpose": "Interpretación basada en reglas"
+    }
+
+
+def normalize_interpretation(parsed: dict, query: str) -> dict:
+    """Garantiza todas las claves y aplica las reglas por palabras clave"""
+    result = {
+        "intent": parsed.get("intent") if parsed.get("intent") in ("search", "analysis", "fact_check") else "unknown",
+        "target_title": parsed.get("target_title"),
+        "task": parsed.get("task") or "general",
+        "needs_web": bool(parsed.get("needs_web")),
+        "needs_fact_check": bool(parsed.get("needs_fact_check")),
+        "query_purpose": parsed.get("query_purpose") or "Consulta general"
+    }
+
+    # Limpieza básica de los títulos
+    result["target_title"] = clean_title(result["target_title"])
+
+    q = query.lower()
+
+    titles = [clean_title(t) for t in parsed.get("target_titles") or []]
+    titles = [t for t in titles if t]
+    if not titles and result["target_title"]:
+        titles = [result["target_title"]]
+        # Sin LLM: "compara Alien y Aliens" llega como un único título
+        if any(w in f" {q} " for w in COMPARE_WORDS):
+            titles = [t.strip() for t in re.split(r"\s+(?:y|vs\.?|versus|and)\s+", titles[0], flags=re.IGNORECASE) if t.strip()]
+
+    result["target_titles"] = list(dict.fromkeys(titles))
+    result["target_title"] = titles[0] if titles else None
+    result["comparison"] = len(result["target_titles"]) > 1
+
+    # Preguntas sobre DIRECTORES → intención "search"
+    if any(k in q for k in DIRECTOR_WORDS) and result["intent"] != "fact_check":
+        result["intent"] = "search"
+        result["task"] = "get_director"
+        result["needs_web"] = True
+
+    if result["intent"] == "unknown":
+        if any(w in q for w in CAST_WORDS):
+            result["intent"] = "search"
+            result["task"] = "get_cast"
+            result["needs_web"] = True
+
+        elif any(w in q for w in FACT_CHECK_WORDS):
+            result["intent"] = "fact_check"
+            result["needs_fact_check"] = True
+
+        elif any(w in q for w in SUMMARY_WORDS):
+            result["intent"] = "search"
+            result["task"] = "get_summary"
+            result["needs_web"] = True
+
+        elif any(w in q for w in INFO_WORDS):
+            result["intent"] = "search"
+            result["needs_web"] = True
+
+    if result["intent"] == "fact_check":
+        result["needs_fact_check"] = True
+
+    return result
+
+
+def clean_title(title):
+    if not isinstance(title, str):
+        return None
+    title = title.strip().replace('"', '').replace("'", "")
+    return title if title and title.lower() != "null" else None
@@ -0,0 +1,139 @@
+# agents/person_search.py
+
+import logging
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+from agents.html_parser import parse_document
+from agents.resilience import hedged_call
+from agents.web_search import open_tmdb_page, resilient_goto, accept_cookies, fetch_search_html
+
+logger = logging.getLogger("person_search")
+
+# Registro de la persona indexado por su id de TMDB
+PERSON_CACHE = make_cache("tmdb_people", maxsize=512, ttl=7 * 24 * 3600)
+# Nombre normalizado → id de TMDB
+PERSON_IDS = make_cache("tmdb_person_ids", maxsize=2048, ttl=7 * 24 * 3600, register=False)
+
+# TMDB muestra los departamentos según el idioma de la página
+ACTING_DEPARTMENTS = {"acting", "interpretacion", "actuacion", "reparto"}
+
+
+def person_agent(name: str):
+    """
+    Busca una persona en TMDB y devuelve su ficha con filmografía:
+    {id, name, department, credits: [{id, type, title, year, department}]}
+    o None si no se encuentra.
+    """
+    logger.info(f"👤 Buscando persona: '{name}'")
+
+    name_key = normalize_text(name)
+    person_id = PERSON_IDS.get(name_key)
+
+    if person_id is None:
+        person_id, found_name = search_tmdb_person(name)
+        if not person_id:
+            logger.warning(f"❌ No se encontró a '{name}' en TMDB")
+            return None
+        PERSON_IDS.set(name_key, person_id)
+    else:
+        found_name = name
+
+    return get_person(person_id, found_name)
+
+
+def get_person(person_id: int, name: str = None):
+    """Ficha de una persona por id (caché primero, luego scraping)"""
+    cached = PERSON_CACHE.get(str(person_id))
+    if cached:
+        logger.info(f"⚡ Filmografía servida desde caché: {cached['name']}")
+        return dict(cached)
+
+    record = scrape_person(person_id)
+    if not record or not record["credits"]:
+        return None
+
+    record["name"] = name or record["name"]
+    logger.info(f"✅ Filmografía de {record['name']}: {len(record['credits'])} créditos")
+    PERSON_CACHE.set(str(person_id), record)
+    return dict(record)
+
+
+def same_person(requested: str, found: str) -> bool:
+    """El nombre encontrado es el pedido, o contiene todas sus palabras ("DiCaprio")"""
+    requested_key, found_key = normalize_text(requested), normalize_text(found or "")
+    if not requested_key or not found_key:
+        return False
+    return requested_key == found_key or set(requested_key.split()) <= set(found_key.split())
+
+
+def search_tmdb_person(name: str):
+    """
+    Devuelve (id, nombre) del primer resultado de personas cuyo nombre
+    encaja con el pedido; (None, None) si ninguno encaja: con un nombre
+    mal escrito o ambiguo no se juzga la filmografía de otra persona.
+    """
+    search_url = f"https://www.themoviedb.org/search/person?query={name.replace(' ', '+')}"
+
+    try:
+        results_html = hedged_call("tmdb_search", fetch_search_html, search_url, name)
+    except Exception as e:
+        logger.error(f"❌ Error en búsqueda de persona: {e}")
+        return None, None
+
+    results = parse_document("person_results", results_html)
+    for best in results or []:
+        if same_person(name, best.get("name")):
+            logger.info(f"✅ Persona seleccionada: {best['name']} (ID: {best['id']})")
+            return best["id"], best["name"]
+
+    if results:
+        logger.warning(f"⚠️  Ningún resultado de TMDB coincide con '{name}' (primero: {results[0].get('name')})")
+    return None, None
+
+
+def scrape_person(person_id: int):
+    """Descarga /person/{id} y extrae la filmografía en el pool de parsing"""
+    url = f"https://www.themoviedb.org/person/{person_id}"
+
+    try:
+        with open_tmdb_page(45000) as page:
+            logger.info(f"👤 Scraping persona ID: {person_id}")
+            resilient_goto(page, url, "tmdb_person", wait_until="domcontentloaded")
+            accept_cookies(page, 2000)
+            html = page.content()
+    except Exception as e:
+        logger.error(f"❌ Error en scraping de persona: {e}")
+        return None
+
+    parsed = parse_document("person_credits", html)
+    return {
+        "id": person_id,
+        "name": None,
+        "department": parsed["department"],
+        "credits": parsed["credits"]
+    }
+
+
+def credit_keys(person: dict, departments: set) -> set:
+    """Conjunto de "tipo/id" y títulos normalizados de un departamento"""
+    keys = set()
+    for credit in person.get("credits") or []:
+        if normalize_text(credit["department"]) in departments:
+            keys.add(f"{credit['type']}/{credit['id']}")
+            keys.add(normalize_text(credit["title"]))
+    return keys
+
+
+def appears_in(person: dict, evidence: dict, departments: set = ACTING_DEPARTMENTS):
+    """
+    ¿Figura la obra de la evidencia en la filmografía de la persona?
+    Una búsqueda en un conjunto; None si no hay créditos del departamento.
+    """
+    keys = credit_keys(person, departments)
+    if not keys:
+        return None
+
+    if evidence.get("tmdb_id") and evidence.get("media_type"):
+        return f"{evidence['media_type']}/{evidence['tmdb_id']}" in keys
+    return normalize_text(evidence.get("title", "")) in keys
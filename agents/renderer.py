@@ -0,0 +1,431 @@
+# agents/renderer.py
+
+import html
+import json
+import logging
+from datetime import datetime
+from string import Template
+
+logger = logging.getLogger("renderer")
+
+FORMATS = ("markdown", "html", "json")
+
+# Único sitio donde se traduce is_true a icono y texto
+VERDICTS = {
+    True: ("✅", "VERDADERO"),
+    False: ("❌", "FALSO"),
+    None: ("⚠️", "INCONCLUSO"),
+}
+
+
+def verdict(is_true):
+    """(icono, texto) para un resultado de fact-check"""
+    return VERDICTS.get(is_true, VERDICTS[None])
+
+
+# --------------------------------------------------------------
+# PLANTILLAS (se compilan una vez al importar el módulo)
+# --------------------------------------------------------------
+
+MARKDOWN = {name: Template(text) for name, text in {
+    "report": """# 🎬 Reporte: $title
+
+**Fecha:** $now  
+**Intención detectada:** `$intent`  
+**Propósito:** $purpose
+
+## 📊 Información Encontrada
+
+$evidence$comparison$fact_check
+---
+*Reporte generado automáticamente por el sistema de Fact Checking*
+""",
+    "report_evidence": """
+**Título:** $title  
+**Año:** $year  
+**Géneros:** $genres  
+**Director:** $director  
+**Rating:** $rating
+
+**📖 Sinopsis:**  
+$summary
+
+$cast
+""",
+    "report_cast": "**🎭 Reparto Principal:**\n\n$items\n",
+    "report_no_cast": "**🎭 Reparto:** No disponible\n",
+    "report_no_evidence": "❌ No se encontró información.\n\n",
+    "report_comparison": """## 📊 Comparación
+
+| Título | Año | Director | Géneros |
+|---|---|---|---|
+$rows
+$common
+""",
+    "report_fact_check": """
+## 🔍 Verificación de Hechos
+
+**Afirmación:** "$claim"  
+**Resultado:** $icon **$status**  
+**Evidencia:** $evidence
+
+""",
+    "report_no_fact_check": "## 🔍 Verificación de Hechos\n\nNo se realizó verificación para esta consulta.\n\n",
+
+    "cast": """🎬 **$title ($year)**
+
+🎭 **Reparto Principal:**
+$cast
+
+📖 **Sinopsis:**
+$summary""",
+    "cast_missing": """🎬 **$title ($year)**
+
+ℹ️ No se pudo obtener información del reparto.
+
+📖 **Sinopsis:**
+$summary""",
+    "analysis": """📌 **Análisis sobre: $requested**
+
+🎬 *$title ($year)*
+
+🔎 **Propósito:** $purpose  
+🎭 **Géneros:** $genres  
+
+📖 **Resumen:** $summary
+
+👥 **Reparto (primeros 3):**
+$cast""",
+    "search": """**Información sobre $title ($year)**
+
+**🎭 Géneros:** $genres
+
+**📖 Sinopsis:**
+$summary
+
+**🎬 Reparto Principal:**
+$cast""",
+    "search_no_cast": """**Información sobre $title ($year)**
+
+**🎭 Géneros:** $genres
+
+**📖 Sinopsis:**
+$summary""",
+    "director": "🎥 **$title ($year)** fue dirigida por **$director**.",
+    "director_missing": "🎥 **$title ($year)**: director no disponible en TMDB.",
+    "year": "📅 **$title** se estrenó en **$year**.",
+    "genres": "🎭 **$title ($year)**: $genres.",
+    "rating": "⭐ **$title ($year)** tiene una puntuación de **$rating** en TMDB.",
+    "fact_check": """$icon **Fact-Check Resultado: $status**
+
+**Afirmación:** $claim
+
+**Evidencia:** $evidence
+
+**Confianza:** $confidence""",
+    "comparison_block": """🎬 **$title ($year)**
+
+🎥 **Director:** $director  
+🎭 **Géneros:** $genres  
+
+👥 **Reparto:**
+$cast""",
+    "comparison_missing": "🎬 **$title**\n\nℹ️ No se encontró información.",
+    "seasons": "📺 **$title**: $count temporadas, $episodes episodios\n\n$items",
+    "seasons_missing": "📺 **$title**\n\nℹ️ No se pudo obtener la lista de temporadas.",
+    "season_cast": "📺 **$title — Temporada $number**\n\n🎭 **Reparto:**\n$cast",
+    "season_episodes": "📺 **$title — Temporada $number** ($count episodios)\n\n$items",
+    "season_empty": "📺 **$title — Temporada $number**\n\nℹ️ No se encontraron episodios.",
+}.items()}
+
+HTML = {name: Template(text) for name, text in {
+    "report": """<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>Reporte: $title</title></head>
+<body>
+<h1>🎬 Reporte: $title</h1>
+<p><strong>Fecha:</strong> $now<br>
+<strong>Intención detectada:</strong> <code>$intent</code><br>
+<strong>Propósito:</strong> $purpose</p>
+<h2>📊 Información Encontrada</h2>
+$evidence$comparison$fact_check
+<hr>
+<p><em>Reporte generado automáticamente por el sistema de Fact Checking</em></p>
+</body>
+</html>
+""",
+    "report_evidence": """<p><strong>Título:</strong> $title<br>
+<strong>Año:</strong> $year<br>
+<strong>Géneros:</strong> $genres<br>
+<strong>Director:</strong> $director<br>
+<strong>Rating:</strong> $rating</p>
+<h3>📖 Sinopsis</h3>
+<p>$summary</p>
+$cast
+""",
+    "report_cast": "<h3>🎭 Reparto Principal</h3>\n<ul>\n$items\n</ul>\n",
+    "report_no_cast": "<p><strong>🎭 Reparto:</strong> No disponible</p>\n",
+    "report_no_evidence": "<p>❌ No se encontró información.</p>\n",
+    "report_comparison": """<h2>📊 Comparación</h2>
+<table>
+<tr><th>Título</th><th>Año</th><th>Director</th><th>Géneros</th></tr>
+$rows
+</table>
+$common
+""",
+    "report_fact_check": """<h2>🔍 Verificación de Hechos</h2>
+<p><strong>Afirmación:</strong> "$claim"<br>
+<strong>Resultado:</strong> $icon <strong>$status</strong><br>
+<strong>Evidencia:</strong> $evidence</p>
+""",
+    "report_no_fact_check": "<h2>🔍 Verificación de Hechos</h2>\n<p>No se realizó verificación para esta consulta.</p>\n",
+}.items()}
+
+
+# --------------------------------------------------------------
+# CONTEXTO (datos neutros: sirven tal cual para JSON)
+# --------------------------------------------------------------
+
+def evidence_context(evidence: dict, fallback_title: str = None) -> dict:
+    evidence = evidence or {}
+    return {
+        "title": evidence.get("title") or fallback_title or "No disponible",
+        "year": evidence.get("year", "No disponible"),
+        "genres": list(evidence.get("genres") or []),
+        "director": evidence.get("director") or "No disponible",
+        "rating": evidence.get("rating", "No disponible"),
+        "summary": evidence.get("summary", "No disponible"),
+        "cast": list(evidence.get("cast") or []),
+    }
+
+
+def fact_check_context(fact_check: dict) -> dict:
+    icon, status = verdict(fact_check.get("is_true"))
+    return {
+        "claim": fact_check.get("claim", "No especificada"),
+        "is_true": fact_check.get("is_true"),
+        "icon": icon,
+        "status": status,
+        "evidence": fact_check.get("evidence", "No disponible"),
+        "confidence": fact_check.get("confidence", "media"),
+    }
+
+
+def comparison_context(titles: list, comparison: list) -> dict:
+    """Una fila por título pedido y el reparto común a los encontrados"""
+    rows = []
+    casts = []
+    for requested, item in zip(titles, comparison):
+        found = bool(item) and "error" not in item
+        row = evidence_context(item if found else None, requested)
+        row["found"] = found
+        rows.append(row)
+        if found:
+            casts.append(set(row["cast"]))
+
+    common = sorted(set.intersection(*casts)) if len(casts) > 1 else None
+    return {"rows": rows, "common_cast": common}
+
+
+def report_context(interpretation: dict, evidence: dict, fact_check: dict, comparison: list = None) -> dict:
+    return {
+        "title": interpretation.get("target_title") or "Título no identificado",
+        "now": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "intent": interpretation.get("intent") or "unknown",
+        "purpose": interpretation.get("query_purpose") or "No especificado",
+        "evidence": evidence_context(evidence) if evidence else None,
+        "comparison": comparison_context(interpretation.get("target_titles") or [], comparison) if comparison else None,
+        "fact_check": fact_check_context(fact_check) if fact_check else None,
+    }
+
+
+# --------------------------------------------------------------
+# REPORTES
+# --------------------------------------------------------------
+
+def render_report(interpretation: dict, evidence: dict = None, fact_check: dict = None,
+                  comparison: list = None, fmt: str = "markdown") -> str:
+    """Reporte completo en markdown, html o json a partir del mismo contexto"""
+    context = report_context(interpretation, evidence, fact_check, comparison)
+
+    if fmt == "json":
+        return json.dumps(context, ensure_ascii=False, indent=2)
+    if fmt == "html":
+        return _render_report(HTML, context, html.escape, "<li>{}</li>",
+                              "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+                              "<p><strong>🤝 Actores en común:</strong> {}</p>")
+    if fmt == "markdown":
+        return _render_report(MARKDOWN, context, str, "- {}",
+                              "| {} | {} | {} | {} |",
+                              "\n**🤝 Actores en común:** {}\n")
+    raise ValueError(f"Formato no soportado: {fmt}")
+
+
+def _render_report(templates: dict, context: dict, escape, item: str, row: str, common: str) -> str:
+    evidence = context["evidence"]
+    if evidence:
+        cast = evidence["cast"][:6]
+        cast_section = (
+            templates["report_cast"].substitute(items="\n".join(item.format(escape(a)) for a in cast))
+            if cast else templates["report_no_cast"].substitute()
+        )
+        evidence_section = templates["report_evidence"].substitute(
+            {key: escape(str(value)) for key, value in evidence.items() if key not in ("genres", "cast")},
+            genres=escape(", ".join(evidence["genres"]) or "No disponibles"),
+            cast=cast_section
+        )
+    else:
+        evidence_section = templates["report_no_evidence"].substitute()
+
+    comparison_section = ""
+    if context["comparison"]:
+        rows = []
+        for entry in context["comparison"]["rows"]:
+            if entry["found"]:
+                rows.append(row.format(escape(entry["title"]), escape(str(entry["year"])), escape(entry["director"]),
+                                       escape(", ".join(entry["genres"]) or "No disponibles")))
+            else:
+                rows.append(row.format(escape(entry["title"]), "-", "-", "No encontrado"))
+        shared = context["comparison"]["common_cast"]
+        comparison_section = templates["report_comparison"].substitute(
+            rows="\n".join(rows),
+            common=common.format(escape(", ".join(shared) or "Ninguno")) if shared is not None else ""
+        )
+
+    fact_check = context["fact_check"]
+    if fact_check:
+        fact_check_section = templates["report_fact_check"].substitute(
+            {key: escape(str(value)) for key, value in fact_check.items()}
+        )
+    else:
+        fact_check_section = templates["report_no_fact_check"].substitute()
+
+    return templates["report"].substitute(
+        title=escape(context["title"]),
+        now=context["now"],
+        intent=escape(context["intent"]),
+        purpose=escape(context["purpose"]),
+        evidence=evidence_section,
+        comparison=comparison_section,
+        fact_check=fact_check_section
+    )
+
+
+# --------------------------------------------------------------
+# RESPUESTAS DEL CHAT (markdown)
+# --------------------------------------------------------------
+
+def bullets(items: list, empty: str = "No disponible") -> str:
+    return "\n".join(f"• {item}" for item in items) if items else empty
+
+
+def render_title_response(kind: str, interpretation: dict, evidence: dict, requested: str) -> str:
+    """Respuestas sobre un título: cast, analysis o search"""
+    context = evidence_context(evidence, requested)
+    if not evidence:
+        context["summary"] = "No hay información disponible" if kind == "search" else "No disponible"
+    genres = ", ".join(context["genres"]) or "No disponibles"
+    cast = context["cast"]
+
+    if kind == "cast":
+        template = "cast" if cast else "cast_missing"
+        return MARKDOWN[template].substitute(context, cast=bullets(cast[:8]))
+
+    if kind == "analysis":
+        return MARKDOWN["analysis"].substitute(
+            context, requested=requested, genres=genres, cast=bullets(cast[:3]),
+            purpose=interpretation.get("query_purpose", "Consulta general")
+        )
+
+    template = "search" if cast else "search_no_cast"
+    return MARKDOWN[template].substitute(context, genres=genres, cast=bullets(cast[:6]))
+
+
+# Tarea del NLP → plantilla de respuesta corta sobre un atributo
+ATTRIBUTE_TEMPLATES = {
+    "get_director": "director",
+    "get_year": "year",
+    "get_genres": "genres",
+    "get_rating": "rating",
+}
+
+
+def render_attribute_response(task: str, evidence: dict, requested: str):
+    """Respuesta directa a "¿quién la dirigió?"; None si no aplica"""
+    template = ATTRIBUTE_TEMPLATES.get(task)
+    if not template or not evidence or "error" in evidence:
+        return None
+    context = evidence_context(evidence, requested)
+    if template == "director" and context["director"] == "No disponible":
+        # Se preguntó justo esto: mejor decirlo que volver a la ficha genérica
+        return MARKDOWN["director_missing"].substitute(context)
+    if context[template] in ("No disponible", []):
+        return None
+    return MARKDOWN[template].substitute(context, genres=", ".join(context["genres"]))
+
+
+def render_fact_check_response(fact_result: dict) -> str:
+    context = fact_check_context(fact_result)
+    context["evidence"] = fact_result.get("evidence", "Sin explicación disponible")
+    context["confidence"] = str(context["confidence"]).upper()
+    return MARKDOWN["fact_check"].substitute(context)
+
+
+def render_comparison_response(titles: list, comparison: list, task: str, is_cast_query: bool) -> str:
+    """Un bloque por título y, según la pregunta, lo que tienen en común"""
+    context = comparison_context(titles, comparison)
+
+    blocks = []
+    for entry in context["rows"]:
+        if not entry["found"]:
+            blocks.append(MARKDOWN["comparison_missing"].substitute(title=entry["title"]))
+            continue
+        blocks.append(MARKDOWN["comparison_block"].substitute(
+            entry, genres=", ".join(entry["genres"]) or "No disponibles", cast=bullets(entry["cast"][:5])
+        ))
+
+    response = "📊 **Comparación**\n\n" + "\n\n---\n\n".join(blocks)
+
+    if task == "get_director":
+        directors = [f"{e['title']}: {e['director']}" for e in context["rows"] if e["found"]]
+        if directors:
+            response += "\n\n🎥 **Directores:**\n" + bullets(directors)
+
+    if is_cast_query and context["common_cast"] is not None:
+        response += "\n\n🤝 **Actores en común:**\n" + bullets(context["common_cast"], empty="Ninguno")
+
+    return response
+
+
+def render_season_response(answer: dict, question: dict) -> str:
+    """Resumen de temporadas, episodios de una temporada o su reparto"""
+    title = answer.get("title") or "la serie"
+    season = answer.get("season")
+
+    if question["wants"] == "seasons" or not season:
+        seasons = answer.get("seasons") or []
+        if not seasons:
+            return MARKDOWN["seasons_missing"].substitute(title=title)
+        regular = [s for s in seasons if s["number"] > 0]
+        items = [
+            s["name"] + (f" ({s['year']})" if s["year"] else "") +
+            (f": {s['episode_count']} episodios" if s["episode_count"] else "")
+            for s in seasons
+        ]
+        return MARKDOWN["seasons"].substitute(
+            title=title, count=len(regular), items=bullets(items),
+            episodes=sum(s["episode_count"] or 0 for s in regular)
+        )
+
+    if question["wants"] == "cast":
+        return MARKDOWN["season_cast"].substitute(
+            title=title, number=season["number"], cast=bullets((season.get("cast") or [])[:10])
+        )
+
+    episodes = season.get("episodes") or []
+    if not episodes:
+        return MARKDOWN["season_empty"].substitute(title=title, number=season["number"])
+    return MARKDOWN["season_episodes"].substitute(
+        title=title, number=season["number"], count=len(episodes),
+        items="\n".join(f"{e['number']}. {e['title']}" for e in episodes)
+    )
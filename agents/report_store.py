@@ -0,0 +1,227 @@
+# agents/report_store.py
+#
+#   python -m agents.report_store find --title "Titanic"
+#   python -m agents.report_store export reports_export.zip --date 2026-10-18
+#   python -m agents.report_store import reports/ --remove
+
+import argparse
+import gzip
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("report_store")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_PATH = os.environ.get("FACTCHECK_REPORTS_PATH", os.path.join(ROOT_DIR, "reports", "reports.sqlite3"))
+
+# La fecha de generación cambia en cada reporte: no cuenta para el hash
+VOLATILE_LINES = re.compile(r"^\*\*Fecha:\*\*.*$", re.MULTILINE)
+
+
+def content_hash(body: str) -> str:
+    """SHA-256 del reporte sin las líneas que cambian en cada ejecución"""
+    return hashlib.sha256(VOLATILE_LINES.sub("", body).encode("utf-8")).hexdigest()
+
+
+class ReportStore:
+    """
+    Archivo único de reportes sobre SQLite. Cada cuerpo distinto se
+    guarda una vez comprimido con gzip; cada consulta añade solo una
+    fila de índice (fecha, consulta, título, hash).
+    """
+
+    def __init__(self, path: str = REPORTS_PATH):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                created REAL NOT NULL,
+                query TEXT,
+                title TEXT,
+                title_key TEXT,
+                hash TEXT NOT NULL REFERENCES bodies (hash)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS reports_title ON reports (title_key, created)")
+        conn.execute("CREATE INDEX IF NOT EXISTS reports_created ON reports (created)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def save(self, body: str, query: str = None, title: str = None, created: float = None) -> dict:
+        """Añade una fila de índice; el cuerpo solo se escribe si es nuevo"""
+        digest = content_hash(body)
+        created = created or time.time()
+        timestamp = datetime.fromtimestamp(created, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        data = body.encode("utf-8")
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO bodies (hash, body, size, created) VALUES (?, ?, ?, ?)",
+                (digest, gzip.compress(data), len(data), created)
+            )
+            deduplicated = cursor.rowcount == 0
+            cursor = conn.execute(
+                "INSERT INTO reports (timestamp, created, query, title, title_key, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                (timestamp, created, query, title, normalize_text(title or ""), digest)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {"id": cursor.lastrowid, "hash": digest, "timestamp": timestamp, "deduplicated": deduplicated}
+
+    def get_body(self, digest: str):
+        row = self._conn().execute("SELECT body FROM bodies WHERE hash = ?", (digest,)).fetchone()
+        return gzip.decompress(row["body"]).decode("utf-8") if row else None
+
+    def find(self, title: str = None, date: str = None, limit: int = 50) -> list:
+        """Filas de índice por título (contiene) y/o día (YYYY-MM-DD, UTC)"""
+        sql = "SELECT id, timestamp, created, query, title, hash FROM reports WHERE 1 = 1"
+        params = []
+
+        if title:
+            sql += " AND title_key LIKE ?"
+            params.append(f"%{normalize_text(title)}%")
+        if date:
+            start = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            sql += " AND created >= ? AND created < ?"
+            params += [start.timestamp(), (start + timedelta(days=1)).timestamp()]
+
+        sql += " ORDER BY created DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    def export(self, dest: str, title: str = None, date: str = None) -> int:
+        """
+        Exporta a un zip: cada cuerpo una vez (bodies/<hash>.md) más
+        index.jsonl con todas las filas. Devuelve el número de filas.
+        """
+        rows = self.find(title=title, date=date, limit=-1)
+        written = set()
+
+        with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for row in rows:
+                if row["hash"] not in written:
+                    archive.writestr(f"bodies/{row['hash']}.md", self.get_body(row["hash"]))
+                    written.add(row["hash"])
+            archive.writestr("index.jsonl", "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+
+        logger.info(f"📦 Exportados {len(rows)} reportes ({len(written)} cuerpos distintos) a {dest}")
+        return len(rows)
+
+    def import_markdown(self, directory: str, remove: bool = False) -> int:
+        """Migra los report_*.md antiguos al archivo"""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(directory, "report_*.md"))):
+            with open(path, encoding="utf-8") as f:
+                body = f.read()
+            title = re.search(r"^# 🎬 Reporte: (.+)$", body, re.MULTILINE)
+            self.save(body, title=title.group(1) if title else None, created=os.path.getmtime(path))
+            if remove:
+                os.remove(path)
+            count += 1
+        return count
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        reports = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        bodies, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM bodies"
+        ).fetchone()
+        return {"reports": reports, "bodies": bodies, "raw_bytes": raw, "stored_bytes": stored}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ReportStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo de reportes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    find_cmd = commands.add_parser("find", help="buscar reportes")
+    find_cmd.add_argument("--title")
+    find_cmd.add_argument("--date", help="YYYY-MM-DD (UTC)")
+    find_cmd.add_argument("--limit", type=int, default=50)
+
+    show_cmd = commands.add_parser("show", help="mostrar un reporte por hash")
+    show_cmd.add_argument("hash")
+
+    export_cmd = commands.add_parser("export", help="exportar a zip")
+    export_cmd.add_argument("dest")
+    export_cmd.add_argument("--title")
+    export_cmd.add_argument("--date", help="YYYY-MM-DD (UTC)")
+
+    import_cmd = commands.add_parser("import", help="migrar reportes .md")
+    import_cmd.add_argument("directory")
+    import_cmd.add_argument("--remove", action="store_true", help="borrar los .md migrados")
+
+    commands.add_parser("stats", help="tamaño del archivo")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+    store = get_store()
+
+    if args.command == "find":
+        for row in store.find(title=args.title, date=args.date, limit=args.limit):
+            print(f"{row['timestamp']}  {row['hash'][:12]}  {row['title'] or '-'}  {row['query'] or ''}")
+    elif args.command == "show":
+        matches = store._conn().execute(
+            "SELECT hash FROM bodies WHERE hash LIKE ? LIMIT 2", (f"{args.hash}%",)
+        ).fetchall()
+        if len(matches) != 1:
+            print("❌ Hash no encontrado o ambiguo")
+            raise SystemExit(1)
+        print(store.get_body(matches[0]["hash"]))
+    elif args.command == "export":
+        store.export(args.dest, title=args.title, date=args.date)
+    elif args.command == "import":
+        print(f"✅ {store.import_markdown(args.directory, remove=args.remove)} reportes migrados")
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
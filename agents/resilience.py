@@ -0,0 +1,348 @@
+# agents/resilience.py
+
+import logging
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("resilience")
+
+# Presupuesto por endpoint (segundos): por defecto mientras no hay
+# suficientes muestras, y límites para el valor adaptativo.
+ENDPOINTS = {
+    "tmdb_search":      {"breaker": "tmdb",   "default": 50,  "min": 10, "max": 60},
+    "tmdb_page":        {"breaker": "tmdb",   "default": 60,  "min": 15, "max": 60},
+    "tmdb_cast_page":   {"breaker": "tmdb",   "default": 30,  "min": 8,  "max": 30},
+    "tmdb_person":      {"breaker": "tmdb",   "default": 45,  "min": 10, "max": 60},
+    "tmdb_season":      {"breaker": "tmdb",   "default": 40,  "min": 10, "max": 60},
+    "ollama_interpret": {"breaker": "ollama", "default": 180, "min": 15, "max": 180},
+    "ollama_verify":    {"breaker": "ollama", "default": 10,  "min": 5,  "max": 20},
+}
+
+MIN_SAMPLES = 10        # muestras antes de adaptar el timeout
+TIMEOUT_FACTOR = 3.0    # timeout = p95 × factor
+HEDGE_MIN_SAMPLES = 20  # muestras antes de enviar peticiones duplicadas
+HEDGE_PERCENTILE = 95   # se duplica la petición si tarda más que este percentil
+
+BREAKER_FAILURES = 3    # fallos seguidos para abrir el circuito
+BREAKER_RESET = 30      # segundos con el circuito abierto antes de probar
+
+QUERY_DEADLINE = float(os.environ.get("FACTCHECK_QUERY_DEADLINE", "120"))
+
+
+class CircuitOpenError(Exception):
+    """El servicio está caído: se falla rápido sin esperar al timeout"""
+
+
+class DeadlineExceeded(Exception):
+    """Se agotó el tiempo total de la consulta"""
+
+
+class QueryCancelled(BaseException):
+    """
+    El cliente canceló la consulta o se desconectó. Hereda de
+    BaseException (como asyncio.CancelledError) para que los
+    `except Exception` del scraping no la absorban.
+    """
+
+
+class LatencyTracker:
+    """Ventana de latencias recientes de un endpoint"""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float):
+        with self.lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class CircuitBreaker:
+    """closed → open tras N fallos seguidos → half_open tras el reset → closed"""
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.reset = reset
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self.trial_running:
+                # Una sola petición de prueba
+                self.trial_running = True
+                return
+        raise CircuitOpenError(f"Circuito '{self.name}' abierto")
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info(f"🟢 Circuito '{self.name}' cerrado de nuevo")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """Libera la prueba de half_open sin contar éxito ni fallo"""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.max_failures:
+                if self.opened_at is None:
+                    logger.warning(f"🔴 Circuito '{self.name}' abierto tras {self.failures} fallos")
+                self.opened_at = time.monotonic()
+
+
+trackers = {name: LatencyTracker() for name in ENDPOINTS}
+breakers = {name: CircuitBreaker(name) for name in {cfg["breaker"] for cfg in ENDPOINTS.values()}}
+
+_deadline = contextvars.ContextVar("query_deadline", default=None)
+_cancel_event = contextvars.ContextVar("query_cancel_event", default=None)
+_query_threads = contextvars.ContextVar("query_threads", default=None)
+
+
+# --------------------------------------------------------------
+# DEADLINE POR CONSULTA
+# --------------------------------------------------------------
+
+@contextmanager
+def deadline_scope(seconds: float = QUERY_DEADLINE):
+    """Fija un tiempo máximo para todo lo que se ejecute dentro"""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Segundos que quedan hasta el deadline, o None si no hay"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline():
+    check_cancelled()
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Tiempo total de la consulta agotado")
+
+
+# --------------------------------------------------------------
+# CANCELACIÓN POR CONSULTA
+# --------------------------------------------------------------
+
+@contextmanager
+def cancel_scope(event: threading.Event = None):
+    """
+    Asocia un threading.Event a la consulta. Los hilos lanzados con el
+    contexto copiado (asyncio.to_thread, hedged_call) lo ven y abortan
+    en el siguiente punto de control cuando se activa.
+    """
+    event = event or threading.Event()
+    token = _cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _cancel_event.reset(token)
+
+
+def is_cancelled() -> bool:
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def check_cancelled():
+    if is_cancelled():
+        raise QueryCancelled("Consulta cancelada")
+
+
+def wait_or_cancel(seconds: float):
+    """time.sleep interrumpible por la cancelación de la consulta"""
+    event = _cancel_event.get()
+    if event is None:
+        time.sleep(seconds)
+    elif event.wait(seconds):
+        raise QueryCancelled("Consulta cancelada")
+
+
+# --------------------------------------------------------------
+# TIMEOUTS ADAPTATIVOS Y CIRCUIT BREAKERS
+# --------------------------------------------------------------
+
+def timeout_budget(endpoint: str, default: float = None):
+    """
+    Timeout para la próxima llamada: p95 observado × factor, acotado por
+    los límites del endpoint y por lo que quede del deadline.
+    Devuelve (segundos, recortado_por_deadline).
+    """
+    cfg = ENDPOINTS[endpoint]
+    tracker = trackers[endpoint]
+
+    budget = default or cfg["default"]
+    if len(tracker) >= MIN_SAMPLES:
+        budget = min(cfg["max"], max(cfg["min"], tracker.percentile(95) * TIMEOUT_FACTOR))
+
+    left = remaining()
+    if left is not None and left < budget:
+        return max(left, 0.5), True
+    return budget, False
+
+
+@contextmanager
+def guarded_call(endpoint: str, default: float = None):
+    """
+    Protege una llamada: comprueba deadline y circuito, entrega el
+    timeout a usar (segundos) y registra latencia o fallo.
+    """
+    check_deadline()
+    breaker = breakers[ENDPOINTS[endpoint]["breaker"]]
+    breaker.allow()
+
+    budget, clamped = timeout_budget(endpoint, default)
+    started = time.monotonic()
+    try:
+        yield budget
+    except BaseException:
+        # Un timeout causado por el deadline o una cancelación no es culpa del servicio
+        if clamped or is_cancelled():
+            breaker.release_trial()
+        else:
+            breaker.record_failure()
+        raise
+    trackers[endpoint].record(time.monotonic() - started)
+    breaker.record_success()
+
+
+# --------------------------------------------------------------
+# HILOS DE LA CONSULTA
+# --------------------------------------------------------------
+
+@contextmanager
+def track_threads():
+    """
+    Entrega un set con los ids de los hilos que están trabajando para
+    esta consulta (los que ejecutan funciones envueltas con query_thread
+    con el contexto copiado). Lo usa el perfilador para no mezclar
+    consultas simultáneas.
+    """
+    threads = set()
+    token = _query_threads.set(threads)
+    try:
+        yield threads
+    finally:
+        _query_threads.reset(token)
+
+
+def query_thread(fn):
+    """Envuelve fn para que su hilo cuente como de la consulta mientras se ejecuta"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        threads = _query_threads.get()
+        if threads is None:
+            return fn(*args, **kwargs)
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            threads.discard(ident)
+    return wrapper
+
+
+# --------------------------------------------------------------
+# PETICIONES DUPLICADAS (HEDGING)
+# --------------------------------------------------------------
+
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def hedged_call(endpoint: str, fn, *args):
+    """
+    Ejecuta fn(cancelled, *args). Si la primera petición tarda más que el
+    p95 del endpoint se lanza una segunda idéntica y gana la primera que
+    termine bien. `cancelled` (threading.Event) avisa a la perdedora.
+    """
+    tracker = trackers[endpoint]
+    if len(tracker) < HEDGE_MIN_SAMPLES:
+        return fn(threading.Event(), *args)
+
+    hedge_delay = tracker.percentile(HEDGE_PERCENTILE)
+    events = [threading.Event()]
+    fn = query_thread(fn)
+    futures = [_hedge_pool.submit(contextvars.copy_context().run, fn, events[0], *args)]
+
+    done, _ = wait(futures, timeout=hedge_delay)
+    if not done:
+        logger.info(f"🪞 '{endpoint}' lento (> {hedge_delay:.1f}s), enviando petición duplicada")
+        events.append(threading.Event())
+        futures.append(_hedge_pool.submit(contextvars.copy_context().run, fn, events[1], *args))
+
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            for event, other in zip(events, futures):
+                if other is not future:
+                    event.set()
+            return result
+
+    raise error
+
+
+def resilience_stats() -> dict:
+    return {
+        "endpoints": {
+            name: {
+                "samples": len(tracker),
+                "p50": tracker.percentile(50),
+                "p95": tracker.percentile(95),
+                "timeout": timeout_budget(name)[0]
+            }
+            for name, tracker in trackers.items()
+        },
+        "breakers": {name: breaker.state for name, breaker in breakers.items()}
+    }
@@ -0,0 +1,11 @@
+# agents/text_utils.py
+
+import re
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin acentos"""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text.lower()).strip()
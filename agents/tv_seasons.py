@@ -0,0 +1,147 @@
+# agents/tv_seasons.py
+
+import logging
+import re
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+from agents.html_parser import parse_document
+from agents.evidence_store import EVIDENCE_MODE
+from agents.web_search import open_tmdb_page, resilient_goto, accept_cookies
+
+logger = logging.getLogger("tv_seasons")
+
+# Cada página se cachea por separado: una pregunta sobre la temporada 3
+# no obliga a cargar las otras
+SEASON_LIST_CACHE = make_cache("tmdb_season_lists", maxsize=512, ttl=24 * 3600)
+SEASON_CACHE = make_cache("tmdb_seasons", maxsize=2048, ttl=24 * 3600)
+
+SEASON_WORDS = ["temporada", "season", "episodio", "episode", "capitulo"]
+CAST_WORDS = ["reparto", "cast", "actores", "elenco", "protagonistas", "quien actua"]
+
+ORDINALS = {
+    "primera": 1, "segunda": 2, "tercera": 3, "cuarta": 4, "quinta": 5,
+    "sexta": 6, "septima": 7, "octava": 8, "novena": 9, "decima": 10,
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "ultima": -1, "last": -1
+}
+
+
+def season_question(query: str):
+    """
+    Detecta preguntas sobre temporadas/episodios.
+    Devuelve {season, wants} (season None = todas, -1 = la última;
+    wants: seasons | episodes | cast) o None si no es una de ellas.
+    """
+    q = normalize_text(query)
+    if not any(word in q for word in SEASON_WORDS):
+        return None
+
+    season = None
+    match = re.search(r"(?:temporada|season)\s+(\d+)|(\d+)\s*(?:a|ª)?\s+temporada\b", q)
+    if match:
+        season = int(match.group(1) or match.group(2))
+    else:
+        for word, number in ORDINALS.items():
+            if re.search(rf"\b{word}\s+(?:temporada|season)\b", q):
+                season = number
+                break
+
+    if season is not None and any(word in q for word in CAST_WORDS):
+        wants = "cast"
+    elif season is not None:
+        wants = "episodes"
+    else:
+        wants = "seasons"
+
+    return {"season": season, "wants": wants}
+
+
+def fetch_page_html(url: str) -> str:
+    with open_tmdb_page(40000) as page:
+        resilient_goto(page, url, "tmdb_season", wait_until="domcontentloaded")
+        accept_cookies(page, 2000)
+        return page.content()
+
+
+def get_seasons(tv_id: int) -> list:
+    """Lista de temporadas con número de episodios (una sola página)"""
+    key = f"tv/{tv_id}"
+    cached = SEASON_LIST_CACHE.get(key)
+    if cached:
+        logger.info(f"⚡ Temporadas servidas desde caché: {key}")
+        return list(cached)
+
+    logger.info(f"📺 Cargando temporadas de {key}")
+    try:
+        html = fetch_page_html(f"https://www.themoviedb.org/tv/{tv_id}/seasons")
+    except Exception as e:
+        logger.error(f"❌ Error cargando temporadas: {e}")
+        return []
+
+    seasons = parse_document("season_list", html)
+    if seasons:
+        SEASON_LIST_CACHE.set(key, seasons)
+    return seasons
+
+
+def get_season(tv_id: int, number: int, with_cast: bool = False) -> dict:
+    """
+    Episodios (y, si se pide, reparto) de una temporada. El reparto es
+    otra página y solo se carga la primera vez que alguien lo pregunta.
+    """
+    key = f"tv/{tv_id}/season/{number}"
+    season = SEASON_CACHE.get(key)
+    season = dict(season) if season else None
+
+    if season is None:
+        logger.info(f"📺 Cargando {key}")
+        try:
+            html = fetch_page_html(f"https://www.themoviedb.org/{key}")
+        except Exception as e:
+            logger.error(f"❌ Error cargando temporada: {e}")
+            return {"number": number, "episodes": [], "cast": None}
+        season = {"number": number, "episodes": parse_document("season_episodes", html), "cast": None}
+    elif not with_cast or season["cast"] is not None:
+        logger.info(f"⚡ Temporada servida desde caché: {key}")
+        return season
+
+    if with_cast and season["cast"] is None:
+        try:
+            html = fetch_page_html(f"https://www.themoviedb.org/{key}/cast")
+            season["cast"] = parse_document("cast_html", html)[:15]
+        except Exception as e:
+            logger.error(f"❌ Error cargando reparto de temporada: {e}")
+
+    if season["episodes"] or season["cast"]:
+        SEASON_CACHE.set(key, season)
+    return season
+
+
+def answer_season_question(evidence: dict, question: dict):
+    """
+    Carga solo las páginas que la pregunta necesita.
+    Devuelve {title, seasons, season} o None si no es una serie (o en
+    modo offline, donde las temporadas no están en el catálogo).
+    """
+    if EVIDENCE_MODE == "offline":
+        return None
+    if not evidence or evidence.get("media_type") != "tv" or not evidence.get("tmdb_id"):
+        return None
+
+    tv_id = evidence["tmdb_id"]
+    number = question["season"]
+    seasons = []
+
+    # La lista solo hace falta para el resumen o para saber cuál es la última
+    if question["wants"] == "seasons" or number == -1:
+        seasons = get_seasons(tv_id)
+        regular = [s["number"] for s in seasons if s["number"] > 0]
+        if number == -1:
+            number = max(regular) if regular else None
+
+    season = None
+    if number is not None:
+        season = get_season(tv_id, number, with_cast=question["wants"] == "cast")
+
+    return {"title": evidence.get("title"), "seasons": seasons, "season": season}
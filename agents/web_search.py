@@ -1,21 +1,141 @@
 # agents/web_search.py
 
 import logging
+import os
 import re
-import time
 import json
-import requests
-from playwright.sync_api import sync_playwright
+import threading
+from contextlib import contextmanager
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+from agents.html_parser import parse_document
+from agents.resilience import guarded_call, hedged_call, wait_or_cancel
+from agents.cast_quality import (
+    score_cast, learn_names, strategy_order, remember_strategy, forget_strategy, ACCEPT_SCORE, MIN_SCORE
+)
+from agents.evidence_store import EVIDENCE_MODE, EVIDENCE_MAX_AGE, get_evidence_store
+from agents.fetch_scheduler import fetch_slot, retry_after_seconds, ThrottledError
+from agents.browser_profile import (
+    profile_slot, reset_slot, load_shared_state, save_shared_state, apply_shared_state, has_consent
+)
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("web_search_agent")
 
+TMDB_CACHE = make_cache("tmdb", maxsize=1024, ttl=24 * 3600)
+
+# Navegadores simultáneos: el total se reparte entre los workers del servidor.
+# El reparto redondea (cada worker tiene al menos uno, así que con más
+# workers que navegadores la suma pasaría del total); el tope real entre
+# procesos lo ponen los MAX_BROWSERS huecos con flock de profile_slot
+MAX_BROWSERS = int(os.environ.get("FACTCHECK_MAX_BROWSERS", "4"))
+WORKERS = int(os.environ.get("FACTCHECK_WORKERS", "1"))
+BROWSER_SLOTS = threading.BoundedSemaphore(max(1, MAX_BROWSERS // max(1, WORKERS)))
+
+# Reintentos de una navegación a la que TMDB responde 429/503
+THROTTLE_RETRIES = 2
+
+@contextmanager
+def open_tmdb_page(default_timeout: int):
+    """
+    Lanza Chromium dentro de un hueco de navegador y entrega una página.
+    Con perfil persistente la caché HTTP, las cookies y el localStorage
+    se conservan entre consultas.
+    """
+    # Playwright solo se carga cuando de verdad hay que navegar
+    from playwright.sync_api import sync_playwright
+
+    with BROWSER_SLOTS, profile_slot(MAX_BROWSERS) as profile_path:
+        with sync_playwright() as p:
+            if profile_path:
+                context = launch_profile(p, profile_path)
+                browser = None
+            else:
+                browser = p.chromium.launch(headless=True)
+                context = browser.new_context()
+            try:
+                apply_shared_state(context, load_shared_state())
+                page = context.pages[0] if context.pages else context.new_page()
+                page.set_default_timeout(default_timeout)
+                yield page
+            finally:
+                context.close()
+                if browser:
+                    browser.close()
+
+def launch_profile(p, profile_path: str):
+    """Contexto persistente; si el perfil está corrupto se regenera una vez"""
+    try:
+        return p.chromium.launch_persistent_context(profile_path, headless=True)
+    except Exception as e:
+        logger.warning(f"⚠️  Perfil de navegador inservible ({e}), se regenera")
+        reset_slot(profile_path)
+        return p.chromium.launch_persistent_context(profile_path, headless=True)
+
+def resilient_goto(page, url: str, endpoint: str, **kwargs):
+    """
+    page.goto con turno en la cola del host (ritmo, concurrencia y
+    prioridad), timeout adaptativo, deadline y circuit breaker. Un 429/503
+    pausa el host y se reintenta en vez de parsear una página vacía.
+    """
+    for attempt in range(THROTTLE_RETRIES + 1):
+        try:
+            with fetch_slot(url) as scheduler, guarded_call(endpoint) as budget:
+                response = page.goto(url, timeout=budget * 1000, **kwargs)
+                status = response.status if response else 200
+                retry_after = retry_after_seconds(response.headers.get("retry-after")) if response else None
+                if scheduler.report(status, retry_after):
+                    raise ThrottledError(f"{url} respondió {status}")
+                return response
+        except ThrottledError:
+            if attempt == THROTTLE_RETRIES:
+                raise
+
+def accept_cookies(page, timeout: int):
+    """Cierra el banner de OneTrust si aparece (no aparece si ya hay consentimiento)"""
+    if has_consent(page.context):
+        return
+    try:
+        page.click("#onetrust-accept-btn-handler", timeout=timeout)
+        wait_or_cancel(1)
+        # El resto de huecos y navegadores arrancan ya con el consentimiento
+        save_shared_state(page.context)
+    except Exception:
+        logger.debug("Sin banner de cookies")
+
 def web_search_agent(title: str):
     """
     Agente que busca en TMDB - Recibe SOLO el título ya extraído
     """
     logger.info(f"🎯 Buscando: '{title}'")
     
+    cache_key = normalize_text(title)
+    cached = TMDB_CACHE.get(cache_key)
+    if cached:
+        logger.info(f"⚡ Evidencia de TMDB servida desde caché: {cached['title']}")
+        return dict(cached)
+
+    # Catálogo local (ingesta en lote): los títulos catalogados no tocan la red
+    if EVIDENCE_MODE != "online":
+        # En offline_first una ficha caducada se vuelve a scrapear
+        max_age = EVIDENCE_MAX_AGE if EVIDENCE_MODE == "offline_first" else None
+        stored = get_evidence_store().lookup(title, max_age=max_age)
+        if stored:
+            logger.info(f"📚 Evidencia servida desde el catálogo local: {stored['title']}")
+            TMDB_CACHE.set(cache_key, stored)
+            return dict(stored)
+        if EVIDENCE_MODE == "offline":
+            logger.warning(f"❌ '{title}' no está en el catálogo local (modo offline)")
+            return {
+                "title": title,
+                "year": "No disponible",
+                "genres": [],
+                "director": "No disponible",
+                "summary": f"'{title}' no está en el catálogo local.",
+                "rating": "No disponible",
+                "cast": []
+            }
+    
     # Buscar directamente en TMDB
     media_id, media_type, corrected_title = search_tmdb_inteligente(title)
     
@@ -37,17 +157,12 @@ def web_search_agent(title: str):
         
         # CONVERTIR AL FORMATO ESPERADO POR EL REPORTER
         if "error" not in result:
-            formatted_result = {
-                "title": result.get("title", corrected_title or title),
-                "year": result.get("year", "No disponible"),
-                "genres": result.get("genres", []),
-                "director": result.get("director") or result.get("creator", "No disponible"),
-                "summary": result.get("overview", "No hay descripción disponible."),
-                "rating": f"{result.get('score', 'N/A')}%" if result.get('score') else "No disponible",
-                "cast": result.get("cast", [])
-            }
+            formatted_result = format_evidence(result, media_id, media_type, corrected_title or title)
             logger.info(f"✅ Información formateada: {formatted_result['title']} ({formatted_result['year']})")
             logger.info(f"✅ Cast obtenido: {len(formatted_result['cast'])} actores")
+            TMDB_CACHE.set(cache_key, formatted_result)
+            if EVIDENCE_MODE == "offline_first":
+                get_evidence_store().put(formatted_result, aliases=(title,))
             return formatted_result
         else:
             logger.warning(f"❌ Error en scraping: {result.get('error')}")
@@ -73,101 +188,74 @@ def web_search_agent(title: str):
             "cast": []
         }
 
+def format_evidence(result: dict, media_id, media_type, fallback_title: str) -> dict:
+    """Datos del scraping en el formato que esperan el reporter y el fact-checker"""
+    return {
+        "title": result.get("title") or fallback_title,
+        "year": result.get("year", "No disponible"),
+        "genres": result.get("genres", []),
+        "director": result.get("director") or result.get("creator") or "No disponible",
+        "summary": result.get("overview", "No hay descripción disponible."),
+        "rating": f"{result.get('score', 'N/A')}%" if result.get('score') else "No disponible",
+        "cast": result.get("cast", []),
+        "tmdb_id": media_id,
+        "media_type": media_type
+    }
+
 def search_tmdb_inteligente(search_terms: str):
     """
     Búsqueda INTELIGENTE en TMDB
     """
     search_url = f"https://www.themoviedb.org/search?query={search_terms.replace(' ', '+')}"
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.set_default_timeout(40000)
+    try:
+        # Si la búsqueda tarda más de lo habitual se lanza una duplicada
+        results_html = hedged_call("tmdb_search", fetch_search_html, search_url, search_terms)
+    except Exception as e:
+        logger.error(f"❌ Error en búsqueda: {e}")
+        return None, None, None
+    
+    # Buscar películas y series (parseo en el pool de procesos)
+    results = parse_document("search_results", results_html)
+    
+    if results:
+        # Seleccionar el PRIMER resultado (TMDB ya los ordena por relevancia)
+        best = results[0]
+        logger.info(f"✅ Resultado seleccionado: {best['title']} (ID: {best['id']}, Tipo: {best['type']})")
+        return best["id"], best["type"], best["title"]
+    
+    logger.warning("❌ No se encontraron resultados en TMDB")
+    return None, None, None
+
+def fetch_search_html(cancelled, search_url: str, search_terms: str):
+    """Carga la página de resultados de búsqueda y devuelve su HTML"""
+    with open_tmdb_page(40000) as page:
+        logger.info(f"🔍 Búsqueda para: '{search_terms}'")
+        resilient_goto(page, search_url, "tmdb_search", wait_until="domcontentloaded")
+        if cancelled.is_set():
+            return ""
+        wait_or_cancel(3)
         
-        try:
-            logger.info(f"🔍 Búsqueda para: '{search_terms}'")
-            page.goto(search_url, timeout=50000, wait_until="domcontentloaded")
-            time.sleep(3)
-            
-            # Aceptar cookies
-            try:
-                page.click("#onetrust-accept-btn-handler", timeout=2000)
-                time.sleep(1)
-            except:
-                pass
-            
-            # Obtener HTML de resultados
-            results_html = page.content()
-            browser.close()
-            
-            # Buscar películas y series
-            results = []
-            
-            # Patrón para películas
-            movie_pattern = r'href="/movie/(\d+)-[^"]*".*?<h2[^>]*>(.*?)</h2>'
-            movie_matches = re.findall(movie_pattern, results_html, re.DOTALL)
-            
-            for tmdb_id, title_html in movie_matches:
-                title = re.sub(r'<.*?>', '', title_html).strip()
-                if title:
-                    results.append({
-                        "id": int(tmdb_id),
-                        "title": title,
-                        "type": "movie"
-                    })
-            
-            # Patrón para series
-            tv_pattern = r'href="/tv/(\d+)-[^"]*".*?<h2[^>]*>(.*?)</h2>'
-            tv_matches = re.findall(tv_pattern, results_html, re.DOTALL)
-            
-            for tmdb_id, title_html in tv_matches:
-                title = re.sub(r'<.*?>', '', title_html).strip()
-                if title:
-                    results.append({
-                        "id": int(tmdb_id),
-                        "title": title,
-                        "type": "tv"
-                    })
-            
-            if results:
-                # Seleccionar el PRIMER resultado (TMDB ya los ordena por relevancia)
-                best = results[0]
-                logger.info(f"✅ Resultado seleccionado: {best['title']} (ID: {best['id']}, Tipo: {best['type']})")
-                return best["id"], best["type"], best["title"]
-            
-            logger.warning("❌ No se encontraron resultados en TMDB")
-            return None, None, None
-            
-        except Exception as e:
-            logger.error(f"❌ Error en búsqueda: {e}")
-            try:
-                browser.close()
-            except:
-                pass
-            return None, None, None
+        # Aceptar cookies
+        accept_cookies(page, 2000)
+        
+        # Obtener HTML de resultados
+        return page.content()
 
 def scrape_tmdb_with_cast(media_id, media_type):
     """Scraping con extracción de cast GARANTIZADA"""
     url = f"https://www.themoviedb.org/{media_type}/{media_id}"
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.set_default_timeout(60000)  # Más tiempo
-        
-        try:
+    try:
+        with open_tmdb_page(60000) as page:  # Más tiempo
             logger.info(f"🎬 Scraping {media_type} ID: {media_id}")
             
             # Navegar a la página principal
-            page.goto(url, timeout=60000, wait_until="networkidle")
-            time.sleep(3)
+            resilient_goto(page, url, "tmdb_page", wait_until="networkidle")
+            wait_or_cancel(3)
             
             # Aceptar cookies
-            try:
-                page.click("#onetrust-accept-btn-handler", timeout=3000)
-                time.sleep(1)
-            except:
-                pass
+            accept_cookies(page, 3000)
             
             # EXTRAER DATOS BÁSICOS
             basic_data = page.evaluate("""
@@ -210,7 +298,23 @@ def scrape_tmdb_with_cast(media_id, media_type):
                     if (scoreEl) {
                         result.score = scoreEl.getAttribute('data-percent') || scoreEl.textContent;
                     }
-                    
+
+                    // Director (películas) o creador (series): equipo destacado de la ficha
+                    const directors = [];
+                    const creators = [];
+                    document.querySelectorAll('ol.people li.profile').forEach(li => {
+                        const nameEl = li.querySelector('p a') || li.querySelector('a');
+                        const jobEl = li.querySelector('p.character');
+                        if (!nameEl || !jobEl) return;
+                        const name = nameEl.textContent.trim();
+                        const jobs = jobEl.textContent.split(',').map(job => job.trim().toLowerCase());
+                        if (!name) return;
+                        if (jobs.some(job => job === 'director' || job === 'directora')) directors.push(name);
+                        if (jobs.some(job => job === 'creator' || job === 'creador' || job === 'creadora')) creators.push(name);
+                    });
+                    if (directors.length) result.director = directors.join(', ');
+                    if (creators.length) result.creator = creators.join(', ');
+
                     return result;
                 }
             """)
@@ -220,51 +324,92 @@ def scrape_tmdb_with_cast(media_id, media_type):
             cast_data = extract_cast_guaranteed(page, media_id, media_type)
             basic_data["cast"] = cast_data
             
-            browser.close()
             return basic_data
             
-        except Exception as e:
-            logger.error(f"❌ Error en scraping: {e}")
-            try:
-                browser.close()
-            except:
-                pass
-            return {"error": f"Error: {str(e)}"}
+    except Exception as e:
+        logger.error(f"❌ Error en scraping: {e}")
+        return {"error": f"Error: {str(e)}"}
 
 def extract_cast_guaranteed(page, media_id, media_type):
     """
-    Extrae el cast usando MÚLTIPLES métodos hasta conseguirlo
+    Extrae el cast probando estrategias (primero la que funcionó antes
+    para este título o esta maquetación) y valida cada lista candidata:
+    se queda con la primera fiable o, si no, con la mejor aceptable.
     """
-    cast_methods = [
-        extract_cast_method_1,  # Página principal
-        extract_cast_method_2,  # Página de cast
-        extract_cast_method_3,  # API oculta
-        extract_cast_method_4   # Scraping directo
-    ]
-    
-    cast = []
-    
-    for i, method in enumerate(cast_methods, 1):
+    title_key = f"{media_type}/{media_id}"
+    layout = page_layout(page, media_type)
+    best = {"score": 0.0, "names": [], "linked": 0.0, "strategy": None}
+
+    for name in strategy_order(title_key, layout, DEFAULT_CAST_ORDER):
+        where, method = CAST_STRATEGIES[name]
         try:
-            logger.info(f"🎭 Intentando método {i} para cast...")
-            method_cast = method(page, media_id, media_type)
-            
-            if method_cast and len(method_cast) >= 3:
-                logger.info(f"✅ Método {i} exitoso: {len(method_cast)} actores")
-                cast = method_cast
-                break
-            else:
-                logger.info(f"⚠️  Método {i} encontró {len(method_cast) if method_cast else 0} actores")
-                
+            logger.info(f"🎭 Intentando estrategia '{name}' para cast...")
+            open_media_page(page, media_id, media_type, where)
+            result = score_cast(method(page, media_id, media_type), page_signals(page))
         except Exception as e:
-            logger.warning(f"⚠️  Método {i} falló: {e}")
-    
-    # Si no se encontró cast, intentar método de emergencia
-    if not cast:
-        logger.info("🚨 Usando método de emergencia para cast...")
-        cast = extract_cast_emergency(page)
-    
-    return cast[:15]  # Máximo 15 actores
+            logger.warning(f"⚠️  Estrategia '{name}' falló: {e}")
+            continue
+
+        logger.info(f"🎭 '{name}': {len(result['names'])} actores, calidad {result['score']:.2f}")
+        if result["score"] > best["score"]:
+            best = dict(result, strategy=name)
+        if result["score"] >= ACCEPT_SCORE and len(result["names"]) >= 3:
+            break
+
+    if best["score"] < MIN_SCORE:
+        logger.warning(f"❌ Ningún cast fiable para {title_key} (mejor calidad {best['score']:.2f})")
+        forget_strategy(title_key)
+        return []
+
+    logger.info(f"✅ Cast de '{best['strategy']}' aceptado: {len(best['names'])} actores")
+    remember_strategy(title_key, layout, best["strategy"])
+    learn_names(best)
+    return best["names"][:15]  # Máximo 15 actores
+
+def open_media_page(page, media_id, media_type, where: str):
+    """Navega a la ficha ("main") o a la página de reparto ("cast") si no se está ya en ella"""
+    suffix = "/cast" if where == "cast" else ""
+    if re.search(rf"/{media_type}/{media_id}(?:-[^/?#]*)?{suffix}/?(?:[?#]|$)", page.url or ""):
+        return
+    url = f"https://www.themoviedb.org/{media_type}/{media_id}{suffix}"
+    resilient_goto(page, url, "tmdb_cast_page" if suffix else "tmdb_page", wait_until="networkidle")
+    wait_or_cancel(2)
+
+def page_layout(page, media_type) -> str:
+    """Firma de la maquetación de la ficha: qué bloques conocidos tiene"""
+    try:
+        flags = page.evaluate("""
+            () => [
+                'section.top_billed, .top_billed',
+                'ol.people',
+                '.panel',
+                'script[type="application/ld+json"]',
+                'a[href*="/person/"]',
+                '[data-cy="cast-person-name"]'
+            ].map(selector => document.querySelector(selector) ? '1' : '0').join('')
+        """)
+    except Exception:
+        flags = "?"
+    return f"{media_type}:{flags}"
+
+def page_signals(page) -> dict:
+    """Nombres enlazados a /person/ y los que tienen personaje en su tarjeta"""
+    try:
+        return page.evaluate("""
+            () => {
+                const links = [...document.querySelectorAll('a[href*="/person/"]')];
+                const text = a => a.textContent.trim();
+                return {
+                    linked: links.map(text).filter(Boolean),
+                    with_character: links.filter(a => {
+                        const card = a.closest('li, .card, .profile');
+                        return card && card.querySelector('.character, [class*="character"]');
+                    }).map(text).filter(Boolean)
+                };
+            }
+        """)
+    except Exception:
+        return {}
 
 def extract_cast_method_1(page, media_id, media_type):
     """Método 1: Extraer de la página principal"""
@@ -299,21 +444,16 @@ def extract_cast_method_1(page, media_id, media_type):
         if cast_section:
             return cast_section
             
-    except:
-        pass
+    except Exception as e:
+        logger.warning(f"⚠️  Método 1 falló: {e}")
     
     return []
 
 def extract_cast_method_2(page, media_id, media_type):
-    """Método 2: Ir a la página específica de cast"""
+    """Método 2: Tarjetas de la página específica de cast (ya abierta)"""
     cast = []
     
     try:
-        # Navegar a la página de cast
-        cast_url = f"https://www.themoviedb.org/{media_type}/{media_id}/cast"
-        page.goto(cast_url, timeout=30000, wait_until="networkidle")
-        time.sleep(2)
-        
         # Extraer nombres del cast
         cast_data = page.evaluate("""
             () => {
@@ -381,55 +521,19 @@ def extract_cast_method_2(page, media_id, media_type):
 
 def extract_cast_method_3(page, media_id, media_type):
     """Método 3: Buscar en el HTML completo"""
-    cast = []
-    
     try:
-        # Obtener todo el HTML
-        html_content = page.content()
-        
-        # Buscar nombres usando regex
-        name_patterns = [
-            r'alt="([^"]*)"[^>]*class="profile"',
-            r'<a[^>]*href="/person/[^>]*>([^<]+)</a>',
-            r'<p class="name">[^<]*<a[^>]*>([^<]+)</a>',
-            r'data-cy="cast-person-name"[^>]*>([^<]+)<'
-        ]
-        
-        for pattern in name_patterns:
-            matches = re.findall(pattern, html_content)
-            for match in matches:
-                name = match.strip()
-                if (name and len(name) > 2 and name not in cast and
-                    ' ' in name and not any(bad in name.lower() for bad in 
-                    ["character", "order", "loading", "image", "avatar"])):
-                    cast.append(name)
+        # Obtener todo el HTML y buscar nombres con regex fuera del hilo
+        return parse_document("cast_html", page.content())
         
-        # Filtrar nombres que parezcan reales
-        filtered_cast = []
-        for name in cast:
-            # Un nombre real generalmente tiene espacio y longitud razonable
-            if (2 <= len(name.split()) <= 3 and 
-                4 <= len(name) <= 40 and
-                not any(char.isdigit() for char in name)):
-                filtered_cast.append(name)
-        
-        return filtered_cast
-        
-    except:
+    except Exception as e:
+        logger.warning(f"⚠️  Método 3 falló: {e}")
         return []
 
 def extract_cast_method_4(page, media_id, media_type):
-    """Método 4: Usar la API interna de TMDB"""
+    """Método 4: Datos estructurados (ld+json) de la página de cast"""
     cast = []
     
     try:
-        # TMDB tiene una API interna que podemos intentar usar
-        api_url = f"https://www.themoviedb.org/{media_type}/{media_id}/cast"
-        
-        # Hacer una solicitud directa a la API
-        page.goto(api_url, timeout=30000)
-        time.sleep(2)
-        
         # Intentar extraer datos estructurados
         api_data = page.evaluate("""
             () => {
@@ -459,40 +563,28 @@ def extract_cast_method_4(page, media_id, media_type):
         if api_data and len(api_data) > 0:
             return api_data
             
-    except:
-        pass
+    except Exception as e:
+        logger.warning(f"⚠️  Método 4 falló: {e}")
     
     return []
 
 def extract_cast_emergency(page):
     """Método de emergencia: extraer todo el texto visible"""
-    cast = []
-    
     try:
-        # Obtener todo el texto visible
+        # Obtener todo el texto visible y filtrar líneas que parezcan nombres
         visible_text = page.locator("body").inner_text()
-        
-        # Dividir en líneas
-        lines = visible_text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            # Buscar líneas que parezcan nombres de actores
-            # Reglas: tiene espacio, empieza con mayúscula, longitud razonable
-            if (len(line) > 3 and len(line) < 40 and
-                ' ' in line and
-                line[0].isupper() and
-                not any(bad in line.lower() for bad in 
-                       ["character", "order", "as ", "plays", "director", "writer", "producer"]) and
-                not line.endswith(':') and
-                not line.startswith('Season') and
-                not line.startswith('Episode') and
-                line not in cast):
-                cast.append(line)
-        
-        # Limitar a los primeros 10
-        return cast[:10]
+        return parse_document("cast_text", visible_text)
         
     except Exception as e:
         logger.error(f"❌ Error en método emergencia: {e}")
-        return []
\ No newline at end of file
+        return []
+
+# Estrategias de extracción de cast y la página en la que trabajan
+CAST_STRATEGIES = {
+    "main_top_billed": ("main", extract_cast_method_1),
+    "cast_page_cards": ("cast", extract_cast_method_2),
+    "cast_page_html": ("cast", extract_cast_method_3),
+    "cast_page_ld_json": ("cast", extract_cast_method_4),
+    "emergency_text": ("cast", lambda page, media_id, media_type: extract_cast_emergency(page)),
+}
+DEFAULT_CAST_ORDER = list(CAST_STRATEGIES)
@@ -1,9 +1,13 @@
 import anyio
+import contextvars
 from agents.web_search import web_search_agent
+from agents.resilience import query_thread
 
 async def web_search_agent_async(title: str):
     """
     Ejecuta el web_search_agent SINCRÓNICO dentro de un hilo,
     para que pueda usarse en FastAPI.
     """
-    return await anyio.to_thread.run_sync(web_search_agent, title)
+    # Copiar el contexto para que el hilo vea el deadline de la consulta
+    context = contextvars.copy_context()
+    return await anyio.to_thread.run_sync(context.run, query_thread(web_search_agent), title)
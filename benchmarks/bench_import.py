@@ -0,0 +1,65 @@
+# benchmarks/bench_import.py
+#
+# Mide el tiempo de importación en frío de los puntos de entrada, en un
+# proceso nuevo por repetición, y muestra los módulos más costosos.
+#
+#   python benchmarks/bench_import.py [repeticiones]
+
+import os
+import sys
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "supervisor.coordinator",
+    "supervisor.cli",
+    "web.web_app",
+]
+
+HEAVY_MODULES = ["playwright", "requests", "numpy"]
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(module: str, n: int = 8) -> list:
+    """Módulos con mayor tiempo acumulado según -X importtime"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=ROOT_DIR, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        rows.append((int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:n]
+
+
+def loaded_heavy_modules(module: str) -> list:
+    code = f"import sys; import {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for target in TARGETS:
+        try:
+            times = [import_seconds(target) for _ in range(repetitions)]
+        except RuntimeError as e:
+            print(f"\n{target}: no se pudo importar ({e})")
+            continue
+
+        print(f"\n{target}")
+        print(f"  media: {statistics.mean(times) * 1000:.1f} ms   mín: {min(times) * 1000:.1f} ms")
+        print(f"  módulos pesados cargados: {', '.join(loaded_heavy_modules(target)) or 'ninguno'}")
+        for cumulative_us, name in top_imports(target):
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
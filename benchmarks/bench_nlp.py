@@ -0,0 +1,131 @@
+# benchmarks/bench_nlp.py
+#
+# Compara tokens por petición y latencia entre la interpretación antigua
+# (prompt largo + ai_understand_query de respaldo) y la nueva (una sola
+# llamada con JSON restringido). Requiere Ollama en localhost:11434.
+#
+#   python benchmarks/bench_nlp.py [repeticiones]
+
+import os
+import sys
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.llm_client import ollama_generate, extract_first_json
+from agents.text_utils import normalize_text
+from agents.nlp_agent import nlp_agent, INTERPRETATION_CACHE
+
+QUERIES = [
+    "cual es el cast de Avengers",
+    "busca información sobre The Matrix",
+    "¿es verdad que DiCaprio ganó el Oscar por Titanic?",
+    "analiza la película del payaso que persigue niños",
+    "¿quién dirigió Inception?",
+]
+
+LEGACY_PROMPT = """
+        Eres un asistente especializado en analizar consultas sobre películas, series y contenido multimedia.
+
+        ANALIZA esta consulta: "{query}"
+
+        Tu tarea es IDENTIFICAR EL TÍTULO PRINCIPAL mencionado en la consulta, incluso si la descripción es vaga.
+
+        Responde SOLO con un JSON válido con esta estructura:
+        {{
+            "intent": "search|analysis|fact_check|unknown",
+            "target_title": "título detectado o null",
+            "task": "descripción breve de la tarea",
+            "needs_web": true/false,
+            "needs_fact_check": true/false,
+            "query_purpose": "propósito de la consulta en una frase"
+        }}
+
+        Reglas importantes:
+        - "search": cuando piden buscar información general (incluye consultas sobre cast/reparto)
+        - "analysis": cuando piden analizar profundamente
+        - "fact_check": cuando piden verificar una afirmación
+        - "needs_web": true si requiere búsqueda web (casi siempre true)
+        - "needs_fact_check": true solo para verificaciones
+        - "target_title": SIEMPRE intenta extraer un título, incluso si es aproximado
+
+        Palabras clave para cast/reparto: "cast", "reparto", "actores", "elenco", "protagonistas"
+
+        Ejemplos:
+        - "cual es el cast de Avengers" → "intent": "search", "target_title": "Avengers"
+        - "reparto de The Matrix" → "intent": "search", "target_title": "The Matrix"
+        - "quienes actúan en Titanic" → "intent": "search", "target_title": "Titanic"
+        - "busca información sobre The Matrix" → "target_title": "The Matrix"
+        """
+
+LEGACY_FALLBACK_PROMPT = """
+    Analiza esta consulta sobre cine: "{query}"
+
+    Identifica:
+    1. ¿De qué película/serie habla? (título)
+    2. ¿Qué quiere saber el usuario?
+
+    Si la consulta es descriptiva ("payaso persigue niños"), sugiere el título más probable.
+
+    Responde en JSON:
+    {{
+        "target_title": "título sugerido o null",
+        "query_type": "search|fact_check|analysis",
+        "description": "qué busca el usuario"
+    }}
+    """
+
+
+def legacy_interpretation(query: str) -> dict:
+    """Reproduce el flujo anterior: prompt largo y segunda llamada si falla"""
+    totals = {"prompt_tokens": 0, "output_tokens": 0, "latency": 0.0, "calls": 0}
+
+    stats = {}
+    text = ollama_generate(LEGACY_PROMPT.format(query=query), timeout=180, stats=stats)
+    _accumulate(totals, stats)
+    parsed = extract_first_json(text) or {}
+
+    if parsed.get("intent") in (None, "unknown") or not parsed.get("target_title"):
+        stats = {}
+        ollama_generate(LEGACY_FALLBACK_PROMPT.format(query=query), timeout=10, stats=stats)
+        _accumulate(totals, stats)
+
+    return totals
+
+
+def structured_interpretation(query: str) -> dict:
+    totals = {"prompt_tokens": 0, "output_tokens": 0, "latency": 0.0, "calls": 0}
+    stats = {}
+    # Sin caché de interpretaciones: se mide siempre la llamada al LLM
+    INTERPRETATION_CACHE.delete(normalize_text(query))
+    nlp_agent(query, stats=stats)
+    _accumulate(totals, stats)
+    return totals
+
+
+def _accumulate(totals: dict, stats: dict):
+    totals["prompt_tokens"] += stats.get("prompt_tokens", 0)
+    totals["output_tokens"] += stats.get("output_tokens", 0)
+    totals["latency"] += stats.get("latency", 0.0)
+    totals["calls"] += 1
+
+
+def run(label: str, fn, repetitions: int):
+    rows = [fn(q) for _ in range(repetitions) for q in QUERIES]
+
+    print(f"\n{label}")
+    print(f"  llamadas/petición:  {statistics.mean(r['calls'] for r in rows):.2f}")
+    print(f"  tokens prompt:      {statistics.mean(r['prompt_tokens'] for r in rows):.1f}")
+    print(f"  tokens salida:      {statistics.mean(r['output_tokens'] for r in rows):.1f}")
+    print(f"  latencia media:     {statistics.mean(r['latency'] for r in rows):.3f}s")
+    print(f"  latencia máx:       {max(r['latency'] for r in rows):.3f}s")
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    # Calentar el modelo para no medir la carga inicial
+    ollama_generate("hola", timeout=180)
+
+    run("ANTES (prompt largo + ai_understand_query)", legacy_interpretation, repetitions)
+    run("DESPUÉS (JSON restringido, prompt de sistema fijo)", structured_interpretation, repetitions)
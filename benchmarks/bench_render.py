@@ -0,0 +1,66 @@
+# benchmarks/bench_render.py
+#
+# Rendimiento del renderizado de reportes en lote (exportaciones): reportes
+# por segundo en cada formato a partir de la misma evidencia. No necesita
+# Ollama ni navegador.
+#
+#   python benchmarks/bench_render.py [reportes]
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.renderer import FORMATS, render_report
+
+EVIDENCE = {
+    "title": "Titanic",
+    "year": "1997",
+    "genres": ["Drama", "Romance"],
+    "director": "James Cameron",
+    "rating": "79%",
+    "summary": "Un joven artista pobre y una joven aristócrata se enamoran a bordo del Titanic. " * 3,
+    "cast": ["Leonardo DiCaprio", "Kate Winslet", "Billy Zane", "Kathy Bates", "Frances Fisher", "Gloria Stuart"],
+}
+
+INTERPRETATION = {
+    "intent": "fact_check",
+    "target_title": "Titanic",
+    "target_titles": ["Titanic", "Avatar"],
+    "query_purpose": "Verificar quién protagoniza Titanic",
+}
+
+FACT_CHECK = {
+    "claim": "Leonardo DiCaprio actuó en Titanic",
+    "is_true": True,
+    "evidence": "✅ VERDADERO: Leonardo DiCaprio forma parte del reparto de Titanic.",
+    "confidence": "high",
+}
+
+COMPARISON = [EVIDENCE, dict(EVIDENCE, title="Avatar", year="2009")]
+
+
+def run(fmt: str, count: int, comparison: list = None):
+    started = time.perf_counter()
+    size = 0
+    for _ in range(count):
+        size += len(render_report(INTERPRETATION, EVIDENCE, FACT_CHECK, comparison, fmt=fmt))
+    elapsed = time.perf_counter() - started
+
+    label = f"{fmt}{' + comparación' if comparison else ''}"
+    print(f"  {label:<24} {count / elapsed:>10.0f} reportes/s   {elapsed / count * 1e6:>7.1f} µs/reporte   "
+          f"{size / count:>6.0f} bytes")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    # Calentar
+    for fmt in FORMATS:
+        run(fmt, 100)
+
+    print(f"\nRenderizado de {count} reportes")
+    for fmt in FORMATS:
+        run(fmt, count)
+        run(fmt, count, COMPARISON)
@@ -0,0 +1,284 @@
+# benchmarks/replay.py
+#
+# Reproduce una captura de tráfico real (FACTCHECK_CAPTURE_PATH, ver
+# supervisor/traffic_log.py) pasando cada consulta por run_query, con los
+# mismos intervalos entre consultas o acelerados. Por defecto Ollama y
+# TMDB se sustituyen por stubs locales que devuelven lo capturado con la
+# latencia observada, así que no necesita red ni modelo.
+#
+# Los ficheros de todos los procesos se mezclan ordenados por llegada:
+#
+#   python benchmarks/replay.py reports/capture/queries.*.jsonl* [--speed 10] [--live]
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_records(paths: list, limit: int = None) -> list:
+    """Registros con consulta, ordenados por momento de llegada"""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("query"):
+                    records.append(record)
+    records.sort(key=lambda r: r.get("ts", 0))
+    return records[:limit] if limit else records
+
+
+def percentile(values: list, p: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# --------------------------------------------------------------
+# STUBS DE OLLAMA Y TMDB
+# --------------------------------------------------------------
+
+class Stubs:
+    """
+    Respuestas de Ollama y TMDB reconstruidas a partir de la captura.
+    La latencia de cada llamada es la mayor observada (la de la consulta
+    sin caché) multiplicada por latency_scale.
+    """
+
+    def __init__(self, records: list, latency_scale: float = 1.0):
+        from agents.text_utils import normalize_text
+
+        self.normalize = normalize_text
+        self.latency_scale = latency_scale
+        self.queries = {}
+        self.titles = {}
+        self.by_id = {}
+        self.verify_latency = 0.0
+
+        for record in records:
+            stages = record.get("stages") or {}
+            interpretation = record.get("interpretation")
+            nlp_ms = stages.get("interpretation", 0)
+            if interpretation and not interpretation.get("follow_up"):
+                key = normalize_text(record["query"])
+                previous = self.queries.get(key, (None, 0))
+                self.queries[key] = (interpretation, max(previous[1], nlp_ms))
+
+            evidence = [e for e in record.get("evidence") or [] if e]
+            lookup_ms = max(0, stages.get("comparison", stages.get("evidence", nlp_ms)) - nlp_ms)
+            for title, summary in zip((interpretation or {}).get("target_titles") or [], evidence):
+                key = normalize_text(title)
+                previous = self.titles.get(key, (None, 0))
+                self.titles[key] = (summary, max(previous[1], lookup_ms))
+                if summary.get("tmdb_id"):
+                    self.by_id[str(summary["tmdb_id"])] = summary
+
+            if "fact_check" in stages:
+                verify_ms = stages["fact_check"] - stages.get("evidence", nlp_ms)
+                self.verify_latency = max(self.verify_latency, verify_ms / 1000)
+
+    def sleep(self, seconds: float):
+        from agents.resilience import wait_or_cancel
+        wait_or_cancel(seconds * self.latency_scale)
+
+    def ollama_generate(self, prompt: str, timeout: int = 60, stop_when=None, stats: dict = None, **kwargs):
+        match = re.match(r'Consulta: "(.*)"$', prompt, re.DOTALL)
+        if not match:
+            # Verificación con IA: sin veredicto propio en la captura
+            self.sleep(self.verify_latency)
+            return "INCONCLUSO: respuesta simulada en la reproducción."
+
+        interpretation, ms = self.queries.get(self.normalize(match.group(1)), (None, 0))
+        self.sleep(ms / 1000)
+        if interpretation is None:
+            return ""  # sin JSON: el NLP usa las reglas
+        titles = interpretation.get("target_titles") or []
+        return json.dumps(dict(interpretation, target_title=titles[0] if titles else None))
+
+    def search_tmdb(self, search_terms: str):
+        summary, ms = self.titles.get(self.normalize(search_terms), (None, 0))
+        self.sleep(ms / 1000)
+        if not summary or not summary.get("tmdb_id"):
+            return None, None, None
+        return summary["tmdb_id"], summary.get("media_type") or "movie", summary.get("title")
+
+    def scrape_tmdb(self, media_id, media_type):
+        summary = self.by_id.get(str(media_id)) or {}
+        return {
+            "title": summary.get("title") or str(media_id),
+            "year": summary.get("year") or "No disponible",
+            "genres": [],
+            "director": "No disponible",
+            "overview": "Resumen simulado en la reproducción.",
+            "score": None,
+            "cast": [f"Actor {i + 1}" for i in range(summary.get("cast") or 0)]
+        }
+
+    def install(self):
+        import agents.nlp_agent
+        import agents.fact_checker
+        import agents.web_search
+        import agents.person_search
+        import agents.tv_seasons
+
+        agents.nlp_agent.ollama_generate = self.ollama_generate
+        agents.fact_checker.ollama_generate = self.ollama_generate
+        agents.web_search.search_tmdb_inteligente = self.search_tmdb
+        agents.web_search.scrape_tmdb_with_cast = self.scrape_tmdb
+        agents.person_search.search_tmdb_person = lambda name: (None, None)
+        agents.tv_seasons.fetch_page_html = lambda url: ""
+
+
+# --------------------------------------------------------------
+# REPRODUCCIÓN
+# --------------------------------------------------------------
+
+async def replay(records: list, speed: float, concurrency: int) -> list:
+    """
+    Las consultas de una misma sesión se reproducen en orden, una tras
+    otra (las de seguimiento dependen de la anterior); solo sesiones
+    distintas, o consultas sin sesión, van en paralelo.
+    """
+    from supervisor.coordinator import run_query
+    from agents.resilience import QueryCancelled
+
+    semaphore = asyncio.Semaphore(concurrency)
+    first_ts = records[0].get("ts", 0) if records else 0
+    started = time.monotonic()
+    results = [None] * len(records)
+
+    sessions = {}
+    for index, record in enumerate(records):
+        key = record.get("session_id") or f"sin-sesion-{index}"
+        sessions.setdefault(key, []).append(index)
+
+    async def one(record):
+        if speed > 0:
+            offset = (record.get("ts", first_ts) - first_ts) / speed
+            await asyncio.sleep(max(0, offset - (time.monotonic() - started)))
+
+        async with semaphore:
+            session_id = f"replay-{record['session_id']}" if record.get("session_id") else None
+            began = time.monotonic()
+            try:
+                await run_query(record["query"], session_id=session_id)
+                outcome = "ok"
+            except (asyncio.CancelledError, QueryCancelled):
+                outcome = "cancelled"
+            except Exception:
+                outcome = "error"
+            return {"outcome": outcome, "latency_ms": (time.monotonic() - began) * 1000}
+
+    async def session(indexes):
+        for index in indexes:
+            results[index] = await one(records[index])
+
+    await asyncio.gather(*(session(indexes) for indexes in sessions.values()))
+    return results
+
+
+def cache_counters() -> dict:
+    from agents.cache import CACHES
+    return {name: (cache.hits, cache.misses) for name, cache in CACHES.items()}
+
+
+def summarize(records: list, results: list, before: dict, after: dict, elapsed: float) -> dict:
+    outcomes = {}
+    for result in results:
+        outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+
+    replayed = [r["latency_ms"] for r in results if r["outcome"] == "ok"]
+    original = [r["latency_ms"] for r in records if r.get("outcome") == "ok" and "latency_ms" in r]
+
+    caches = {}
+    for name, (hits, misses) in after.items():
+        old_hits, old_misses = before.get(name, (0, 0))
+        lookups = (hits - old_hits) + (misses - old_misses)
+        if lookups:
+            caches[name] = {"lookups": lookups, "hit_rate": round((hits - old_hits) / lookups, 3)}
+
+    return {
+        "queries": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "outcomes": outcomes,
+        "error_rate": round(outcomes.get("error", 0) / len(results), 3) if results else 0.0,
+        "latency_ms": {f"p{p}": percentile(replayed, p) for p in PERCENTILES} | {"max": max(replayed, default=None)},
+        "original_latency_ms": {f"p{p}": percentile(original, p) for p in PERCENTILES},
+        "caches": caches
+    }
+
+
+def print_summary(summary: dict, label: str):
+    print(f"\n{label}: {summary['queries']} consultas en {summary['elapsed_s']}s")
+    print(f"  resultados:  {summary['outcomes']}   tasa de error: {summary['error_rate']:.1%}")
+
+    def row(name, values):
+        cells = "  ".join(f"{k}={v:>8.1f}" if v is not None else f"{k}=       -" for k, v in values.items())
+        print(f"  {name:<11}  {cells}")
+
+    print("  latencia (ms)")
+    row("reproducida", summary["latency_ms"])
+    row("original", summary["original_latency_ms"])
+
+    print("  cachés")
+    for name, stats in sorted(summary["caches"].items()):
+        print(f"    {name:<20} {stats['hit_rate']:>6.1%} aciertos de {stats['lookups']} consultas")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una captura de consultas del chat")
+    parser.add_argument("paths", nargs="+", help="ficheros JSONL de captura (incluidos los rotados)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="factor de aceleración de los intervalos originales (0 = sin esperas)")
+    parser.add_argument("--concurrency", type=int, default=8, help="consultas simultáneas como máximo")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplica la latencia de los stubs")
+    parser.add_argument("--limit", type=int, help="reproducir solo las primeras N consultas")
+    parser.add_argument("--live", action="store_true", help="usar Ollama y TMDB reales en vez de stubs")
+    parser.add_argument("--json", help="guardar el resumen en este fichero")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(levelname)s:%(name)s:%(message)s')
+
+    records = load_records(args.paths, args.limit)
+    if not records:
+        print("❌ La captura no contiene consultas")
+        raise SystemExit(1)
+
+    if not args.live:
+        # Cachés, reportes y catálogo aislados: ni se leen datos reales ni se ensucia el archivo
+        scratch = tempfile.mkdtemp()
+        os.environ["FACTCHECK_CACHE_BACKEND"] = "memory"
+        os.environ["FACTCHECK_REPORTS_PATH"] = os.path.join(scratch, "reports.sqlite3")
+        os.environ["FACTCHECK_EVIDENCE_PATH"] = os.path.join(scratch, "evidence.sqlite3")
+        Stubs(records, args.latency_scale).install()
+
+    before = cache_counters()
+    started = time.monotonic()
+    results = asyncio.run(replay(records, args.speed, max(1, args.concurrency)))
+    summary = summarize(records, results, before, cache_counters(), time.monotonic() - started)
+
+    print_summary(summary, f"Reproducción {'real' if args.live else 'con stubs'} a velocidad x{args.speed:g}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# supervisor/__main__.py
+
+from supervisor.cli import main
+
+main()
@@ -0,0 +1,44 @@
+# supervisor/cli.py
+#
+#   python -m supervisor "¿quién dirigió Titanic?"
+
+import argparse
+import asyncio
+import logging
+
+from supervisor.coordinator import run_query
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fact Checker de cine y televisión")
+    parser.add_argument("query", nargs="*", help="consulta en lenguaje natural")
+    parser.add_argument("--profile", action="store_true",
+                        help="perfilar la consulta y guardar el perfil en reports/profiles")
+    args = parser.parse_args(argv)
+
+    query = " ".join(args.query)
+    if not query:
+        print("❌ Por favor proporciona una consulta")
+        raise SystemExit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+
+    if not args.profile:
+        print(asyncio.run(run_query(query)))
+        return
+
+    from supervisor.profiling import PROFILES_DIR, profiled_query
+
+    response, profile = asyncio.run(profiled_query(query))
+    print(response)
+    print(f"\n🔬 Perfil {profile['id']} ({profile['duration']}s, {profile['samples']} muestras)")
+    for category, seconds in profile["categories"].items():
+        print(f"  {category:<12} {seconds:>8.3f}s")
+    print("  funciones con más tiempo propio:")
+    for row in profile["top"][:10]:
+        print(f"  {row['seconds']:>8.3f}s  {row['frame']}")
+    print(f"  {PROFILES_DIR}/{profile['id']}.json (+ .folded para flamegraph.pl/speedscope)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# supervisor/conversation.py
+
+import logging
+import re
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("conversation")
+
+# Estado por sesión: último título resuelto y su evidencia. Acotado en
+# número de sesiones (LRU) y con caducidad por inactividad.
+SESSIONS = make_cache("sessions", maxsize=1000, ttl=30 * 60)
+
+# Pregunta sobre un atributo → tarea del NLP
+FOLLOW_UP_TASKS = [
+    ("get_director", ["dirigio", "dirigida", "director", "directed"]),
+    ("get_cast", ["actua", "actores", "reparto", "elenco", "protagoni", "cast"]),
+    ("get_year", ["que ano", "cuando se estreno", "cuando salio", "de que ano", "year"]),
+    ("get_genres", ["genero", "que tipo de"]),
+    ("get_summary", ["de que trata", "sinopsis", "trama", "argumento"]),
+    ("get_rating", ["puntuacion", "nota", "rating", "valoracion"]),
+]
+
+# Marcas de que la pregunta se refiere a lo anterior
+REFERENCE_PATTERNS = [
+    r"^y\b",
+    r"\b(?:la|lo|los|las)\s+(?:dirigio|protagoniza|protagonizo|hizo|escribio)\b",
+    r"\b(?:esa|esta|dicha)\s+(?:pelicula|serie|peli)\b",
+    r"\b(?:en|de)\s+(?:ella|esa|esta)\b",
+    r"\bsu\s+(?:director|reparto|elenco|genero|sinopsis|trama|puntuacion|nota)\b",
+]
+
+MAX_FOLLOW_UP_WORDS = 7
+
+# Preguntas formadas solo por estas palabras ("¿de qué año es?") no
+# nombran ningún título, así que también se refieren a lo anterior
+QUESTION_WORDS = {
+    "y", "de", "que", "es", "el", "la", "su", "cual", "quien", "quienes", "cuando",
+    "se", "tiene", "era", "fue", "sale", "salen", "en", "ano", "estreno", "salio",
+    "tipo", "sobre", "trata", "dirigio", "director", "reparto", "actores", "actua",
+    "elenco", "genero", "generos", "sinopsis", "trama", "argumento", "nota",
+    "puntuacion", "valoracion", "rating", "cast"
+}
+
+
+def get_session(session_id: str):
+    if not session_id:
+        return None
+    state = SESSIONS.get(session_id)
+    return dict(state) if state else None
+
+
+def save_session(session_id: str, title: str, evidence: dict):
+    """Recuerda el último título resuelto (solo si se encontró)"""
+    if not session_id or not evidence or "error" in evidence or not evidence.get("tmdb_id"):
+        return
+    SESSIONS.set(session_id, {"title": title, "evidence": evidence})
+
+
+def follow_up_task(query: str):
+    """Tarea pedida por una pregunta de seguimiento, o None"""
+    q = normalize_text(query).strip(" ¿?¡!.")
+    for task, words in FOLLOW_UP_TASKS:
+        if any(word in q for word in words):
+            return task
+    return None
+
+
+def names_title(query: str) -> bool:
+    """
+    La consulta trae palabras que no son de pregunta ni de referencia:
+    "¿Y la nota de Avatar?" nombra un título aunque empiece por "y".
+    """
+    q = normalize_text(query).strip(" ¿?¡!.")
+    for pattern in REFERENCE_PATTERNS:
+        q = re.sub(pattern, " ", q)
+    return any(word not in QUESTION_WORDS for word in re.findall(r"\w+", q))
+
+
+def follow_up_interpretation(query: str, state: dict):
+    """
+    Interpretación sin LLM para preguntas como "¿y quién la dirigió?":
+    cortas, sobre un atributo y sin ningún título. Devuelve None si la
+    consulta parece nueva o puede nombrar un título (decide el NLP).
+    """
+    if not state:
+        return None
+
+    q = normalize_text(query).strip(" ¿?¡!.")
+    task = follow_up_task(query)
+    if not task or len(q.split()) > MAX_FOLLOW_UP_WORDS:
+        return None
+    if names_title(query):
+        return None
+
+    title = state["title"]
+    logger.info(f"↩️  Pregunta de seguimiento sobre '{title}' ({task})")
+    return {
+        "intent": "search",
+        "target_title": title,
+        "target_titles": [title],
+        "comparison": False,
+        "task": task,
+        "needs_web": True,
+        "needs_fact_check": False,
+        "query_purpose": "Pregunta de seguimiento",
+        "follow_up": True
+    }
+
+
+def same_title(title: str, state: dict) -> bool:
+    if not state or not title:
+        return False
+    return normalize_text(title) in (normalize_text(state["title"]), normalize_text(state["evidence"].get("title", "")))
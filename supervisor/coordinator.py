@@ -1,43 +1,98 @@
 # supervisor/coordinator.py
 
 import logging
-import sys
-import os
-import requests
-import json
+import asyncio
 
-# Añadir el directorio raíz al path de Python
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.resilience import deadline_scope, cancel_scope, query_thread
 
-from agents.fact_checker import fact_checker_agent
-from agents.web_search import web_search_agent
-from agents.reporter import reporter_agent
-from agents.nlp_agent import nlp_agent
-from agents.web_search_async import web_search_agent_async
-
-logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+# Los agentes (Playwright, NumPy, cliente HTTP) se importan en la primera
+# consulta y no al importar este módulo: el arranque en frío es más rápido.
+# La configuración de logging la hace el punto de entrada (CLI o web).
 logger = logging.getLogger("coordinator")
 
-async def run_query(query: str):
+# Búsquedas simultáneas en consultas con varios títulos
+MAX_PARALLEL_LOOKUPS = 3
+
+def emit_stage(on_stage, stage: str, data):
+    """Notifica una etapa completada (resultados parciales) si hay callback"""
+    if on_stage is None:
+        return
+    try:
+        on_stage(stage, data)
+    except Exception as e:
+        logger.warning(f"⚠️  Error notificando etapa '{stage}': {e}")
+
+async def gather_evidence(titles: list, limit: int = MAX_PARALLEL_LOOKUPS) -> list:
+    """
+    Busca varios títulos a la vez (como mucho `limit` simultáneos): la
+    latencia total se acerca a la de la búsqueda más lenta, no a la suma.
+    """
+    from agents.web_search_async import web_search_agent_async
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def lookup(title):
+        async with semaphore:
+            logger.info(f"🌐 Buscando información para: '{title}'")
+            try:
+                return await web_search_agent_async(title)
+            except Exception as e:
+                logger.error(f"❌ Error buscando '{title}': {e}")
+                return {"error": str(e)}
+
+    return await asyncio.gather(*(lookup(title) for title in titles))
+
+async def run_query(query: str, on_stage=None, cancel_event=None, session_id: str = None):
+    # Todo lo que cuelga de la consulta comparte un mismo tiempo máximo y
+    # un mismo evento de cancelación (lo ven también los hilos de trabajo)
+    with deadline_scope(), cancel_scope(cancel_event):
+        return await _run_query(query, on_stage, session_id)
+
+async def _run_query(query: str, on_stage=None, session_id: str = None):
+    from agents.nlp_agent import nlp_agent
+    from agents.web_search_async import web_search_agent_async
+    from agents.fact_checker import fact_checker_agent
+    from agents.reporter import reporter_agent
+    from agents.tv_seasons import season_question, answer_season_question
+    from agents.renderer import (
+        verdict, render_title_response, render_fact_check_response,
+        render_comparison_response, render_season_response, render_attribute_response
+    )
+    from supervisor.conversation import (
+        get_session, save_session, follow_up_interpretation, follow_up_task, same_title
+    )
+
     logger.info(f"🚀 Iniciando procesamiento para: '{query}'")
 
     # ---------------------------------------------------------
     # 1. INTERPRETACIÓN CON OLLAMA
     # ---------------------------------------------------------
-    logger.info("🔍 Analizando consulta con NLP...")
-    interpretation = nlp_agent(query)
-    
-    if interpretation.get("intent") == "unknown" or not interpretation.get("target_title"):
-        # Si el NLP no pudo entender, intentar con IA directamente
-        logger.info("🤖 Consultando IA para entender mejor la consulta...")
-        better_interpretation = ai_understand_query(query)
-        if better_interpretation:
-            interpretation.update(better_interpretation)
+    session = get_session(session_id)
+
+    # "¿Y quién la dirigió?" se resuelve con el estado de la sesión, sin LLM
+    interpretation = follow_up_interpretation(query, session)
+    if interpretation is None:
+        logger.info("🔍 Analizando consulta con NLP...")
+        # Las llamadas bloqueantes van a un hilo para no frenar el event loop
+        interpretation = await asyncio.to_thread(query_thread(nlp_agent), query)
+
+        task = follow_up_task(query)
+        if session and not interpretation.get("target_title") and task:
+            # El NLP no encontró título: se asume el de la conversación
+            logger.info(f"↩️  Sin título en la consulta, usando el de la sesión: '{session['title']}'")
+            interpretation.update(
+                target_title=session["title"], target_titles=[session["title"]],
+                intent="search", task=task, needs_web=True
+            )
     
     logger.info(f"✅ NLP detectó - Intención: {interpretation.get('intent')}, Título: {interpretation.get('target_title')}")
+    emit_stage(on_stage, "interpretation", interpretation)
 
     intent = interpretation.get("intent", "unknown")
+    titles = interpretation.get("target_titles") or []
     evidence = None
+    comparison = None
+    season_answer = None
     fact_result = None
 
     # ---------------------------------------------------------
@@ -50,9 +105,22 @@ async def run_query(query: str):
         if not title:
             logger.warning("❌ No se pudo determinar el título")
             return "No pude determinar de qué película o serie me hablas."
-        
-        logger.info(f"🌐 Buscando información para: '{title}'")
-        evidence = await web_search_agent_async(title)
+
+        if len(titles) > 1:
+            logger.info(f"🔀 Consulta con {len(titles)} títulos: {titles}")
+            comparison = await gather_evidence(titles)
+            emit_stage(on_stage, "comparison", comparison)
+            # El fact-check y el reporte principal usan el primer título
+            evidence = comparison[0]
+        elif same_title(title, session):
+            # Mismo título que la pregunta anterior: evidencia de la sesión
+            logger.info(f"♻️  Reutilizando evidencia de la sesión para '{title}'")
+            evidence = session["evidence"]
+            save_session(session_id, session["title"], evidence)
+        else:
+            logger.info(f"🌐 Buscando información para: '{title}'")
+            evidence = await web_search_agent_async(title)
+            save_session(session_id, title, evidence)
         
         if evidence and "error" not in evidence:
             logger.info(f"✅ Información encontrada: {evidence.get('title', 'N/A')} ({evidence.get('year', 'N/A')})")
@@ -60,29 +128,41 @@ async def run_query(query: str):
                 logger.info(f"🎭 Cast encontrado: {len(evidence['cast'])} actores")
         else:
             logger.warning("❌ No se encontró información en la búsqueda web")
+        emit_stage(on_stage, "evidence", evidence)
+
+        # Temporadas/episodios: solo se cargan las páginas que hacen falta
+        question = season_question(query)
+        if question and not comparison and evidence and "error" not in evidence:
+            season_answer = await asyncio.to_thread(query_thread(answer_season_question), evidence, question)
+            if season_answer:
+                emit_stage(on_stage, "seasons", season_answer)
 
     # ---------------------------------------------------------
     # 3. FACT-CHECK SI ES NECESARIO
     # ---------------------------------------------------------
     if interpretation.get("needs_fact_check") or intent == "fact_check":
         logger.info("🔍 Realizando verificación de hechos con IA...")
-        fact_result = fact_checker_agent(query, evidence)
+        fact_result = await asyncio.to_thread(query_thread(fact_checker_agent), query, evidence)
         
         if fact_result:
-            status = "VERDADERO" if fact_result.get("is_true") else "FALSO" if fact_result.get("is_true") is False else "INCONCLUSO"
-            logger.info(f"✅ Fact-check completado: {status}")
+            logger.info(f"✅ Fact-check completado: {verdict(fact_result.get('is_true'))[1]}")
+        emit_stage(on_stage, "fact_check", fact_result)
 
     # ---------------------------------------------------------
     # 4. GENERAR REPORTE
     # ---------------------------------------------------------
     logger.info("📊 Generando reporte...")
-    report = reporter_agent(
+    report = await asyncio.to_thread(
+        query_thread(reporter_agent),
         interpretation=interpretation,
         evidence=evidence,
-        fact_check=fact_result
+        fact_check=fact_result,
+        comparison=comparison,
+        query=query
     )
     
-    logger.info(f"💾 Reporte guardado: {report.get('filename', 'N/A')}")
+    logger.info(f"💾 Reporte guardado: {report.get('hash', 'N/A')[:12]}")
+    emit_stage(on_stage, "report", report)
 
     # ---------------------------------------------------------
     # 5. RESPUESTA FINAL - MEJORADA
@@ -93,162 +173,52 @@ async def run_query(query: str):
     query_lower = query.lower()
     is_cast_query = any(word in query_lower for word in ["cast", "reparto", "actores", "elenco", "protagonistas", "quién actúa", "quien actua"])
 
-    # ANALYSIS o CAST QUERY
-    if intent == "analysis" or is_cast_query:
-        genres = evidence.get("genres", []) if evidence else []
-        summary = evidence.get("summary", "No disponible") if evidence else "No disponible"
-        cast = evidence.get("cast", []) if evidence else []
-        year = evidence.get("year", "No disponible") if evidence else "No disponible"
-        title_display = evidence.get("title", title) if evidence else title
-        
-        # CONSULTA ESPECÍFICA DE CAST - RESPUESTA MEJORADA
-        if is_cast_query:
-            if cast:
-                cast_text = "\n".join([f"• {actor}" for actor in cast[:8]])
-                response = f"""
-🎬 **{title_display} ({year})**
-
-🎭 **Reparto Principal:**
-{cast_text}
-
-📖 **Sinopsis:**
-{summary}
-"""
-            else:
-                response = f"""
-🎬 **{title_display} ({year})**
-
-ℹ️ No se pudo obtener información del reparto.
-
-📖 **Sinopsis:**
-{summary}
-"""
-        else:
-            # ANÁLISIS GENERAL
-            cast_preview = "\n".join([f"• {actor}" for actor in cast[:3]]) if cast else "No disponible"
-            response = f"""
-📌 **Análisis sobre: {title}**
-
-🎬 *{title_display} ({year})*
-
-🔎 **Propósito:** {interpretation.get("query_purpose", "Consulta general")}  
-🎭 **Géneros:** {", ".join(genres) if genres else "No disponibles"}
+    # TEMPORADAS Y EPISODIOS DE UNA SERIE
+    if season_answer and intent != "fact_check":
+        response = render_season_response(season_answer, question)
+        logger.info("✅ Respuesta TEMPORADAS generada")
+        return response.strip()
 
-📖 **Resumen:** {summary}
+    # COMPARACIÓN ENTRE VARIOS TÍTULOS
+    if comparison and intent != "fact_check":
+        response = render_comparison_response(titles, comparison, interpretation.get("task"), is_cast_query)
+        logger.info("✅ Respuesta COMPARACIÓN generada")
+        return response.strip()
 
-👥 **Reparto (primeros 3):**
-{cast_preview}
-"""
+    # ANALYSIS o CAST QUERY
+    if intent == "analysis" or is_cast_query:
+        response = render_title_response("cast" if is_cast_query else "analysis", interpretation, evidence, title)
         logger.info("✅ Respuesta ANALYSIS/CAST generada")
         return response.strip()
 
+    # PREGUNTA DIRECTA SOBRE UN ATRIBUTO (director, año, géneros, nota)
+    if intent == "search" and not is_cast_query:
+        response = render_attribute_response(interpretation.get("task"), evidence, title)
+        if response:
+            logger.info("✅ Respuesta ATRIBUTO generada")
+            return response
+
     # SEARCH
     if intent == "search":
-        summary = evidence.get("summary", "No hay información disponible") if evidence else "No hay información disponible"
-        
-        # MEJORAR RESPUESTA PARA INCLUIR MÁS INFORMACIÓN
-        cast = evidence.get("cast", []) if evidence else []
-        year = evidence.get("year", "No disponible") if evidence else "No disponible"
-        genres = evidence.get("genres", []) if evidence else []
-        title_display = evidence.get("title", title) if evidence else title
-        
-        if cast:
-            # Si hay cast, mostrarlo en la respuesta
-            cast_text = "\n".join([f"• {actor}" for actor in cast[:6]])  # Primeros 6 actores
-            response = f"""
-**Información sobre {title_display} ({year})**
-
-**🎭 Géneros:** {", ".join(genres) if genres else "No disponibles"}
-
-**📖 Sinopsis:**
-{summary}
-
-**🎬 Reparto Principal:**
-{cast_text}
-"""
-        else:
-            # Respuesta normal si no hay cast
-            response = f"""
-**Información sobre {title_display} ({year})**
-
-**🎭 Géneros:** {", ".join(genres) if genres else "No disponibles"}
-
-**📖 Sinopsis:**
-{summary}
-"""
-        
+        response = render_title_response("search", interpretation, evidence, title)
         logger.info("✅ Respuesta SEARCH generada")
         return response.strip()
 
     # FACT-CHECK
     if intent == "fact_check" and fact_result:
-        status = "VERDADERO" if fact_result["is_true"] else "FALSO" if fact_result["is_true"] is False else "INCONCLUSO"
-        status_icon = "✅" if fact_result["is_true"] else "❌" if fact_result["is_true"] is False else "⚠️"
-        
-        response = f"""
-{status_icon} **Fact-Check Resultado: {status}**
-
-**Afirmación:** {fact_result['claim']}
-
-**Evidencia:** {fact_result.get('evidence', 'Sin explicación disponible')}
-
-**Confianza:** {fact_result.get('confidence', 'media').upper()}
-"""
+        response = render_fact_check_response(fact_result)
         logger.info("✅ Respuesta FACT-CHECK generada")
         return response.strip()
 
     logger.warning("❌ Intención no reconocida")
     return "No entiendo la consulta. ¿Puedes reformularla?"
 
-def ai_understand_query(query: str):
-    """
-    Usar IA para entender mejor consultas complejas
-    """
-    prompt = f"""
-    Analiza esta consulta sobre cine: "{query}"
-    
-    Identifica:
-    1. ¿De qué película/serie habla? (título)
-    2. ¿Qué quiere saber el usuario?
-    
-    Si la consulta es descriptiva ("payaso persigue niños"), sugiere el título más probable.
-    
-    Responde en JSON:
-    {{
-        "target_title": "título sugerido o null",
-        "query_type": "search|fact_check|analysis",
-        "description": "qué busca el usuario"
-    }}
-    """
-    
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "qwen2.5:7b",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            result_text = response.json().get("response", "")
-            # Extraer JSON
-            start = result_text.find('{')
-            end = result_text.rfind('}') + 1
-            if start != -1:
-                return json.loads(result_text[start:end])
-    except:
-        pass
-    
-    return None
-
 if __name__ == "__main__":
+    import os
     import sys
-    query = " ".join(sys.argv[1:])
-    if not query:
-        print("❌ Por favor proporciona una consulta")
-        sys.exit(1)
-        
-    print(run_query(query))
\ No newline at end of file
+
+    # Permite ejecutar "python supervisor/coordinator.py <consulta>"
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from supervisor.cli import main
+    main()
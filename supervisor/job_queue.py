@@ -0,0 +1,361 @@
+# supervisor/job_queue.py
+
+import logging
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import threading
+import ipaddress
+from urllib.parse import urlparse
+
+from agents.fetch_scheduler import priority_scope
+
+logger = logging.getLogger("job_queue")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOBS_PATH = os.environ.get("FACTCHECK_JOBS_PATH", os.path.join(ROOT_DIR, "data", "jobs.sqlite3"))
+
+JOB_CONCURRENCY = int(os.environ.get("FACTCHECK_JOB_CONCURRENCY", "2"))
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 15      # segundos, se multiplica por el número de intento
+LEASE_SECONDS = 120     # un job "running" sin latido durante este tiempo se reencola
+HEARTBEAT_SECONDS = 30
+POLL_SECONDS = 1.0
+WEBHOOK_ATTEMPTS = 3
+
+# Webhooks solo a http(s) y a direcciones públicas; con la lista, además,
+# solo a esos hosts ("hooks.example.com,ci.example.org")
+WEBHOOK_SCHEMES = ("http", "https")
+WEBHOOK_HOSTS = {h.strip().lower() for h in os.environ.get("FACTCHECK_WEBHOOK_HOSTS", "").split(",") if h.strip()}
+
+
+class JobQueue:
+    """
+    Cola persistente sobre SQLite (WAL). Los jobs en curso tienen un
+    "lease" que el worker renueva; si el servidor se reinicia, el lease
+    caduca y el job vuelve a reclamarse. Segura entre procesos.
+    """
+
+    def __init__(self, path: str = JOBS_PATH):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    partial TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    webhook_url TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_until REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, available_at)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def enqueue(self, query: str, webhook_url: str = None, max_attempts: int = MAX_ATTEMPTS) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, query, status, max_attempts, webhook_url, created, updated, available_at)"
+            " VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, query, max_attempts, webhook_url, now, now, now)
+        )
+        logger.info(f"📥 Job encolado {job_id}: '{query}'")
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row_to_job(row) if row else None
+
+    def expire_leases(self) -> list:
+        """
+        Jobs con el lease caducado que ya agotaron sus intentos (el worker
+        murió con ellos en cada intento): se marcan como fallidos y se
+        devuelven para avisar por webhook.
+        """
+        conn = self._conn()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now,)
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated = ? WHERE id = ?",
+                    (f"Sin latido del worker tras {row['attempts']} intentos", now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        expired = [self.get(row["id"]) for row in rows]
+        for job in expired:
+            logger.error(f"❌ Job {job['id']} sin más intentos: {job['error']}")
+        return expired
+
+    def claim(self):
+        """Reclama el siguiente job pendiente (o con lease caducado e intentos libres)"""
+        conn = self._conn()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs"
+                " WHERE (status = 'queued' AND available_at <= ?)"
+                "    OR (status = 'running' AND lease_until < ? AND attempts < max_attempts)"
+                " ORDER BY created LIMIT 1",
+                (now, now)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                " lease_until = ?, updated = ? WHERE id = ?",
+                (now + LEASE_SECONDS, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        job = row_to_job(row)
+        job["attempts"] += 1
+        job["status"] = "running"
+        return job
+
+    def heartbeat(self, job_id: str):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND status = 'running'",
+            (now + LEASE_SECONDS, now, job_id)
+        )
+
+    def update_partial(self, job_id: str, stage: str, data):
+        """Guarda el resultado parcial de una etapa y renueva el lease"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT partial FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            partial = json.loads(row["partial"]) if row else {}
+            partial[stage] = data
+            conn.execute(
+                "UPDATE jobs SET partial = ?, lease_until = ?, updated = ? WHERE id = ?",
+                (json.dumps(partial, ensure_ascii=False, default=str), now + LEASE_SECONDS, now, job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, job_id: str, result: str):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated = ?"
+            " WHERE id = ?",
+            (result, now, job_id)
+        )
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Marca el intento como fallido; devuelve True si se reintentará"""
+        job = self.get(job_id)
+        now = time.time()
+
+        if job and job["attempts"] < job["max_attempts"]:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'queued', error = ?, lease_until = NULL,"
+                " available_at = ?, updated = ? WHERE id = ?",
+                (error, now + RETRY_BACKOFF * job["attempts"], now, job_id)
+            )
+            return True
+
+        self._conn().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated = ? WHERE id = ?",
+            (error, now, job_id)
+        )
+        return False
+
+    def counts(self) -> dict:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+def row_to_job(row) -> dict:
+    return {
+        "id": row["id"],
+        "query": row["query"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "max_attempts": row["max_attempts"],
+        "partial": json.loads(row["partial"] or "{}"),
+        "result": row["result"],
+        "error": row["error"],
+        "webhook_url": row["webhook_url"],
+        "created": row["created"],
+        "updated": row["updated"]
+    }
+
+
+def validate_webhook_url(url: str) -> str:
+    """
+    Evita SSRF: solo http(s), host permitido (si hay lista) y que no
+    resuelva a direcciones internas (loopback, privadas, link-local...).
+    Lanza ValueError con el motivo.
+    """
+    parsed = urlparse(url or "")
+    if parsed.scheme not in WEBHOOK_SCHEMES or not parsed.hostname:
+        raise ValueError("El webhook debe ser una URL http(s)")
+
+    host = parsed.hostname.lower()
+    if WEBHOOK_HOSTS and host not in WEBHOOK_HOSTS:
+        raise ValueError(f"Host de webhook no permitido: {host}")
+
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"No se pudo resolver el host del webhook: {host}") from e
+
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"El webhook apunta a una dirección interna: {host}")
+    return url
+
+
+def send_webhook(job: dict):
+    """POST con el resultado final; reintenta unas pocas veces"""
+    import requests
+
+    # Se revalida al enviar: el DNS pudo cambiar desde que se encoló
+    try:
+        validate_webhook_url(job["webhook_url"])
+    except ValueError as e:
+        logger.warning(f"⚠️  Webhook descartado para job {job['id']}: {e}")
+        return False
+
+    payload = {key: job[key] for key in ("id", "query", "status", "result", "error")}
+
+    for attempt in range(1, WEBHOOK_ATTEMPTS + 1):
+        try:
+            response = requests.post(job["webhook_url"], json=payload, timeout=10, allow_redirects=False)
+            if response.status_code < 400:
+                logger.info(f"📤 Webhook enviado para job {job['id']}")
+                return True
+            logger.warning(f"⚠️  Webhook respondió {response.status_code} (intento {attempt})")
+        except requests.RequestException as e:
+            logger.warning(f"⚠️  Webhook falló (intento {attempt}): {e}")
+        time.sleep(2 * attempt)
+
+    return False
+
+
+class JobWorkerPool:
+    """Workers asyncio que vacían la cola ejecutando run_query"""
+
+    def __init__(self, queue: JobQueue, run_query, concurrency: int = JOB_CONCURRENCY):
+        self.queue = queue
+        self.run_query = run_query
+        self.concurrency = concurrency
+        self.tasks = []
+
+    def start(self):
+        if self.tasks:
+            return
+        logger.info(f"👷 Iniciando {self.concurrency} worker(s) de jobs")
+        self.tasks = [asyncio.create_task(self._worker(n)) for n in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                for expired in await asyncio.to_thread(self.queue.expire_leases):
+                    if expired["webhook_url"]:
+                        await asyncio.to_thread(send_webhook, expired)
+                job = await asyncio.to_thread(self.queue.claim)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Error reclamando job: {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(POLL_SECONDS)
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: dict):
+        job_id = job["id"]
+        logger.info(f"⚙️  Ejecutando job {job_id} (intento {job['attempts']})")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        # Las escrituras en SQLite bloquean: van a hilos, no al event loop
+        writes = []
+
+        def on_stage(stage, data):
+            writes.append(asyncio.create_task(asyncio.to_thread(self.queue.update_partial, job_id, stage, data)))
+
+        async def flush_partials():
+            for outcome in await asyncio.gather(*writes, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.warning(f"⚠️  No se pudo guardar un resultado parcial del job {job_id}: {outcome}")
+
+        try:
+            # Los jobs ceden el turno de TMDB a las consultas del chat
+            with priority_scope("background"):
+                result = await self.run_query(job["query"], on_stage=on_stage)
+            await flush_partials()
+            await asyncio.to_thread(self.queue.complete, job_id, result)
+            logger.info(f"✅ Job {job_id} completado")
+        except asyncio.CancelledError:
+            # Apagado del servidor: el lease caducará y otro worker lo retomará
+            raise
+        except Exception as e:
+            await flush_partials()
+            retry = await asyncio.to_thread(self.queue.fail, job_id, str(e))
+            logger.error(f"❌ Job {job_id} falló: {e} ({'se reintentará' if retry else 'sin más intentos'})")
+            if retry:
+                return
+        finally:
+            heartbeat.cancel()
+
+        final = await asyncio.to_thread(self.queue.get, job_id)
+        if final and final["webhook_url"]:
+            await asyncio.to_thread(send_webhook, final)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            await asyncio.to_thread(self.queue.heartbeat, job_id)
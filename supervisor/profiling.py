@@ -0,0 +1,224 @@
+# supervisor/profiling.py
+#
+# Perfilado bajo demanda de una consulta: un muestreador recoge las pilas
+# de los hilos que trabajan para ella (el event loop y los hilos de
+# Playwright, LLM y reportes) y guarda el resultado en
+# reports/profiles/<id>.json junto con las pilas en formato "folded" para
+# flamegraph.pl o speedscope. Los hilos de otras consultas simultáneas no
+# cuentan; el event loop sí es compartido, pero apenas hace trabajo propio.
+#
+#   FACTCHECK_PROFILING=1 → /api/chat acepta la cabecera X-Profile: 1 o ?profile=1
+#   python -m supervisor --profile "¿quién dirigió Titanic?"
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+logger = logging.getLogger("profiling")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES_DIR = os.environ.get("FACTCHECK_PROFILES_PATH", os.path.join(ROOT_DIR, "reports", "profiles"))
+
+# La web solo perfila si el servidor lo permite (tiene coste y no hay autenticación)
+PROFILING_ENABLED = os.environ.get("FACTCHECK_PROFILING", "0") == "1"
+SAMPLE_INTERVAL = float(os.environ.get("FACTCHECK_PROFILE_INTERVAL", "0.005"))
+MAX_PROFILES = int(os.environ.get("FACTCHECK_MAX_PROFILES", "50"))
+TOP_FUNCTIONS = 25
+
+# Dónde se va el tiempo: la primera coincidencia desde la hoja de la pila
+CATEGORIES = [
+    ("playwright", ("playwright", "greenlet")),
+    ("llm", ("agents/llm_client.py",)),
+    ("parsing", ("agents/html_parser.py", "/re/", "/re.py", "sre_")),
+    ("report", ("agents/report_store.py", "agents/reporter.py", "agents/renderer.py")),
+    ("cache", ("agents/cache.py", "sqlite3")),
+]
+
+# Solo cuentan las pilas que pasan por código de la consulta: el loop
+# esperando, uvicorn o los workers de jobs ociosos no aparecen
+QUERY_CODE = ("agents/", "supervisor/coordinator.py", "supervisor/conversation.py")
+
+_ids_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Perfilador por muestreo sin dependencias: cada `interval` segundos lee
+    sys._current_frames() y se queda con las pilas que pasan por código
+    de la consulta (QUERY_CODE). Con `threads` (set vivo de ids, ver
+    track_threads) solo se muestrean esos hilos.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, threads: set = None):
+        self.interval = interval
+        self.threads = threads
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.threads is not None and thread_id not in self.threads):
+                    continue
+                stack = self._stack(frame)
+                if stack:
+                    self.stacks[stack] += 1
+
+    @staticmethod
+    def _stack(frame):
+        frames = []
+        in_query = False
+        while frame is not None:
+            code = frame.f_code
+            path = code.co_filename.replace(os.sep, "/")
+            if path.startswith(ROOT_DIR.replace(os.sep, "/")) and "site-packages" not in path:
+                path = os.path.relpath(code.co_filename, ROOT_DIR).replace(os.sep, "/")
+                in_query = in_query or path.startswith(QUERY_CODE)
+            frames.append(f"{code.co_name} ({path}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if not in_query:
+            return None
+        return ";".join(reversed(frames))
+
+
+def categorize(stack: str) -> str:
+    for frame in reversed(stack.split(";")):
+        for category, markers in CATEGORIES:
+            if any(marker in frame for marker in markers):
+                return category
+    return "other"
+
+
+def summarize(sampler: StackSampler) -> dict:
+    categories = Counter()
+    own_time = Counter()
+    for stack, count in sampler.stacks.items():
+        categories[categorize(stack)] += count
+        own_time[stack.rsplit(";", 1)[-1]] += count
+
+    seconds = lambda count: round(count * sampler.interval, 3)
+    return {
+        "samples": sampler.samples,
+        "interval": sampler.interval,
+        "categories": {name: seconds(count) for name, count in categories.most_common()},
+        "top": [{"frame": frame, "seconds": seconds(count)} for frame, count in own_time.most_common(TOP_FUNCTIONS)]
+    }
+
+
+def new_profile_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+
+
+def save_profile(profile_id: str, sampler: StackSampler, meta: dict) -> dict:
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    profile = {"id": profile_id, **meta, **summarize(sampler)}
+
+    with open(os.path.join(PROFILES_DIR, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(PROFILES_DIR, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    prune_profiles()
+    return profile
+
+
+def prune_profiles(keep: int = MAX_PROFILES):
+    with _ids_lock:
+        for profile_id in list_profile_ids()[keep:]:
+            for ext in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(PROFILES_DIR, profile_id + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def list_profile_ids() -> list:
+    """Identificadores de perfil, del más reciente al más antiguo"""
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    return sorted((name[:-5] for name in os.listdir(PROFILES_DIR) if name.endswith(".json")), reverse=True)
+
+
+def recent_profiles(limit: int = 20) -> list:
+    profiles = []
+    for profile_id in list_profile_ids()[:limit]:
+        profile = load_profile(profile_id)
+        if profile:
+            profiles.append({key: profile.get(key) for key in ("id", "query", "started", "duration", "report_hash", "categories")})
+    return profiles
+
+
+def load_profile(profile_id: str, folded: bool = False):
+    # Solo identificadores generados aquí: nada de rutas
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    path = os.path.join(PROFILES_DIR, f"{profile_id}.{'folded' if folded else 'json'}")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read() if folded else json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+async def profiled_query(query: str, runner=None, **kwargs):
+    """
+    run_query (o `runner`) bajo el muestreador. Devuelve (respuesta, perfil);
+    el perfil se guarda con el hash del reporte para poder cruzarlos. Solo
+    se muestrean el event loop y los hilos lanzados por esta consulta.
+    """
+    from agents.resilience import track_threads
+
+    if runner is None:
+        from supervisor.coordinator import run_query as runner
+
+    on_stage = kwargs.pop("on_stage", None)
+    report = {}
+
+    def observe(stage, data):
+        if stage == "report" and data:
+            report["hash"] = data.get("hash")
+        if on_stage is not None:
+            on_stage(stage, data)
+
+    profile_id = new_profile_id()
+    with track_threads() as threads:
+        threads.add(threading.get_ident())  # el event loop
+        sampler = StackSampler(threads=threads)
+        started = time.time()
+        began = time.monotonic()
+        sampler.start()
+        outcome = "error"
+        try:
+            response = await runner(query, on_stage=observe, **kwargs)
+            outcome = "ok"
+        finally:
+            sampler.stop()
+            profile = save_profile(profile_id, sampler, {
+                "query": query,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+                "duration": round(time.monotonic() - began, 3),
+                "outcome": outcome,
+                "report_hash": report.get("hash")
+            })
+            logger.info(f"🔬 Perfil {profile_id} guardado: {profile['categories']}")
+
+    return response, profile
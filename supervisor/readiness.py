@@ -0,0 +1,74 @@
+# supervisor/readiness.py
+
+import logging
+import time
+import asyncio
+
+logger = logging.getLogger("readiness")
+
+RETRY_SECONDS = 30  # tiempo mínimo entre intentos de calentamiento fallidos
+
+components = {
+    "browser": {"ready": False, "detail": "pendiente", "checked": None},
+    "llm": {"ready": False, "detail": "pendiente", "checked": None},
+}
+
+_warming = None
+
+
+def warm_browser():
+    """Importa Playwright y lanza Chromium una vez (binario y caché del SO calientes)"""
+    from agents.web_search import open_tmdb_page
+
+    with open_tmdb_page(15000) as page:
+        page.goto("about:blank")
+
+
+def warm_llm():
+    """Carga el modelo en Ollama"""
+    from agents.llm_client import ollama_load_model
+
+    ollama_load_model()
+
+
+async def _warm(name: str, fn):
+    started = time.monotonic()
+    try:
+        await asyncio.to_thread(fn)
+        components[name].update(ready=True, detail=f"listo en {time.monotonic() - started:.1f}s")
+        logger.info(f"🔥 {name} caliente")
+    except Exception as e:
+        components[name].update(ready=False, detail=f"error: {e}")
+        logger.warning(f"⚠️  No se pudo calentar {name}: {e}")
+    finally:
+        components[name]["checked"] = time.time()
+
+
+async def warm_up():
+    """Calienta navegador y modelo en paralelo"""
+    await asyncio.gather(*(_warm(name, fn) for name, fn in (("browser", warm_browser), ("llm", warm_llm))
+                           if not components[name]["ready"]))
+
+
+def schedule_warm_up():
+    """Lanza el calentamiento en segundo plano si no hay uno en curso"""
+    global _warming
+    if _warming is None or _warming.done():
+        _warming = asyncio.create_task(warm_up())
+
+
+def readiness() -> dict:
+    """Estado de preparación; reintenta en segundo plano lo que falló"""
+    now = time.time()
+    retry = any(
+        not c["ready"] and c["checked"] and now - c["checked"] > RETRY_SECONDS
+        for c in components.values()
+    )
+    if retry:
+        schedule_warm_up()
+
+    return {
+        "ready": all(c["ready"] for c in components.values()),
+        "warming": _warming is not None and not _warming.done(),
+        "components": components
+    }
@@ -0,0 +1,89 @@
+# supervisor/response_cache.py
+
+import hashlib
+import logging
+import re
+
+from agents.cache import make_cache
+from agents.text_utils import normalize_text
+
+logger = logging.getLogger("response_cache")
+
+# Consulta normalizada → respuesta, ETag y versión de la evidencia usada
+RESPONSE_CACHE = make_cache("responses", maxsize=4096, ttl=6 * 3600)
+
+
+def query_key(query: str) -> str:
+    """Misma clave para "¿Quién dirigió Titanic?" y "quien dirigio titanic" """
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", normalize_text(query))).strip()
+
+
+def make_etag(key: str, versions: list) -> str:
+    digest = hashlib.sha256("|".join([key] + versions).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def current_versions(titles: list):
+    """
+    Huella actual de la evidencia de cada título, leída solo de la caché
+    de TMDB (sin scraping), más la versión de las reglas de conocimiento
+    común. None si alguna evidencia ya no está: hay que recalcular.
+    """
+    from agents.web_search import TMDB_CACHE
+    from agents.fact_checker import evidence_fingerprint
+    from agents.knowledge_rules import rules_version
+
+    versions = []
+    for title in titles:
+        evidence = TMDB_CACHE.get(normalize_text(title))
+        if not evidence:
+            return None
+        versions.append(evidence_fingerprint(evidence))
+    return versions + [rules_version()]
+
+
+def cached_response(query: str):
+    """Respuesta guardada si la evidencia en la que se basó sigue vigente"""
+    key = query_key(query)
+    entry = RESPONSE_CACHE.get(key)
+    if not entry:
+        return None
+
+    if current_versions(entry["titles"]) != entry["versions"]:
+        logger.info(f"♻️  Evidencia cambiada o caducada, se recalcula '{key}'")
+        RESPONSE_CACHE.delete(key)
+        return None
+
+    return entry
+
+
+def store_response(query: str, response: str, stages: dict):
+    """
+    Guarda la respuesta con un ETag de consulta + versión de evidencia y
+    de reglas.
+    Solo es cacheable si todos los títulos se encontraron en TMDB.
+    Devuelve la entrada o None.
+    """
+    from agents.fact_checker import evidence_fingerprint
+    from agents.knowledge_rules import rules_version
+
+    interpretation = stages.get("interpretation") or {}
+    titles = interpretation.get("target_titles") or []
+    evidences = stages.get("comparison") or [stages.get("evidence")]
+
+    if not titles or interpretation.get("follow_up") or len(evidences) != len(titles):
+        return None
+    if any(not e or "error" in e or not e.get("tmdb_id") for e in evidences):
+        return None
+
+    key = query_key(query)
+    # Las reglas recargadas pueden cambiar el veredicto: también van en el ETag
+    versions = [evidence_fingerprint(e) for e in evidences] + [rules_version()]
+    entry = {
+        "response": response,
+        "titles": titles,
+        "versions": versions,
+        "etag": make_etag(key, versions)
+    }
+    RESPONSE_CACHE.set(key, entry)
+    return entry
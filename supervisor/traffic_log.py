@@ -0,0 +1,127 @@
+# supervisor/traffic_log.py
+#
+# Captura opcional del tráfico real del chat en JSONL rotativo, para
+# reproducirlo después con benchmarks/replay.py:
+#
+#   FACTCHECK_CAPTURE_PATH=reports/capture/queries.jsonl uvicorn web.web_app:app
+#
+# Cada proceso (p. ej. cada worker de uvicorn) escribe y rota su propio
+# fichero, con el PID en el nombre: queries.<pid>.jsonl
+
+import asyncio
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger("traffic_log")
+
+CAPTURE_PATH = os.environ.get("FACTCHECK_CAPTURE_PATH", "")
+CAPTURE_MAX_BYTES = int(os.environ.get("FACTCHECK_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.environ.get("FACTCHECK_CAPTURE_BACKUPS", "5"))
+
+# Solo lo necesario para reproducir la consulta con stubs: nada de HTML ni respuestas
+INTERPRETATION_KEYS = ("intent", "target_titles", "task", "needs_web", "needs_fact_check", "follow_up")
+
+
+def process_capture_path(path: str, pid: int = None) -> str:
+    """queries.jsonl -> queries.<pid>.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def _open_capture():
+    if not CAPTURE_PATH:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(CAPTURE_PATH)), exist_ok=True)
+
+    # RotatingFileHandler solo es seguro entre hilos: dos procesos rotando
+    # el mismo fichero se pisan, así que cada uno tiene el suyo
+    path = process_capture_path(CAPTURE_PATH)
+    capture = logging.getLogger("traffic_log.capture")
+    capture.propagate = False
+    capture.setLevel(logging.INFO)
+    if not capture.handlers:
+        handler = RotatingFileHandler(path, maxBytes=CAPTURE_MAX_BYTES,
+                                      backupCount=CAPTURE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        capture.addHandler(handler)
+    logger.info(f"📼 Capturando consultas en {path}")
+    return capture
+
+
+_capture = _open_capture()
+
+
+def summarize_evidence(evidence):
+    if not evidence:
+        return None
+    return {
+        "title": evidence.get("title"),
+        "year": evidence.get("year"),
+        "tmdb_id": evidence.get("tmdb_id"),
+        "media_type": evidence.get("media_type"),
+        "cast": len(evidence.get("cast") or []),
+        "error": "error" in evidence
+    }
+
+
+def write_record(record: dict):
+    if _capture is None:
+        return
+    try:
+        _capture.info(json.dumps(record, ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.warning(f"⚠️  No se pudo escribir la captura: {e}")
+
+
+async def captured_query(query: str, channel: str, on_stage=None, **kwargs):
+    """
+    run_query con registro de la consulta: momento de cada etapa (ms desde
+    el inicio), interpretación, evidencia resumida y resultado. Sin captura
+    configurada equivale a llamar a run_query.
+    """
+    from supervisor.coordinator import run_query
+    from agents.resilience import QueryCancelled
+
+    if _capture is None:
+        return await run_query(query, on_stage=on_stage, **kwargs)
+
+    started = time.monotonic()
+    record = {
+        "ts": round(time.time(), 3),
+        "channel": channel,
+        "query": query,
+        "session_id": kwargs.get("session_id"),
+        "stages": {},
+        "interpretation": None,
+        "evidence": []
+    }
+
+    def observe(stage, data):
+        record["stages"][stage] = round((time.monotonic() - started) * 1000, 1)
+        if stage == "interpretation":
+            record["interpretation"] = {key: data.get(key) for key in INTERPRETATION_KEYS if key in data}
+        elif stage == "comparison":
+            record["evidence"] = [summarize_evidence(e) for e in data]
+        elif stage == "evidence" and not record["evidence"]:
+            record["evidence"] = [summarize_evidence(data)]
+        if on_stage is not None:
+            on_stage(stage, data)
+
+    try:
+        response = await run_query(query, on_stage=observe, **kwargs)
+        record["outcome"] = "ok"
+        record["response_chars"] = len(response or "")
+        return response
+    except (asyncio.CancelledError, QueryCancelled):
+        record["outcome"] = "cancelled"
+        raise
+    except Exception as e:
+        record["outcome"] = "error"
+        record["error"] = str(e)[:200]
+        raise
+    finally:
+        record["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        write_record(record)
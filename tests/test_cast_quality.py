@@ -0,0 +1,74 @@
+# tests/test_cast_quality.py
+
+import pytest
+
+from agents.cast_quality import (
+    ACCEPT_SCORE, MIN_SCORE, NAME_MIN, NAME_TOKENS, STRATEGY_CACHE,
+    forget_strategy, learn_names, name_likelihood, remember_strategy, score_cast, strategy_order
+)
+
+DEFAULT = ["cast_html", "cast_dom", "cast_text"]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    STRATEGY_CACHE.clear()
+    NAME_TOKENS.clear()
+    yield
+    STRATEGY_CACHE.clear()
+    NAME_TOKENS.clear()
+
+
+@pytest.mark.parametrize("name", ["Leonardo DiCaprio", "Kate Winslet", "Gael García Bernal", "Ludwig van Beethoven"])
+def test_real_names_are_likely(name):
+    assert name_likelihood(name) >= NAME_MIN
+
+
+@pytest.mark.parametrize("name", ["Full Cast & Crew", "View More", "Top Billed Cast", "Temporada 2",
+                                  "Season 1", "R2 D2", "", "kate winslet"])
+def test_ui_text_is_unlikely(name):
+    assert name_likelihood(name) < NAME_MIN
+
+
+def test_known_tokens_raise_likelihood():
+    before = name_likelihood("Zendaya")
+    learn_names({"names": ["Zendaya Coleman"], "linked": 1.0})
+    assert name_likelihood("Zendaya") > before
+
+
+def test_score_cast_rejects_ui_text():
+    ui = score_cast(["Full Cast & Crew", "View More", "Top Billed Cast", "Reviews"])
+    assert ui["score"] < MIN_SCORE and ui["names"] == []
+
+    mixed = score_cast(["Leonardo DiCaprio", "Kate Winslet", "View More", "Full Cast & Crew"])
+    assert mixed["names"] == ["Leonardo DiCaprio", "Kate Winslet"]
+    assert mixed["score"] < score_cast(["Leonardo DiCaprio", "Kate Winslet"])["score"]
+
+
+def test_score_cast_uses_page_signals():
+    names = ["Leonardo DiCaprio", "Kate Winslet", "Zendaya"]
+    signals = {"linked": names, "with_character": names[:2]}
+    result = score_cast(names, signals)
+    assert result["names"] == names  # "Zendaya" se salva por el enlace
+    assert result["linked"] == 1.0 and result["score"] >= ACCEPT_SCORE
+    assert score_cast(names)["names"] == names[:2]
+
+
+def test_strategy_order_prefers_title_then_layout():
+    assert strategy_order("movie/597", "movie:101", DEFAULT) == DEFAULT
+
+    remember_strategy("movie/603", "movie:101", "cast_text")
+    remember_strategy("movie/604", "movie:101", "cast_text")
+    remember_strategy("movie/597", "movie:101", "cast_dom")
+    assert strategy_order("movie/597", "movie:101", DEFAULT) == ["cast_dom", "cast_text", "cast_html"]
+    assert strategy_order("movie/19995", "movie:101", DEFAULT) == ["cast_text", "cast_dom", "cast_html"]
+    assert strategy_order("movie/19995", "tv:111", DEFAULT) == DEFAULT
+
+
+def test_unknown_and_forgotten_strategies():
+    remember_strategy("movie/597", "movie:101", "retired_strategy")
+    assert strategy_order("movie/597", "movie:101", DEFAULT) == DEFAULT
+
+    remember_strategy("movie/597", "movie:101", "cast_text")
+    forget_strategy("movie/597")
+    assert STRATEGY_CACHE.get("title:movie/597") is None
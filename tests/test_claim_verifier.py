@@ -0,0 +1,93 @@
+# tests/test_claim_verifier.py
+
+from agents.claim_verifier import split_claim, uncovered_words, verify_claims
+
+TITANIC = {
+    "title": "Titanic",
+    "year": "1997",
+    "director": "James Cameron",
+    "genres": ["Drama", "Romance"],
+    "cast": ["Leonardo DiCaprio", "Kate Winslet", "Billy Zane"],
+}
+
+
+def verdict(claim, evidence=TITANIC):
+    result = verify_claims([claim], evidence)[0]
+    return result and result["is_true"]
+
+
+def test_split_claim_extracts_facts():
+    facts = split_claim("Titanic de 1997 fue dirigida por James Cameron")
+    assert {(f["type"], f["value"]) for f in facts} == {("year", "1997"), ("director", "James Cameron")}
+
+    facts = split_claim("Leonardo DiCaprio actuó en Titanic, una película de drama")
+    assert {(f["type"], f["value"]) for f in facts} == {("cast", "Leonardo DiCaprio"), ("genre", "drama")}
+
+
+def test_split_claim_keeps_spans():
+    facts = split_claim("Titanic fue dirigida por James Cameron")
+    assert facts == [{"type": "director", "value": "James Cameron", "span": "dirigida por James Cameron"}]
+
+
+def test_uncovered_words():
+    claim = "Titanic de 1997 ganó 20 Oscars"
+    assert uncovered_words(claim, split_claim(claim), "Titanic") == ["gano", "20", "oscars"]
+    claim = "Titanic se estrenó en 1997"
+    assert uncovered_words(claim, split_claim(claim), "Titanic") == []
+
+
+def test_verdicts():
+    assert verdict("Titanic es de 1997") is True
+    assert verdict("Titanic es de 1998") is False
+    assert verdict("Titanic fue dirigida por James Cameron") is True
+    assert verdict("Titanic fue dirigida por Steven Spielberg") is False
+    assert verdict("Kate Winslet actuó en Titanic") is True
+    assert verdict("Titanic es una película de drama") is True
+    assert verdict("Titanic es una película de terror") is False
+
+
+def test_partial_claim_goes_to_llm():
+    # El año es correcto, pero los Oscars no los verifica el motor local
+    assert verdict("Titanic de 1997 ganó 20 Oscars") is None
+    # Un hecho falso basta aunque el resto no se pueda verificar
+    assert verdict("Titanic de 1998 ganó 20 Oscars") is False
+
+
+def test_cast_absence_is_undecided():
+    assert verdict("Tom Hanks actuó en Titanic") is None
+
+
+def test_director_unknown_is_undecided():
+    evidence = dict(TITANIC, director="No disponible")
+    assert verdict("Titanic fue dirigida por James Cameron", evidence) is None
+
+
+def test_several_directors():
+    matrix = dict(TITANIC, title="The Matrix", year="1999", director="Lana Wachowski, Lilly Wachowski")
+    assert verdict("The Matrix fue dirigida por Lilly Wachowski", matrix) is True
+    assert verdict("The Matrix fue dirigida por Christopher Nolan", matrix) is False
+
+
+STRANGER_THINGS = {
+    "title": "Stranger Things",
+    "year": "2016",
+    "director": "Matt Duffer, Ross Duffer",
+    "genres": ["Drama", "Sci-Fi & Fantasy", "Misterio"],
+    "cast": ["Winona Ryder", "David Harbour"],
+}
+
+
+def test_compound_tv_genres():
+    assert verdict("Stranger Things es una serie de ciencia ficción", STRANGER_THINGS) is True
+    assert verdict("Stranger Things es una serie de fantasía", STRANGER_THINGS) is True
+    assert verdict("Stranger Things es una serie de comedia", STRANGER_THINGS) is False
+
+
+def test_history_genre():
+    evidence = dict(TITANIC, genres=["Drama", "Historia"])
+    assert verdict("Titanic es una película histórica", evidence) is True
+
+
+def test_unmapped_genre_is_undecided():
+    evidence = dict(STRANGER_THINGS, genres=["Drama", "Kids"])
+    assert verdict("Stranger Things es una serie de comedia", evidence) is None
@@ -0,0 +1,93 @@
+# tests/test_conversation.py
+
+import asyncio
+
+import pytest
+
+from supervisor.conversation import follow_up_interpretation
+
+MATRIX = {
+    "title": "The Matrix",
+    "year": "1999",
+    "genres": ["Action", "Science Fiction"],
+    "director": "Lana Wachowski, Lilly Wachowski",
+    "summary": "",
+    "rating": "82%",
+    "cast": ["Keanu Reeves", "Carrie-Anne Moss"],
+    "tmdb_id": 603,
+    "media_type": "movie",
+}
+
+SESSION = {"title": "Matrix", "evidence": MATRIX}
+
+
+@pytest.mark.parametrize("query, task", [
+    ("¿Y quién la dirigió?", "get_director"),
+    ("¿de qué año es?", "get_year"),
+    ("¿y su reparto?", "get_cast"),
+    ("¿Quién dirigió esa película?", "get_director"),
+])
+def test_follow_up_uses_session_title(query, task):
+    interpretation = follow_up_interpretation(query, SESSION)
+    assert interpretation["target_title"] == "Matrix"
+    assert interpretation["task"] == task
+
+
+@pytest.mark.parametrize("query", [
+    "¿Y la nota de Avatar?",
+    "Y en Inception quien actua",
+    "¿Quién dirigió Titanic?",
+])
+def test_named_title_is_not_a_follow_up(query):
+    assert follow_up_interpretation(query, SESSION) is None
+
+
+def test_no_session_no_follow_up():
+    assert follow_up_interpretation("¿Y quién la dirigió?", None) is None
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    """run_query sin LLM, sin navegador y sin escribir reportes"""
+    searches = []
+
+    def nlp_agent(query):
+        title = "Avatar" if "Avatar" in query else None
+        return {"intent": "search", "target_title": title, "target_titles": [title] if title else [],
+                "task": "get_rating", "needs_web": True, "needs_fact_check": False}
+
+    async def web_search_agent_async(title):
+        searches.append(title)
+        if title == "Avatar":
+            return dict(MATRIX, title="Avatar", year="2009", rating="76%", director="James Cameron", tmdb_id=19995)
+        return dict(MATRIX)
+
+    monkeypatch.setattr("agents.nlp_agent.nlp_agent", nlp_agent)
+    monkeypatch.setattr("agents.web_search_async.web_search_agent_async", web_search_agent_async)
+    monkeypatch.setattr("agents.reporter.reporter_agent", lambda **kwargs: {"hash": "test"})
+    return searches
+
+
+def test_follow_up_flow(stubs):
+    from supervisor.conversation import save_session
+    from supervisor.coordinator import run_query
+
+    save_session("test-flow", "Matrix", MATRIX)
+
+    response = asyncio.run(run_query("¿Y quién la dirigió?", session_id="test-flow"))
+    assert "Lana Wachowski, Lilly Wachowski" in response
+    assert stubs == []  # evidencia de la sesión, sin búsqueda
+
+    response = asyncio.run(run_query("¿Y la nota de Avatar?", session_id="test-flow"))
+    assert "Avatar" in response and "76%" in response
+    assert stubs == ["Avatar"]
+
+
+def test_follow_up_without_director(stubs):
+    from supervisor.conversation import save_session
+    from supervisor.coordinator import run_query
+
+    save_session("test-no-director", "Matrix", dict(MATRIX, director="No disponible"))
+
+    response = asyncio.run(run_query("¿Y quién la dirigió?", session_id="test-no-director"))
+    assert "director no disponible" in response
@@ -0,0 +1,35 @@
+# tests/test_evidence_store.py
+
+import time
+
+from agents.evidence_store import EvidenceStore
+
+TITANIC = {"title": "Titanic", "year": "1997", "cast": ["Kate Winslet"], "tmdb_id": 597, "media_type": "movie"}
+
+
+def test_lookup_by_title_and_alias(tmp_path):
+    store = EvidenceStore(str(tmp_path / "evidence.sqlite3"))
+    store.put(TITANIC, aliases=("titanic 1997",))
+
+    assert store.lookup("TITANIC")["tmdb_id"] == 597
+    assert store.lookup("Titanic 1997")["tmdb_id"] == 597
+    assert store.get("movie", 597)["title"] == "Titanic"
+
+
+def test_lookup_max_age(tmp_path):
+    store = EvidenceStore(str(tmp_path / "evidence.sqlite3"))
+    store.put(TITANIC)
+    store._conn().execute("UPDATE evidence SET fetched = ?", (time.time() - 3600,))
+
+    assert store.lookup("Titanic", max_age=60) is None
+    assert store.lookup("Titanic", max_age=7200)["tmdb_id"] == 597
+    assert store.lookup("Titanic")["tmdb_id"] == 597
+
+
+def test_put_without_scraped_title_uses_requested(tmp_path):
+    store = EvidenceStore(str(tmp_path / "evidence.sqlite3"))
+    store.put(dict(TITANIC, title=None), aliases=("Titanic",))
+
+    assert store.get("movie", 597)["title"] == "Titanic"
+    assert store.lookup("none") is None
+    assert store.lookup("Titanic")["tmdb_id"] == 597
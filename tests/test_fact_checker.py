@@ -0,0 +1,22 @@
+# tests/test_fact_checker.py
+
+from agents import fact_checker
+
+EVIDENCE = {"title": "Titanic", "year": "1997", "director": "James Cameron", "genres": ["Drama"], "cast": []}
+VERDICT = {"claim": "Titanic es de 1997", "is_true": True, "evidence": "✅", "confidence": "high"}
+
+
+def test_verdict_cache_follows_rules_version(monkeypatch):
+    monkeypatch.setattr(fact_checker, "rules_version", lambda: "rules:1")
+    fact_checker.store_verdict("Titanic es de 1997", EVIDENCE, dict(VERDICT))
+    assert fact_checker.get_cached_verdict("Titanic es de 1997", EVIDENCE)["is_true"] is True
+
+    # Reglas recargadas: el veredicto cacheado deja de valer
+    monkeypatch.setattr(fact_checker, "rules_version", lambda: "rules:2")
+    assert fact_checker.get_cached_verdict("Titanic es de 1997", EVIDENCE) is None
+
+
+def test_verdict_cache_follows_evidence():
+    fact_checker.store_verdict("Titanic es de 1997", EVIDENCE, dict(VERDICT))
+    changed = dict(EVIDENCE, year="1998")
+    assert fact_checker.get_cached_verdict("Titanic es de 1997", changed) is None
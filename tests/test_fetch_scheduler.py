@@ -0,0 +1,84 @@
+# tests/test_fetch_scheduler.py
+
+import threading
+import time
+
+import pytest
+
+from agents import fetch_scheduler
+from agents.fetch_scheduler import HostScheduler
+
+
+def test_tokens_refill_at_rate_up_to_burst():
+    scheduler = HostScheduler("tmdb.test", rate=2, burst=4, concurrency=4)
+    scheduler.tokens, scheduler.updated = 0.0, 100.0
+
+    scheduler._refill(100.5)
+    assert scheduler.tokens == pytest.approx(1.0)
+    scheduler._refill(101.25)
+    assert scheduler.tokens == pytest.approx(2.5)
+    scheduler._refill(200.0)
+    assert scheduler.tokens == 4
+
+
+def test_burst_then_wait_for_refill():
+    scheduler = HostScheduler("tmdb.test", rate=20, burst=2, concurrency=4)
+    started = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire("interactive")
+        scheduler.release()
+    # Dos salen con la ráfaga; la tercera espera un token (1/20 s)
+    assert time.monotonic() - started >= 0.04
+    assert scheduler.stats()["lanes"]["interactive"]["granted"] == 3
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_interactive_lane_goes_first():
+    scheduler = HostScheduler("tmdb.test", rate=1000, burst=10, concurrency=1)
+    granted = []
+
+    def fetch(lane):
+        scheduler.acquire(lane)
+        granted.append(lane)
+        scheduler.release()
+
+    scheduler.acquire("interactive")
+    threads = []
+    for lane in ("background", "interactive"):
+        threads.append(threading.Thread(target=fetch, args=(lane,)))
+        threads[-1].start()
+        wait_until(lambda: len(scheduler.waiting) == len(threads))
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(2)
+    assert granted == ["interactive", "background"]
+
+
+def test_throttle_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(fetch_scheduler, "BACKOFF_MAX", 5.0)
+    scheduler = HostScheduler("tmdb.test", rate=2, burst=4, concurrency=4)
+
+    assert scheduler.report(200) is False
+    assert scheduler.blocked_until == 0.0
+
+    pauses = []
+    for _ in range(3):
+        before = time.monotonic()
+        assert scheduler.report(429) is True
+        pauses.append(scheduler.blocked_until - before)
+        scheduler.blocked_until = 0.0
+    assert [round(p) for p in pauses] == [2, 4, 5]
+    assert scheduler.tokens == 0.0 and scheduler.throttled == 3
+
+    # Retry-After manda si pide más que el backoff; un 200 reinicia la serie
+    scheduler.report(503, retry_after=30)
+    assert scheduler.blocked_until - time.monotonic() > 25
+    scheduler.report(200)
+    assert scheduler.backoff == 0.0
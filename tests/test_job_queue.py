@@ -0,0 +1,75 @@
+# tests/test_job_queue.py
+
+import asyncio
+import threading
+
+import pytest
+
+from supervisor.job_queue import JobQueue, JobWorkerPool, validate_webhook_url
+
+
+def expire(queue, job_id):
+    queue._conn().execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+
+
+def test_expired_lease_is_reclaimed_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.enqueue("¿quién dirigió Titanic?", max_attempts=2)
+
+    assert queue.claim()["attempts"] == 1
+    expire(queue, job_id)
+    assert queue.expire_leases() == []
+    assert queue.claim()["attempts"] == 2
+
+    expire(queue, job_id)
+    assert queue.claim() is None
+    assert [job["id"] for job in queue.expire_leases()] == [job_id]
+    assert queue.get(job_id)["status"] == "failed"
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://93.184.216.34/hook",
+    "file:///etc/passwd",
+    "http://127.0.0.1:8000/api/jobs",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+])
+def test_webhook_rejects_internal_urls(url):
+    with pytest.raises(ValueError):
+        validate_webhook_url(url)
+
+
+def test_webhook_accepts_public_address():
+    assert validate_webhook_url("https://93.184.216.34/hook") == "https://93.184.216.34/hook"
+
+
+def test_worker_writes_off_the_event_loop(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.enqueue("¿quién dirigió Titanic?")
+    writers = set()
+
+    for name in ("update_partial", "complete"):
+        original = getattr(queue, name)
+
+        def spy(*args, original=original):
+            writers.add(threading.get_ident())
+            return original(*args)
+
+        monkeypatch.setattr(queue, name, spy)
+
+    async def run_query(query, on_stage=None):
+        on_stage("interpretation", {"target_title": "Titanic"})
+        on_stage("evidence", {"title": "Titanic"})
+        return "James Cameron"
+
+    async def run():
+        loop_thread = threading.get_ident()
+        await JobWorkerPool(queue, run_query)._run_job(queue.claim())
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["result"] == "James Cameron"
+    assert set(job["partial"]) == {"interpretation", "evidence"}
+    assert writers and loop_thread not in writers
@@ -0,0 +1,75 @@
+# tests/test_knowledge_rules.py
+
+import json
+import os
+from collections import defaultdict
+
+import pytest
+
+from agents import knowledge_rules
+from agents.knowledge_rules import KeywordAutomaton, RuleEngine
+
+OSCARS = {
+    "id": "titanic_oscars",
+    "entities": ["Titanic"],
+    "keywords": [["oscar", "oscars"], "11"],
+    "verdict": True,
+    "evidence": "Titanic ganó 11 premios Oscar"
+}
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+    assert automaton.find("ushers") == {"he", "she", "hers"}
+    assert automaton.find("this") == {"his"}
+    assert automaton.find("nada") == set()
+
+
+def test_engine_needs_every_group():
+    engine = RuleEngine([OSCARS])
+    assert engine.match("¿Ganó Titanic 11 Óscars?") is OSCARS
+    assert engine.match("¿Ganó Titanic 20 Oscars?") is None
+    assert engine.match("¿Ganó Avatar 11 Oscars?") is None
+
+
+def test_engine_returns_first_rule_in_file_order():
+    generic = dict(OSCARS, id="titanic_generic", keywords=[["oscar", "oscars"]])
+    engine = RuleEngine([OSCARS, generic])
+    assert engine.match("Titanic ganó 11 oscars")["id"] == "titanic_oscars"
+    assert engine.match("Titanic ganó 2 oscars")["id"] == "titanic_generic"
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    monkeypatch.setattr(knowledge_rules, "RULES_PATH", str(path))
+    monkeypatch.setattr(knowledge_rules, "RELOAD_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(knowledge_rules, "_engine", None)
+    monkeypatch.setattr(knowledge_rules, "_mtime", None)
+    monkeypatch.setattr(knowledge_rules, "_last_check", 0.0)
+    monkeypatch.setattr(knowledge_rules, "hit_counters", defaultdict(int))
+    return path
+
+
+def write_rules(path, content, mtime):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_rules_reload_when_file_changes(rules_file):
+    write_rules(rules_file, json.dumps({"rules": [OSCARS]}), 1000)
+    assert knowledge_rules.match_rule("¿Titanic ganó 11 oscars?")["is_true"] is True
+    assert knowledge_rules.rules_version() == "rules:1000.0"
+
+    write_rules(rules_file, json.dumps({"rules": [dict(OSCARS, verdict=False)]}), 2000)
+    assert knowledge_rules.match_rule("¿Titanic ganó 11 oscars?")["is_true"] is False
+    assert knowledge_rules.rules_version() == "rules:2000.0"
+
+
+def test_invalid_rules_keep_previous_engine(rules_file):
+    write_rules(rules_file, json.dumps([OSCARS]), 1000)
+    assert knowledge_rules.match_rule("¿Titanic ganó 11 oscars?")
+
+    write_rules(rules_file, "{roto", 2000)
+    assert knowledge_rules.match_rule("¿Titanic ganó 11 oscars?")
+    assert knowledge_rules.rules_version() == "rules:1000.0"
@@ -0,0 +1,70 @@
+# tests/test_llm_client.py
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from agents import llm_client
+from agents.llm_client import JSONObjectScanner, extract_first_json, stop_on_json, stop_on_verdict
+
+ANSWER = '{"intent": "search", "target_title": "Titanic"} y aquí sigue el modelo'
+
+
+class FakeStream:
+    """Respuesta streaming de Ollama, un carácter por línea"""
+
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self, decode_unicode=True):
+        for char in self.text:
+            time.sleep(0.001)
+            yield json.dumps({"response": char, "done": False})
+        yield json.dumps({"response": "", "done": True})
+
+
+def test_scanner_stops_at_first_object():
+    scanner = JSONObjectScanner()
+    assert scanner.feed('texto {"a": "}{", ') is None
+    assert scanner.feed('"b": {"c": 1}} resto') == '{"a": "}{", "b": {"c": 1}}'
+
+
+def test_stop_factories_do_not_share_state():
+    first, second = stop_on_json(), stop_on_json()
+    assert not first('{"a": ', '{"a": ')
+    assert not second("{", "{")
+    assert first("1}", '{"a": 1}')
+    assert stop_on_verdict()("SO", "Es FALSO")
+
+
+def test_hedged_attempts_get_their_own_stop_condition(monkeypatch):
+    monkeypatch.setattr(requests, "post", lambda *args, **kwargs: FakeStream(ANSWER))
+    monkeypatch.setattr(llm_client, "HEDGE_LLM", True)
+
+    def both_attempts(endpoint, fn, *args):
+        # Las dos peticiones del hedging a la vez, como cuando la primera tarda
+        start = threading.Barrier(2)
+
+        def attempt():
+            start.wait()
+            return fn(threading.Event(), *args)
+
+        with ThreadPoolExecutor(2) as pool:
+            results = [f.result() for f in [pool.submit(attempt), pool.submit(attempt)]]
+        return results[0]
+
+    monkeypatch.setattr(llm_client, "hedged_call", both_attempts)
+
+    text = llm_client.ollama_generate("consulta", stop_when=stop_on_json)
+    assert extract_first_json(text) == {"intent": "search", "target_title": "Titanic"}
+    assert text.endswith("}")
@@ -0,0 +1,76 @@
+# tests/test_offline_mode.py
+
+import asyncio
+
+import pytest
+
+from agents import evidence_store
+from agents.evidence_store import EvidenceStore
+
+TITANIC = {
+    "title": "Titanic", "year": "1997", "genres": ["Drama"], "director": "James Cameron",
+    "summary": "", "rating": "79%", "cast": ["Leonardo DiCaprio", "Kate Winslet"],
+    "tmdb_id": 597, "media_type": "movie",
+}
+STRANGER_THINGS = dict(
+    TITANIC, title="Stranger Things", year="2016", genres=["Drama", "Sci-Fi & Fantasy"],
+    director="Matt Duffer, Ross Duffer", cast=["Winona Ryder"], tmdb_id=66732, media_type="tv"
+)
+
+
+@pytest.fixture
+def tmdb_fetches(tmp_path, monkeypatch):
+    """Catálogo con dos títulos, modo offline y cualquier acceso a TMDB prohibido"""
+    import agents.web_search
+    import agents.person_search
+    import agents.tv_seasons
+    import agents.fact_checker
+
+    # Los agentes capturan las excepciones de red: se anota cada intento
+    fetches = []
+
+    def no_network(*args, **kwargs):
+        fetches.append(args)
+        raise ConnectionError("acceso a TMDB en modo offline")
+
+    store = EvidenceStore(str(tmp_path / "evidence.sqlite3"))
+    store.put(TITANIC)
+    store.put(STRANGER_THINGS)
+    monkeypatch.setattr(evidence_store, "_store", store)
+
+    for module in (agents.web_search, agents.fact_checker, agents.tv_seasons):
+        monkeypatch.setattr(module, "EVIDENCE_MODE", "offline")
+    for module in (agents.web_search, agents.person_search, agents.tv_seasons):
+        monkeypatch.setattr(module, "open_tmdb_page", no_network)
+    for name in ("search_tmdb_inteligente", "scrape_tmdb_with_cast", "fetch_search_html"):
+        monkeypatch.setattr(agents.web_search, name, no_network)
+    monkeypatch.setattr(agents.person_search, "fetch_search_html", no_network)
+    monkeypatch.setattr(agents.person_search, "search_tmdb_person", no_network)
+    monkeypatch.setattr(agents.tv_seasons, "fetch_page_html", no_network)
+
+    # Sin LLM ni reportes: el NLP devuelve la intención, el verificador no decide
+    def nlp_agent(query):
+        title = "Stranger Things" if "Stranger" in query else "Titanic"
+        fact_check = "actuó" in query
+        return {"intent": "fact_check" if fact_check else "search", "target_title": title,
+                "target_titles": [title], "task": "get_info", "needs_web": True,
+                "needs_fact_check": fact_check}
+
+    monkeypatch.setattr("agents.nlp_agent.nlp_agent", nlp_agent)
+    monkeypatch.setattr(agents.fact_checker, "ollama_generate", lambda *args, **kwargs: "INCONCLUSO: sin datos")
+    monkeypatch.setattr("agents.reporter.reporter_agent", lambda **kwargs: {"hash": "test"})
+    agents.web_search.TMDB_CACHE.clear()
+    return fetches
+
+
+@pytest.mark.parametrize("query", [
+    "¿Es verdad que Tom Hanks actuó en Titanic?",
+    "¿Cuántas temporadas tiene Stranger Things?",
+    "¿Qué episodios tiene la temporada 2 de Stranger Things?",
+])
+def test_offline_queries_never_fetch(tmdb_fetches, query):
+    from supervisor.coordinator import run_query
+
+    response = asyncio.run(run_query(query))
+    assert response
+    assert tmdb_fetches == []
@@ -0,0 +1,34 @@
+# tests/test_person_search.py
+
+import pytest
+
+from agents import person_search
+
+RESULTS = [
+    {"id": 31, "name": "Tom Hanks"},
+    {"id": 6193, "name": "Leonardo DiCaprio"},
+]
+
+
+@pytest.fixture
+def results(monkeypatch):
+    monkeypatch.setattr(person_search, "hedged_call", lambda *args: "<html></html>")
+    monkeypatch.setattr(person_search, "parse_document", lambda kind, html: list(RESULTS))
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Tom Hanks", (31, "Tom Hanks")),
+    ("tom hanks", (31, "Tom Hanks")),
+    ("DiCaprio", (6193, "Leonardo DiCaprio")),
+    ("Tom Hankss", (None, None)),
+    ("Tom Cruise", (None, None)),
+])
+def test_search_only_accepts_matching_names(results, name, expected):
+    assert person_search.search_tmdb_person(name) == expected
+
+
+def test_same_person():
+    assert person_search.same_person("Kate Winslet", "Kate Winslet")
+    assert person_search.same_person("Penélope Cruz", "Penelope Cruz")
+    assert not person_search.same_person("Kate", "")
+    assert not person_search.same_person("Kate Winslet", "Kate Beckinsale")
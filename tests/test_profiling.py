@@ -0,0 +1,42 @@
+# tests/test_profiling.py
+
+import asyncio
+import time
+
+from agents.claim_verifier import embed_names, name_similarity
+from agents.resilience import query_thread
+from supervisor import profiling
+
+
+def busy(fn, *args):
+    until = time.monotonic() + 0.3
+    while time.monotonic() < until:
+        fn(*args)
+
+
+async def profiled(query, on_stage=None):
+    await asyncio.to_thread(query_thread(busy), embed_names, ["Keanu Reeves"])
+    return "ok"
+
+
+async def other(query, on_stage=None):
+    await asyncio.to_thread(query_thread(busy), name_similarity, ["Keanu"], ["Keanu Reeves"])
+    return "ok"
+
+
+def test_profile_ignores_concurrent_queries(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILES_DIR", str(tmp_path))
+
+    async def both():
+        (response, profile), _ = await asyncio.gather(
+            profiling.profiled_query("perfilada", runner=profiled),
+            other("otra")
+        )
+        return response, profile
+
+    response, profile = asyncio.run(both())
+    assert response == "ok"
+
+    folded = profiling.load_profile(profile["id"], folded=True)
+    assert "embed_names" in folded
+    assert "name_similarity" not in folded
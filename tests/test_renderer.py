@@ -0,0 +1,79 @@
+# tests/test_renderer.py
+
+import json
+
+import pytest
+
+from agents.renderer import VERDICTS, render_fact_check_response, render_report, verdict
+
+INTERPRETATION = {"intent": "fact_check", "target_title": "Titanic", "target_titles": ["Titanic"],
+                  "query_purpose": "verificar"}
+TITANIC = {
+    "title": "Titanic", "year": "1997", "genres": ["Drama", "Romance"], "director": "James Cameron",
+    "summary": "Un barco <se hunde>", "rating": "79%", "cast": ["Leonardo DiCaprio", "Kate Winslet"],
+}
+FACT_CHECK = {"claim": "Kate Winslet actuó en Titanic", "is_true": True,
+              "evidence": "Aparece en el reparto", "confidence": "high"}
+
+
+@pytest.mark.parametrize("is_true, icon, status", [
+    (True, "✅", "VERDADERO"),
+    (False, "❌", "FALSO"),
+    (None, "⚠️", "INCONCLUSO"),
+    ("quizá", "⚠️", "INCONCLUSO"),
+])
+def test_verdicts(is_true, icon, status):
+    assert verdict(is_true) == (icon, status)
+    response = render_fact_check_response(dict(FACT_CHECK, is_true=is_true))
+    assert response.startswith(f"{icon} **Fact-Check Resultado: {status}**")
+
+
+def test_verdicts_cover_every_outcome():
+    assert set(VERDICTS) == {True, False, None}
+
+
+def test_markdown_report():
+    report = render_report(INTERPRETATION, TITANIC, FACT_CHECK)
+    assert report.startswith("# 🎬 Reporte: Titanic\n")
+    assert "**Director:** James Cameron" in report
+    assert "**Géneros:** Drama, Romance" in report
+    assert "- Kate Winslet" in report
+    assert "**Resultado:** ✅ **VERDADERO**" in report
+    assert "Un barco <se hunde>" in report
+
+
+def test_html_report_escapes_values():
+    report = render_report(INTERPRETATION, TITANIC, dict(FACT_CHECK, is_true=False), fmt="html")
+    assert report.startswith("<!DOCTYPE html>")
+    assert "<li>Kate Winslet</li>" in report
+    assert "Un barco &lt;se hunde&gt;" in report
+    assert "❌ <strong>FALSO</strong>" in report
+
+
+def test_json_report_keeps_raw_values():
+    context = json.loads(render_report(INTERPRETATION, TITANIC, FACT_CHECK, fmt="json"))
+    assert context["title"] == "Titanic" and context["intent"] == "fact_check"
+    assert context["evidence"]["cast"] == TITANIC["cast"]
+    assert context["fact_check"]["is_true"] is True and context["fact_check"]["status"] == "VERDADERO"
+    assert context["comparison"] is None
+
+
+def test_report_without_evidence_or_fact_check():
+    report = render_report({"intent": "search"})
+    assert "# 🎬 Reporte: Título no identificado" in report
+    assert "❌ No se encontró información." in report
+    assert "No se realizó verificación para esta consulta." in report
+
+
+def test_comparison_report_lists_common_cast():
+    avatar = dict(TITANIC, title="Avatar", year="2009", cast=["Sam Worthington", "Kate Winslet"])
+    interpretation = dict(INTERPRETATION, target_titles=["Titanic", "Avatar", "Nope"])
+    report = render_report(interpretation, comparison=[TITANIC, avatar, {"error": "no encontrado"}])
+    assert "| Titanic | 1997 | James Cameron | Drama, Romance |" in report
+    assert "| Nope | - | - | No encontrado |" in report
+    assert "**🤝 Actores en común:** Kate Winslet" in report
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        render_report(INTERPRETATION, fmt="pdf")
@@ -0,0 +1,60 @@
+# tests/test_report_store.py
+
+import gzip
+import json
+import zipfile
+
+from agents.report_store import ReportStore, content_hash
+
+REPORT = """# 🎬 Reporte: Titanic
+
+**Fecha:** {date}
+**Consulta:** ¿Quién dirigió Titanic?
+
+James Cameron
+"""
+
+
+def test_content_hash_ignores_date_line():
+    first = REPORT.format(date="2026-10-18 10:00:00")
+    second = REPORT.format(date="2026-10-19 23:59:59")
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash(first.replace("James Cameron", "Steven Spielberg"))
+
+
+def test_identical_reports_share_one_body(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+
+    first = store.save(REPORT.format(date="2026-10-18"), query="q1", title="Titanic", created=1000)
+    second = store.save(REPORT.format(date="2026-10-19"), query="q2", title="Titanic", created=2000)
+    other = store.save(REPORT.format(date="2026-10-19") + "\nExtra\n", title="Titanic", created=3000)
+
+    assert not first["deduplicated"] and second["deduplicated"] and not other["deduplicated"]
+    assert first["hash"] == second["hash"] != other["hash"]
+    assert store.stats()["reports"] == 3 and store.stats()["bodies"] == 2
+    assert [row["query"] for row in store.find(title="titanic")] == [None, "q2", "q1"]
+
+
+def test_body_round_trips_through_gzip(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    body = REPORT.format(date="2026-10-18") * 50
+    digest = store.save(body, title="Titanic")["hash"]
+
+    stored = store._conn().execute("SELECT body, size FROM bodies WHERE hash = ?", (digest,)).fetchone()
+    assert gzip.decompress(stored["body"]).decode("utf-8") == body
+    assert stored["size"] == len(body.encode("utf-8")) > len(stored["body"])
+    assert store.get_body(digest) == body
+    assert store.get_body("no-existe") is None
+
+
+def test_export_writes_each_body_once(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    digest = store.save(REPORT.format(date="a"), title="Titanic")["hash"]
+    store.save(REPORT.format(date="b"), title="Titanic")
+
+    dest = tmp_path / "export.zip"
+    assert store.export(str(dest)) == 2
+    with zipfile.ZipFile(dest) as archive:
+        assert archive.namelist() == [f"bodies/{digest}.md", "index.jsonl"]
+        index = [json.loads(line) for line in archive.read("index.jsonl").decode("utf-8").splitlines()]
+    assert [row["hash"] for row in index] == [digest, digest]
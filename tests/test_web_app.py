@@ -0,0 +1,16 @@
+# tests/test_web_app.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from web.web_app import app
+
+
+@pytest.mark.parametrize("text", ["[1, 2]", "5", '"hola"', "null"])
+def test_ws_rejects_non_object_json(text):
+    with TestClient(app).websocket_connect("/ws/chat") as ws:
+        ws.send_text(text)
+        assert ws.receive_json() == {"type": "error", "error": "Se esperaba un objeto JSON"}
+        # La conexión sigue viva
+        ws.send_text("{mal")
+        assert ws.receive_json() == {"type": "error", "error": "JSON inválido"}
@@ -0,0 +1,180 @@
+# web/assets.py
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+
+from fastapi.responses import Response
+
+logger = logging.getLogger("assets")
+
+# Con FACTCHECK_ASSETS_RELOAD=1 se vuelve a leer el disco si cambia algo (desarrollo)
+RELOAD = os.environ.get("FACTCHECK_ASSETS_RELOAD", "0") == "1"
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Respuestas JSON de la API a partir de este tamaño se envían con gzip
+JSON_GZIP_MIN_SIZE = 1024
+
+
+def brotli_compress(data: bytes):
+    """Brotli si el paquete está instalado; si no, solo gzip"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+class Asset:
+    """Fichero en memoria con sus variantes precomprimidas"""
+
+    def __init__(self, name: str, data: bytes, content_type: str):
+        self.name = name
+        self.content_type = content_type
+        digest = hashlib.sha256(data).hexdigest()
+        self.etag = f'"{digest[:16]}"'
+
+        stem, ext = os.path.splitext(name)
+        self.hashed_name = f"{stem}.{digest[:12]}{ext}"
+
+        self.bodies = {"identity": data}
+        if content_type.startswith(COMPRESSIBLE):
+            self.bodies["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+            compressed = brotli_compress(data)
+            if compressed is not None:
+                self.bodies["br"] = compressed
+
+    def response(self, request, cache_control: str) -> Response:
+        encoding = negotiate(request.headers.get("accept-encoding", ""), self.bodies)
+        # Cada codificación es una representación distinta: su propio ETag
+        etag = self.etag if encoding == "identity" else f'{self.etag[:-1]}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if self.etag[1:-1] in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.bodies[encoding], media_type=self.content_type, headers=headers)
+
+
+def negotiate(accept_encoding: str, bodies: dict) -> str:
+    """Mejor variante aceptada por el cliente (br > gzip > sin comprimir)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = re.search(r"q=([\d.]+)", params)
+        if name and not (quality and float(quality.group(1)) == 0):
+            accepted.add(name)
+
+    for encoding in ("br", "gzip"):
+        if encoding in bodies and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+def json_response(request, payload, status_code: int = 200, headers: dict = None) -> Response:
+    """
+    JSONResponse con gzip para cuerpos grandes si el cliente lo acepta.
+    Si se pasa un ETag fuerte, la variante comprimida lleva el suyo.
+    """
+    headers = dict(headers or {})
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+    if len(body) >= JSON_GZIP_MIN_SIZE:
+        headers["Vary"] = "Accept-Encoding"
+        if negotiate(request.headers.get("accept-encoding", ""), {"gzip": True}) == "gzip":
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+            if "ETag" in headers:
+                headers["ETag"] = f'{headers["ETag"][:-1]}-gzip"'
+
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+class AssetRegistry:
+    """
+    Estáticos con URL con hash de contenido (cacheables para siempre) y
+    la página del chat reescrita para apuntar a ellos. Todo se lee y
+    comprime una vez al arrancar.
+    """
+
+    def __init__(self, static_dir: str, template_path: str):
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.lock = threading.Lock()
+        self.signature = None
+        self.assets = {}
+        self.by_hashed_name = {}
+        self.page = None
+        self.load()
+
+    def _disk_signature(self):
+        paths = [self.template_path] + [os.path.join(self.static_dir, n) for n in os.listdir(self.static_dir)]
+        return tuple((path, os.path.getmtime(path)) for path in sorted(paths) if os.path.isfile(path))
+
+    def load(self):
+        assets = {}
+        for name in sorted(os.listdir(self.static_dir)):
+            path = os.path.join(self.static_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            assets[name] = Asset(name, data, content_type)
+
+        page = None
+        if os.path.exists(self.template_path):
+            with open(self.template_path, encoding="utf-8") as f:
+                html = f.read()
+            # /static/style.css → /static/style.<hash>.css
+            html = re.sub(
+                r'/static/([\w.-]+)',
+                lambda m: f"/static/{assets[m.group(1)].hashed_name}" if m.group(1) in assets else m.group(0),
+                html
+            )
+            page = Asset("chat.html", html.encode("utf-8"), "text/html; charset=utf-8")
+
+        self.assets = assets
+        self.by_hashed_name = {asset.hashed_name: asset for asset in assets.values()}
+        self.page = page
+        self.signature = self._disk_signature() if RELOAD else None
+        logger.info(f"📦 {len(assets)} estáticos cargados en memoria")
+
+    def _maybe_reload(self):
+        if RELOAD:
+            with self.lock:
+                if self._disk_signature() != self.signature:
+                    self.load()
+
+    def url(self, name: str) -> str:
+        asset = self.assets.get(name)
+        return f"/static/{asset.hashed_name}" if asset else f"/static/{name}"
+
+    def static_response(self, request, name: str):
+        """URL con hash → inmutable; nombre original → revalidar con ETag"""
+        self._maybe_reload()
+        asset = self.by_hashed_name.get(name)
+        if asset:
+            return asset.response(request, IMMUTABLE)
+        asset = self.assets.get(name)
+        if asset:
+            return asset.response(request, REVALIDATE)
+        return None
+
+    def page_response(self, request):
+        self._maybe_reload()
+        if self.page is None:
+            return None
+        return self.page.response(request, REVALIDATE)
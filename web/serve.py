@@ -0,0 +1,48 @@
+# web/serve.py
+#
+# Arranque del servidor web, con uno o varios workers.
+#
+#   python web/serve.py --workers 4 --max-browsers 8
+#
+# Con más de un worker las cachés (TMDB, LLM y veredictos) pasan a una
+# base SQLite compartida en modo WAL y los navegadores se reparten entre
+# los workers. Equivalente con gunicorn:
+#
+#   FACTCHECK_WORKERS=4 FACTCHECK_CACHE_BACKEND=sqlite \
+#   gunicorn -k uvicorn.workers.UvicornWorker -w 4 web.web_app:app
+
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor web del Fact Checker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-browsers", type=int, default=None,
+                        help="navegadores simultáneos en total, repartidos entre workers")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite"], default=None)
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+
+    # Los workers heredan la configuración por variables de entorno
+    os.environ["FACTCHECK_WORKERS"] = str(workers)
+    if args.max_browsers:
+        os.environ["FACTCHECK_MAX_BROWSERS"] = str(args.max_browsers)
+    os.environ["FACTCHECK_CACHE_BACKEND"] = args.cache_backend or ("sqlite" if workers > 1 else "memory")
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")]))
+    sys.path.insert(0, ROOT_DIR)
+
+    import uvicorn
+
+    print(f"🚀 Servidor en {args.host}:{args.port} con {workers} worker(s), caché {os.environ['FACTCHECK_CACHE_BACKEND']}")
+    uvicorn.run("web.web_app:app", host=args.host, port=args.port, workers=workers)
+
+
+if __name__ == "__main__":
+    main()
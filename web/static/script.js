@@ -31,30 +31,105 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   let isProcessing = false;
+  let currentId = null;
+
+  // Identificador de la conversación (para preguntas de seguimiento)
+  let sessionId = sessionStorage.getItem("chatSessionId");
+  if (!sessionId) {
+    sessionId = String(Date.now()) + Math.random().toString(16).slice(2);
+    sessionStorage.setItem("chatSessionId", sessionId);
+  }
+  let socket = null;
+  const loaderText = document.getElementById("loader-text");
+
+  function lockUI() {
+    input.value = "";
+    input.disabled = true;
+    button.textContent = "Cancelar";
+    loader.style.display = "block";
+    if (loaderText) loaderText.textContent = "Procesando...";
+    isProcessing = true;
+  }
+
+  function unlockUI() {
+    loader.style.display = "none";
+    input.disabled = false;
+    button.disabled = false;
+    button.textContent = "Enviar";
+    input.focus();
+    isProcessing = false;
+    currentId = null;
+  }
+
+  // WebSocket persistente: etapas en vivo y cancelación en el servidor
+  function connectSocket() {
+    if (!("WebSocket" in window)) return;
+    const protocol = location.protocol === "https:" ? "wss://" : "ws://";
+    socket = new WebSocket(protocol + location.host + "/ws/chat");
+
+    socket.addEventListener("message", (event) => {
+      const msg = JSON.parse(event.data);
+      if (msg.id && msg.id !== currentId) return; // respuesta de una consulta ya cancelada
+
+      if (msg.type === "stage") {
+        if (loaderText) loaderText.textContent = msg.label + "...";
+      } else if (msg.type === "result") {
+        appendMessage(msg.response, "bot-message");
+        unlockUI();
+      } else if (msg.type === "cancelled") {
+        appendMessage("🛑 Consulta cancelada.", "bot-message");
+        unlockUI();
+      } else if (msg.type === "error") {
+        appendMessage(`❌ ${msg.error}`, "bot-message");
+        if (isProcessing) unlockUI();
+      }
+    });
+
+    socket.addEventListener("close", () => {
+      socket = null;
+      if (isProcessing) {
+        appendMessage("❌ Conexión perdida con el servidor.", "bot-message");
+        unlockUI();
+      }
+      setTimeout(connectSocket, 2000);
+    });
+  }
+
+  function cancelQuery() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type: "cancel", id: currentId }));
+      if (loaderText) loaderText.textContent = "Cancelando...";
+    }
+  }
 
   async function sendMessage(e) {
     if (e && typeof e.preventDefault === "function") e.preventDefault();
 
-    // Evitar múltiples envíos
-    if (isProcessing) return;
+    // Con una consulta en curso el botón sirve para cancelarla
+    if (isProcessing) {
+      cancelQuery();
+      return;
+    }
     const text = input.value.trim();
     if (!text) return;
 
     appendMessage(text, "user-message");
+    lockUI();
 
-    // bloquear UI
-    input.value = "";
-    input.disabled = true;
-    button.disabled = true;
-    loader.style.display = "block";
-    isProcessing = true;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      currentId = String(Date.now()) + Math.random().toString(16).slice(2);
+      socket.send(JSON.stringify({ type: "query", id: currentId, query: text, session_id: sessionId }));
+      return;
+    }
 
+    // Sin WebSocket: petición HTTP clásica (no cancelable)
+    button.disabled = true;
     try {
       const resp = await fetch("/api/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         // IMPORTANTE: usar la clave 'message' ya que así la espera tu web_app
-        body: JSON.stringify({ message: text }),
+        body: JSON.stringify({ message: text, session_id: sessionId }),
       });
 
       // manejar errores HTTP
@@ -81,14 +156,17 @@ document.addEventListener("DOMContentLoaded", () => {
       console.error("Error en fetch /api/chat:", err);
       appendMessage("❌ Error conectando con el servidor.", "bot-message");
     } finally {
-      loader.style.display = "none";
-      input.disabled = false;
-      button.disabled = false;
-      input.focus();
-      isProcessing = false;
+      unlockUI();
     }
   }
 
+  // Escape cancela la consulta en curso (el input está deshabilitado)
+  document.addEventListener("keydown", (e) => {
+    if (e.key === "Escape" && isProcessing) cancelQuery();
+  });
+
+  connectSocket();
+
   // click en botón
   if (button) button.addEventListener("click", sendMessage);
 
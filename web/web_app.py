@@ -1,12 +1,16 @@
 # web/web_app.py
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
 import sys
+import json
+import asyncio
+import logging
+import threading
+from functools import partial
 
 # --------------------------------------------------------------
 # IMPORTS Y PATHS
@@ -16,6 +20,21 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(ROOT_DIR)
 
 from supervisor.coordinator import run_query
+from agents.knowledge_rules import rules_stats
+from agents.cache import cache_stats
+from agents.resilience import resilience_stats
+from agents.fetch_scheduler import scheduler_stats
+from agents.html_parser import shutdown_pool
+from agents.resilience import QueryCancelled
+from agents.report_store import get_store
+from supervisor.job_queue import JobQueue, JobWorkerPool, validate_webhook_url
+from supervisor.readiness import readiness, schedule_warm_up
+from web.assets import AssetRegistry, json_response
+from supervisor.response_cache import cached_response, store_response
+from supervisor.traffic_log import captured_query
+from supervisor.profiling import PROFILING_ENABLED, profiled_query, recent_profiles, load_profile
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 
 # --------------------------------------------------------------
 # CONFIGURACIÓN FASTAPI
@@ -31,13 +50,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Montar carpeta estática (CSS, JS)
+# Carpeta estática (CSS, JS) y plantilla del chat
 STATIC_DIR = os.path.join(ROOT_DIR, "web", "static")
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-
-# Path del archivo HTML
 CHAT_HTML = os.path.join(ROOT_DIR, "web", "templates", "chat.html")
 
+# Se leen y precomprimen una vez; las URLs llevan el hash del contenido
+assets = AssetRegistry(STATIC_DIR, CHAT_HTML)
+
+# Respuestas de GET /api/query: cacheables por un proxy/CDN, que revalida con ETag
+QUERY_MAX_AGE = int(os.environ.get("FACTCHECK_QUERY_MAX_AGE", "300"))
+
+# Cola persistente de jobs y sus workers
+job_queue = JobQueue()
+job_workers = JobWorkerPool(job_queue, run_query)
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_workers.start()
+
+@app.on_event("startup")
+async def warm_backends():
+    # Navegador y modelo se calientan en segundo plano; /api/ready informa
+    if os.environ.get("FACTCHECK_WARMUP", "1") == "1":
+        schedule_warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_background():
+    await job_workers.stop()
+    shutdown_pool()
+
 # --------------------------------------------------------------
 # MODELO PARA EL INPUT DEL CHAT
 # --------------------------------------------------------------
@@ -51,11 +92,18 @@ class ChatRequest(BaseModel):
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/chat", response_class=HTMLResponse)
-def serve_chat():
-    if not os.path.exists(CHAT_HTML):
+def serve_chat(request: Request):
+    response = assets.page_response(request)
+    if response is None:
         return HTMLResponse("<h2>Error: chat.html no encontrado</h2>", status_code=500)
+    return response
 
-    return FileResponse(CHAT_HTML)
+@app.get("/static/{name}")
+def serve_static(name: str, request: Request):
+    response = assets.static_response(request, name)
+    if response is None:
+        return JSONResponse({"error": "No encontrado"}, status_code=404)
+    return response
 
 # --------------------------------------------------------------
 # API DEL CHAT
@@ -74,12 +122,247 @@ async def chat_api(request: Request):
 
         print(f"🧠 Recibido del usuario: {user_query}")
 
-        response = await run_query(user_query)
+        # session_id opcional: permite preguntas de seguimiento
+        session_id = data.get("session_id")
+
+        # Perfilado bajo demanda: cabecera X-Profile: 1 o ?profile=1
+        wants_profile = "1" in (request.headers.get("x-profile"), request.query_params.get("profile"))
+        if wants_profile and PROFILING_ENABLED:
+            response, profile = await profiled_query(
+                user_query, runner=partial(captured_query, channel="http"), session_id=session_id
+            )
+            return json_response(request, {"response": response, "profile_id": profile["id"]},
+                                 headers={"X-Profile-Id": profile["id"]})
 
-        return JSONResponse({"response": response})
+        response = await captured_query(user_query, "http", session_id=session_id)
+
+        return json_response(request, {"response": response})
 
     except Exception as e:
         print(f"❌ Error interno en /api/chat: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+
+
+# --------------------------------------------------------------
+# CONSULTA POR GET (cacheable con ETag)
+# --------------------------------------------------------------
+
+def etag_matches(request: Request, etag: str) -> bool:
+    return etag.strip('"') in request.headers.get("if-none-match", "")
+
+@app.get("/api/query")
+async def query_api(request: Request, q: str = ""):
+    user_query = q.strip()
+    if not user_query:
+        return JSONResponse({"error": "Parámetro q vacío"}, status_code=400)
+
+    # Evidencia sin cambios → la misma respuesta, sin pasar por el pipeline
+    entry = cached_response(user_query)
+    if entry is None:
+        stages = {}
+        response = await run_query(user_query, on_stage=lambda stage, data: stages.__setitem__(stage, data))
+        entry = store_response(user_query, response, stages)
+        if entry is None:
+            return json_response(request, {"response": response}, headers={"Cache-Control": "no-store"})
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={QUERY_MAX_AGE}, must-revalidate"
+    }
+    if etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return json_response(request, {"response": entry["response"]}, headers=headers)
+
+# --------------------------------------------------------------
+# CHAT POR WEBSOCKET (etapas en vivo y cancelación)
+# --------------------------------------------------------------
+#
+#   cliente → {"type": "query", "id": "...", "query": "...", "session_id": "..."} | {"type": "cancel"}
+#   servidor → accepted | stage | result | cancelled | error  (con el mismo id)
+
+STAGE_LABELS = {
+    "interpretation": "Consulta interpretada",
+    "comparison": "Títulos encontrados",
+    "evidence": "Información encontrada",
+    "seasons": "Temporadas cargadas",
+    "fact_check": "Verificación completada",
+    "report": "Reporte generado",
+}
+
+@app.websocket("/ws/chat")
+async def chat_ws(websocket: WebSocket):
+    await websocket.accept()
+
+    outgoing = asyncio.Queue()
+    current = {"task": None, "event": None}
+
+    async def send_loop():
+        while True:
+            message = await outgoing.get()
+            await websocket.send_text(json.dumps(message, ensure_ascii=False, default=str))
+
+    def cancel_current():
+        # El evento llega a los hilos (Playwright, Ollama); cancel() al event loop
+        if current["task"] and not current["task"].done():
+            current["event"].set()
+            current["task"].cancel()
+
+    async def run(query_id, user_query: str, event: threading.Event, session_id: str = None):
+        def on_stage(stage, data):
+            outgoing.put_nowait({
+                "type": "stage", "id": query_id, "stage": stage,
+                "label": STAGE_LABELS.get(stage, stage), "data": data
+            })
+
+        try:
+            response = await captured_query(user_query, "ws", on_stage=on_stage, cancel_event=event, session_id=session_id)
+            outgoing.put_nowait({"type": "result", "id": query_id, "response": response})
+        except (asyncio.CancelledError, QueryCancelled):
+            print(f"🛑 Consulta cancelada: {user_query}")
+            outgoing.put_nowait({"type": "cancelled", "id": query_id})
+        except Exception as e:
+            print(f"❌ Error interno en /ws/chat: {e}")
+            outgoing.put_nowait({"type": "error", "id": query_id, "error": str(e)})
+
+    sender = asyncio.create_task(send_loop())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                outgoing.put_nowait({"type": "error", "error": "JSON inválido"})
+                continue
+            if not isinstance(message, dict):
+                outgoing.put_nowait({"type": "error", "error": "Se esperaba un objeto JSON"})
+                continue
+
+            if message.get("type") == "cancel":
+                cancel_current()
+                continue
+
+            user_query = message.get("query") or message.get("message") or ""
+            user_query = user_query.strip() if isinstance(user_query, str) else ""
+            if not user_query:
+                outgoing.put_nowait({"type": "error", "id": message.get("id"), "error": "Mensaje vacío"})
+                continue
+
+            print(f"🧠 Recibido del usuario (ws): {user_query}")
+            # Una consulta por conexión: la nueva sustituye a la anterior
+            cancel_current()
+            event = threading.Event()
+            current["event"] = event
+            current["task"] = asyncio.create_task(run(message.get("id"), user_query, event, message.get("session_id")))
+            outgoing.put_nowait({"type": "accepted", "id": message.get("id")})
+
+    except WebSocketDisconnect:
+        print("🔌 Cliente desconectado")
+    finally:
+        # Consulta abandonada: liberar navegador y LLM cuanto antes
+        cancel_current()
+        sender.cancel()
+
+# --------------------------------------------------------------
+# API DE JOBS (consultas largas con polling o webhook)
+# --------------------------------------------------------------
+
+@app.post("/api/jobs")
+async def create_job(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "JSON inválido"}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({"error": "Se esperaba un objeto JSON"}, status_code=400)
+
+    user_query = data.get("message") or data.get("query")
+    if not user_query:
+        return JSONResponse({"error": "Mensaje vacío"}, status_code=400)
+
+    webhook_url = data.get("webhook_url")
+    if webhook_url:
+        try:
+            await asyncio.to_thread(validate_webhook_url, webhook_url)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+    job_id = job_queue.enqueue(user_query, webhook_url=webhook_url)
+    return JSONResponse(
+        {"id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"},
+        status_code=202
+    )
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Job no encontrado"}, status_code=404)
+    return JSONResponse(job)
+
+# --------------------------------------------------------------
+# ARCHIVO DE REPORTES
+# --------------------------------------------------------------
+
+@app.get("/api/reports")
+def list_reports(title: str = None, date: str = None, limit: int = 50):
+    try:
+        return JSONResponse(get_store().find(title=title, date=date, limit=min(limit, 500)))
+    except ValueError:
+        return JSONResponse({"error": "Fecha inválida, usa YYYY-MM-DD"}, status_code=400)
+
+@app.get("/api/reports/{digest}")
+def get_report(digest: str):
+    body = get_store().get_body(digest)
+    if body is None:
+        return JSONResponse({"error": "Reporte no encontrado"}, status_code=404)
+    return PlainTextResponse(body, media_type="text/markdown")
+
+# --------------------------------------------------------------
+# PERFILES DE CONSULTAS (FACTCHECK_PROFILING=1)
+# --------------------------------------------------------------
+
+@app.get("/api/profiles")
+def list_profiles(limit: int = 20):
+    return JSONResponse(recent_profiles(min(limit, 200)))
+
+@app.get("/api/profiles/{profile_id}")
+def get_profile(profile_id: str, format: str = "json"):
+    profile = load_profile(profile_id, folded=format == "folded")
+    if profile is None:
+        return JSONResponse({"error": "Perfil no encontrado"}, status_code=404)
+    if format == "folded":
+        return PlainTextResponse(profile)
+    return JSONResponse(profile)
+
+# --------------------------------------------------------------
+# READINESS
+# --------------------------------------------------------------
+
+@app.get("/api/ready")
+async def ready_api():
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+# --------------------------------------------------------------
+# ESTADÍSTICAS DE REGLAS, CACHÉS, RESILIENCIA Y COLA DE TMDB
+# --------------------------------------------------------------
+
+@app.get("/api/rules/stats")
+def rules_stats_api():
+    return JSONResponse(rules_stats())
+
+
+@app.get("/api/cache/stats")
+def cache_stats_api():
+    return JSONResponse(cache_stats())
+
+
+@app.get("/api/resilience/stats")
+def resilience_stats_api():
+    return JSONResponse(resilience_stats())
+
+
+@app.get("/api/fetch/stats")
+def fetch_stats_api():
+    return JSONResponse(scheduler_stats())